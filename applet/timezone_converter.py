@@ -1,6 +1,12 @@
+import functools
+import os
 import sys
-from datetime import datetime
-import pytz
+from datetime import datetime, timedelta, timezone
+
+# Only what a single conversion needs is imported at module level; the bulk,
+# server and world clock modes import their modules where they are used, and
+# pytz is only imported by the pytz backend, to keep start-up fast. Benchmarks
+# and the backend conformance check are in timezone_converter_bench.py.
 
 
 TIMEZONE_MAP = {
@@ -17,6 +23,123 @@ TIMEZONE_MAP = {
     "UTC": "UTC",
 }
 
+DEFAULT_CHUNK_SIZE = 10000  # rows converted and written at a time in bulk mode
+
+
+# Timezone backends. Each loads zones by name; TIMEZONE_CONVERTER_BACKEND picks
+# one ("zoneinfo", the default, or "pytz", which needs pytz installed).
+
+
+class UnknownTimezoneError(KeyError):
+    pass
+
+
+def _zoneinfo_zone(name):
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise UnknownTimezoneError(name) from e
+
+
+def _pytz_zone(name):
+    import pytz
+
+    try:
+        return pytz.timezone(name)
+    except pytz.UnknownTimeZoneError as e:
+        raise UnknownTimezoneError(name) from e
+
+
+BACKENDS = {
+    "zoneinfo": _zoneinfo_zone,
+    "pytz": _pytz_zone,
+}
+
+
+def default_backend():
+    return os.environ.get("TIMEZONE_CONVERTER_BACKEND") or "zoneinfo"
+
+
+@functools.lru_cache(maxsize=None)
+def _load_timezone(name, backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown timezone backend '{backend}'.")
+    return BACKENDS[backend](name)
+
+
+def get_timezone(name, backend=None):
+    # Abbreviation or full name; raises UnknownTimezoneError
+    if not isinstance(name, str):
+        raise UnknownTimezoneError(name)
+    return _load_timezone(TIMEZONE_MAP.get(name, name), backend or default_backend())
+
+
+def _minute_offset(offset):
+    # pytz rounds UTC offsets to the nearest minute: Bangkok's +06:42:04 (local
+    # mean time until 1920) is +06:42 there. PEP 495 zones are rounded the same
+    # way so that both backends give the same answers.
+    return timedelta(minutes=(offset // timedelta(seconds=1) + 30) // 60)
+
+
+def localize(naive, zone):
+    """
+    Attach `zone` to a naive wall time the way pytz's localize() does by default
+    (is_dst=False), for pytz zones and PEP 495 zones such as ZoneInfo alike: a
+    time in a DST gap keeps the offset from before the gap, and a repeated time
+    takes its non-DST occurrence (the later one if both or neither are DST).
+    """
+    if hasattr(zone, "localize"):
+        return zone.localize(naive)
+    first = naive.replace(tzinfo=zone)
+    second = naive.replace(tzinfo=zone, fold=1)
+    if first.utcoffset() == second.utcoffset():
+        localized = first
+    elif first.utcoffset() < second.utcoffset():
+        # In a gap fold=0 keeps the offset from before it. Return the same instant
+        # as a real wall time, since astimezone() into the same zone is a no-op.
+        utc = naive - _minute_offset(first.utcoffset())
+        return to_zone(utc.replace(tzinfo=timezone.utc), zone)
+    elif bool(first.dst()) != bool(second.dst()):
+        localized = second if first.dst() else first
+    else:
+        localized = second
+    offset = localized.utcoffset()
+    if offset % timedelta(minutes=1):
+        return localized.replace(tzinfo=timezone(_minute_offset(offset)))
+    return localized
+
+
+def to_zone(moment, zone):
+    """
+    moment.astimezone(zone), with the offset rounded to the minute as in pytz.
+    """
+    converted = moment.astimezone(zone)
+    offset = converted.utcoffset()
+    if offset % timedelta(minutes=1):
+        rounded = _minute_offset(offset)
+        return (converted + rounded - offset).replace(tzinfo=timezone(rounded))
+    return converted
+
+
+# HH:MM times are dated 1900-01-01 by strptime. That is before pytz's transition
+# tables start (December 1901), so pytz, the original backend, gives them each
+# zone's earliest standard offset, usually local mean time: 12:00 EST is 16:56
+# UTC and 12:00 AEST is 11:14 JST. Every backend converts HH:MM times with those
+# offsets, so the classic CLI's answers don't depend on the backend.
+
+
+@functools.lru_cache(maxsize=None)
+def clock_offset(zone):
+    """
+    The UTC offset used for HH:MM times in `zone`.
+    """
+    if hasattr(zone, "localize"):
+        return zone.localize(datetime(1900, 1, 1)).utcoffset()
+    # PEP 495 zones use their earliest standard offset before the first transition
+    return _minute_offset(datetime.min.replace(tzinfo=zone).utcoffset())
+
 
 def convert_time(time_str, from_tz, to_tz):
     # Resolve abbreviations to full timezone names
@@ -25,9 +148,9 @@ def convert_time(time_str, from_tz, to_tz):
 
     # Define timezones
     try:
-        from_timezone = pytz.timezone(from_tz)
-        to_timezone = pytz.timezone(to_tz)
-    except pytz.UnknownTimeZoneError:
+        from_timezone = get_timezone(from_tz)
+        to_timezone = get_timezone(to_tz)
+    except UnknownTimezoneError:
         print(f"Error: Unknown timezone '{from_tz}' or '{to_tz}'.")
         sys.exit(1)
 
@@ -38,25 +161,947 @@ def convert_time(time_str, from_tz, to_tz):
         print("Error: Invalid time format. Use HH:MM (24-hour format).")
         sys.exit(1)
 
-    # Localize time to the source timezone
-    localized_time = from_timezone.localize(time_obj)
+    # Localize time to the source timezone, as UTC
+    utc_time = time_obj - clock_offset(from_timezone)
 
     # Convert time to the target timezone
-    converted_time = localized_time.astimezone(to_timezone)
+    converted_time = utc_time + clock_offset(to_timezone)
 
     return converted_time.strftime("%H:%M")
 
 
+# Bulk mode: many values per process, streamed in chunks
+
+
+@functools.lru_cache(maxsize=4096)
+def _convert_clock_time(time_str, from_timezone, to_timezone):
+    # Same conversion as convert_time; there are only 1440 distinct HH:MM values
+    time_obj = datetime.strptime(time_str, "%H:%M")
+    converted = time_obj - clock_offset(from_timezone) + clock_offset(to_timezone)
+    return converted.strftime("%H:%M")
+
+
+def convert_value(value, from_timezone, to_timezone):
+    """
+    Convert an HH:MM time (as convert_time does) or an ISO 8601 timestamp.
+    Naive timestamps are read in from_timezone; timestamps with an offset keep it.
+    Raises ValueError for anything else.
+    """
+    value = value.strip()
+    if len(value) <= 5:
+        return _convert_clock_time(value, from_timezone, to_timezone)
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        timestamp = localize(timestamp, from_timezone)
+    return to_zone(timestamp, to_timezone).isoformat()
+
+
+# Vectorized engine: whole NumPy arrays of timestamps at once, from each zone's
+# UTC-offset transition table. Results match localize() followed by astimezone,
+# DST gaps and folds included.
+
+SECONDS_PER_DAY = 86400
+SECOND = timedelta(seconds=1)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class ZoneTable:
+    """
+    A zone's UTC-offset transitions: from UTC second `transitions[i]` (since the
+    epoch) the zone is `offsets[i]` seconds ahead of UTC, with `dst[i]` set
+    during daylight saving time.
+    """
+
+    def __init__(self, transitions, offsets, dst, zone=None, until=None):
+        self.transitions = transitions
+        self.offsets = offsets
+        self.dst = dst
+        # A probed table only covers UTC seconds before `until`; later instants
+        # are looked up in `zone` itself, one at a time
+        self.zone = zone
+        self.until = until
+        self._scaled = {}
+
+    @classmethod
+    def from_zone(cls, zone):
+        if hasattr(zone, "localize"):
+            return cls.from_pytz(zone)
+        return cls.from_tzinfo(zone)
+
+    @classmethod
+    def from_pytz(cls, zone):
+        import numpy as np
+
+        second = timedelta(seconds=1)
+        epoch = datetime(1970, 1, 1)
+        if hasattr(zone, "_utc_transition_times"):
+            times = zone._utc_transition_times
+            info = zone._transition_info
+        else:
+            # A fixed offset (StaticTzInfo or UTC)
+            times = [datetime.min]
+            info = [(zone.utcoffset(None), timedelta(0), None)]
+        return cls(
+            np.array([(t - epoch) // second for t in times], dtype=np.int64),
+            np.array([offset // second for offset, _, _ in info], dtype=np.int64),
+            np.array([bool(dst) for _, dst, _ in info]),
+        )
+
+    @classmethod
+    def from_tzinfo(cls, zone, start=1850, end=2100, step=timedelta(hours=12)):
+        """
+        Probe a PEP 495 tzinfo (such as ZoneInfo) for its transitions from
+        `start` to `end` (years); before `start` the earliest offset applies and
+        from `end` on the zone is asked directly. An offset that changes and
+        changes back within `step` would be missed.
+        """
+        import numpy as np
+
+        second = timedelta(seconds=1)
+        epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+        def state(moment):
+            local = moment.astimezone(zone)
+            return local.utcoffset(), bool(local.dst())
+
+        moment = datetime(start, 1, 1, tzinfo=timezone.utc)
+        last = datetime(end, 1, 1, tzinfo=timezone.utc)
+        current = state(moment)
+        transitions = [(datetime.min.replace(tzinfo=timezone.utc) - epoch) // second]
+        states = [current]
+        while moment < last:
+            following = moment + step
+            if state(following) == current:
+                moment = following
+                continue
+            # Find the first second of the next state
+            low, high = moment, following
+            while high - low > second:
+                middle = low + (high - low) // second // 2 * second
+                if state(middle) == current:
+                    low = middle
+                else:
+                    high = middle
+            current = state(high)
+            transitions.append((high - epoch) // second)
+            states.append(current)
+            moment = high
+        return cls(
+            np.array(transitions, dtype=np.int64),
+            # Rounded to the minute, as the scalar conversions are
+            np.array([_minute_offset(offset) // second for offset, _ in states], dtype=np.int64),
+            np.array([dst for _, dst in states]),
+            zone=zone,
+            until=(last - epoch) // second,
+        )
+
+    def scaled(self, scale):
+        # Transitions and offsets in units of 1/scale seconds, for datetime64
+        # arrays finer than seconds; the first transition (year 1) is clipped to
+        # the int64 range
+        import numpy as np
+
+        if scale not in self._scaled:
+            lowest = np.iinfo(np.int64).min // scale + 1
+            self._scaled[scale] = (
+                np.maximum(self.transitions, lowest) * scale,
+                self.offsets * scale,
+            )
+        return self._scaled[scale]
+
+    def _index(self, transitions, values):
+        import numpy as np
+
+        # Same lookup as pytz: bisect_right on the transition times, minus one
+        return np.maximum(np.searchsorted(transitions, values, side="right") - 1, 0)
+
+    def _beyond(self, values, scale, margin=0):
+        # Positions of values the table does not cover, if any
+        import numpy as np
+
+        if self.until is None:
+            return []
+        return np.flatnonzero(values >= (self.until - margin) * scale)
+
+    def utc_offsets(self, utc, scale=1):
+        """
+        Offsets (in 1/scale seconds) at these UTC instants, as astimezone uses.
+        """
+        transitions, offsets = self.scaled(scale)
+        result = offsets[self._index(transitions, utc)]
+        for i in self._beyond(utc, scale):
+            # Transitions fall on whole seconds, so the second is enough
+            moment = EPOCH + timedelta(seconds=int(utc[i] // scale))
+            result[i] = to_zone(moment, self.zone).utcoffset() // SECOND * scale
+        return result
+
+    def local_offsets(self, local, scale=1):
+        """
+        Offsets localize() picks for these wall times. Like pytz,
+        try the offsets in effect a day either side; in a fold keep the non-DST
+        candidate (or the later instant if that leaves two), and in a gap use the
+        wall time six hours earlier.
+        """
+        import numpy as np
+
+        transitions, offsets = self.scaled(scale)
+        day = SECONDS_PER_DAY * scale
+        candidates = []
+        for shift in (-day, day):
+            offset = offsets[self._index(transitions, local + shift)]
+            actual = self._index(transitions, local - offset)
+            candidates.append((offset, offsets[actual] == offset, self.dst[actual]))
+        (before, before_ok, before_dst), (after, after_ok, after_dst) = candidates
+
+        result = np.where(before_ok, before, after)
+        fold = before_ok & after_ok & (before != after)
+        if fold.any():
+            keep_before = ~before_dst | after_dst
+            keep_after = ~after_dst | before_dst
+            result = np.where(
+                fold,
+                np.where(
+                    keep_before & keep_after,
+                    np.minimum(before, after),  # the later instant
+                    np.where(keep_before, before, after),
+                ),
+                result,
+            )
+        gap = ~before_ok & ~after_ok
+        if gap.any():
+            result[gap] = self.local_offsets(local[gap] - 6 * 3600 * scale, scale)
+        # The lookups above reach a day ahead
+        for i in self._beyond(local, scale, SECONDS_PER_DAY):
+            naive = datetime(1970, 1, 1) + timedelta(seconds=int(local[i] // scale))
+            utc = localize(naive, self.zone).astimezone(timezone.utc)
+            result[i] = (naive - utc.replace(tzinfo=None)) // SECOND * scale
+        return result
+
+
+@functools.lru_cache(maxsize=None)
+def _zone_table(zone):
+    return ZoneTable.from_zone(zone)
+
+
+def get_zone_table(name, backend=None):
+    return _zone_table(get_timezone(name, backend))
+
+
+def _as_datetime64(values):
+    # Returns (int64 values, dtype, units per second), in seconds or finer
+    import numpy as np
+
+    values = np.asarray(values, dtype="datetime64")
+    unit, _ = np.datetime_data(values.dtype)
+    if unit in ("Y", "M", "W", "D", "h", "m", "generic"):
+        values = values.astype("datetime64[s]")
+    scale = int(np.timedelta64(1, "s") // np.timedelta64(1, np.datetime_data(values.dtype)))
+    return values.view(np.int64), values.dtype, scale
+
+
+def convert_array(values, from_tz, to_tz, backend=None):
+    """
+    Convert naive wall times in from_tz (anything np.asarray turns into
+    datetime64) to naive wall times in to_tz, as convert_value does one value at
+    a time. Returns (converted datetime64 array, UTC offsets in seconds); NaT
+    stays NaT.
+    """
+    import numpy as np
+
+    local, dtype, scale = _as_datetime64(values)
+    missing = local == np.iinfo(np.int64).min
+    utc = local - get_zone_table(from_tz, backend).local_offsets(local, scale)
+    offsets = get_zone_table(to_tz, backend).utc_offsets(utc, scale)
+    converted = np.where(missing, local, utc + offsets).view(dtype)
+    return converted, offsets // scale
+
+
+def format_isoformat(converted, offsets):
+    """
+    Format convert_array output like datetime.isoformat() with the offset.
+    """
+    import numpy as np
+
+    formatted = np.datetime_as_string(converted.astype("datetime64[us]"), unit="us")
+    # isoformat drops zero microseconds
+    whole = np.char.endswith(formatted, ".000000")
+    formatted = np.where(whole, np.char.rstrip(np.char.rstrip(formatted, "0"), "."), formatted)
+    suffixes = {}
+    for offset in np.unique(offsets).tolist():
+        sign, offset = ("-", -offset) if offset < 0 else ("+", offset)
+        hours, rest = divmod(offset, 3600)
+        minutes, seconds = divmod(rest, 60)
+        suffix = f"{sign}{hours:02d}:{minutes:02d}"
+        suffixes[offset if sign == "+" else -offset] = suffix + (f":{seconds:02d}" if seconds else "")
+    return [
+        f"{value}{suffixes[offset]}" for value, offset in zip(formatted.tolist(), offsets.tolist())
+    ]
+
+
+class BulkConverter:
+    """
+    Converts records of one input format: "lines" (one value per line), "csv"
+    (the `column` of each row, after a header line) or "jsonl" (the `column`
+    field of each object). The result is appended to each record as `output`;
+    records that fail to convert get an empty result and are counted as errors.
+    With engine="numpy", chunks made up only of naive timestamps go through
+    convert_array; other chunks are converted value by value.
+    """
+
+    def __init__(
+        self, from_tz, to_tz, fmt="lines", column="time", output="converted", engine="python"
+    ):
+        self.from_tz = from_tz
+        self.to_tz = to_tz
+        self.from_timezone = get_timezone(from_tz)
+        self.to_timezone = get_timezone(to_tz)
+        self.fmt = fmt
+        self.column = column
+        self.output = output
+        self.engine = engine
+        self.column_index = None
+        self.rows = 0
+        self.errors = 0
+
+    def _convert(self, value):
+        self.rows += 1
+        try:
+            return convert_value(value, self.from_timezone, self.to_timezone)
+        except (TypeError, ValueError, AttributeError):
+            self.errors += 1
+            return ""
+
+    def _convert_array(self, values):
+        # None unless every value parses as a naive timestamp
+        import warnings
+
+        import numpy as np
+
+        if any(len(value) <= 5 for value in values):
+            return None  # HH:MM times, which convert_value handles
+        try:
+            # NumPy also accepts values convert_value rejects, such as "2024-01"
+            # or five-digit years; those go value by value so both engines agree
+            for value in values:
+                datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        try:
+            with warnings.catch_warnings():
+                # Raised for timestamps with an offset, which NumPy would drop
+                warnings.simplefilter("error")
+                parsed = np.array(values, dtype="datetime64[us]")
+        except (TypeError, ValueError, UserWarning, DeprecationWarning):
+            return None
+        if np.isnat(parsed).any():
+            return None  # blank values parse as NaT
+        self.rows += len(values)
+        return format_isoformat(*convert_array(parsed, self.from_tz, self.to_tz))
+
+    def convert_values(self, values):
+        if self.engine == "numpy" and values:
+            converted = self._convert_array([str(value).strip() for value in values])
+            if converted is not None:
+                return converted
+        return [self._convert(value) for value in values]
+
+    def header(self, line):
+        # CSV only: find the column and return the output header line
+        import csv
+
+        names = next(csv.reader([line]))
+        if self.column not in names:
+            raise ValueError(f"Column '{self.column}' not found in the CSV header.")
+        self.column_index = names.index(self.column)
+        return self._write_csv([names + [self.output]])
+
+    @staticmethod
+    def _write_csv(rows):
+        import csv
+        import io
+
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue()
+
+    def convert_chunk(self, lines):
+        import csv
+        import json
+
+        if self.fmt == "lines":
+            return "".join(f"{value}\n" for value in self.convert_values(lines))
+        if self.fmt == "csv":
+            rows = list(csv.reader(lines))
+            values = [
+                row[self.column_index] if self.column_index < len(row) else "" for row in rows
+            ]
+            return self._write_csv(
+                row + [value] for row, value in zip(rows, self.convert_values(values))
+            )
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            # Malformed lines and non-object values convert like a missing field
+            records.append(record if isinstance(record, dict) else None)
+        values = self.convert_values(
+            [record.get(self.column) if record is not None else None for record in records]
+        )
+        out = []
+        for record, value in zip(records, values):
+            record = {} if record is None else record
+            record[self.output] = value
+            out.append(json.dumps(record) + "\n")
+        return "".join(out)
+
+    def convert_stream(self, lines, write, chunk_size=DEFAULT_CHUNK_SIZE):
+        # Reads, converts and writes `chunk_size` lines at a time
+        import itertools
+
+        lines = iter(lines)
+        if self.fmt == "csv" and self.column_index is None:
+            first = next(lines, None)
+            if first is None:
+                return
+            write(self.header(first))
+        while True:
+            chunk = list(itertools.islice(lines, chunk_size))
+            if not chunk:
+                return
+            write(self.convert_chunk(chunk))
+
+
+def _byte_ranges(path, start, shards):
+    # Split the file from `start` into up to `shards` ranges that end on line breaks
+    size = os.path.getsize(path)
+    bounds = [start]
+    with open(path, "rb") as f:
+        for n in range(1, shards):
+            f.seek(max(start + (size - start) * n // shards, bounds[-1]))
+            f.readline()
+            if f.tell() >= size:
+                break
+            if f.tell() > bounds[-1]:
+                bounds.append(f.tell())
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _read_range(f, begin, end):
+    f.seek(begin)
+    position = begin
+    while position < end:
+        line = f.readline()
+        if not line:
+            return
+        position += len(line)
+        yield line.decode("utf-8")
+
+
+def _convert_range(path, begin, end, header, options, part_path, chunk_size):
+    # Runs in a pool process; the header line is only needed to find the CSV column
+    converter = BulkConverter(**options)
+    if header is not None:
+        converter.header(header)
+    with open(path, "rb") as f, open(part_path, "w", encoding="utf-8", newline="") as out:
+        converter.convert_stream(_read_range(f, begin, end), out.write, chunk_size)
+    return converter.rows, converter.errors
+
+
+def convert_file(path, write, options, processes=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Convert a file in bulk and return (rows, errors). With processes > 1 the file
+    is split into byte ranges on line boundaries, converted in a process pool
+    and written back in order; each record must then be on one line.
+    """
+    import shutil
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    if processes <= 1:
+        converter = BulkConverter(**options)
+        with open(path, encoding="utf-8", newline="") as f:
+            converter.convert_stream(f, write, chunk_size)
+        return converter.rows, converter.errors
+
+    header = None
+    with open(path, "rb") as f:
+        if options.get("fmt") == "csv":
+            header = f.readline().decode("utf-8")
+        start = f.tell()
+    if header is not None:
+        write(BulkConverter(**options).header(header))
+
+    rows = errors = 0
+    directory = tempfile.mkdtemp(prefix="tz-bulk-")
+    try:
+        # More shards than processes so one slow range doesn't hold up the rest
+        ranges = _byte_ranges(path, start, processes * 4)
+        with ProcessPoolExecutor(processes) as pool:
+            futures = [
+                (
+                    part_path,
+                    pool.submit(
+                        _convert_range, path, begin, end, header, options, part_path, chunk_size
+                    ),
+                )
+                for part_path, (begin, end) in (
+                    (os.path.join(directory, f"{n}.part"), bounds)
+                    for n, bounds in enumerate(ranges)
+                )
+            ]
+            for part_path, future in futures:
+                part_rows, part_errors = future.result()
+                rows, errors = rows + part_rows, errors + part_errors
+                with open(part_path, encoding="utf-8", newline="") as part:
+                    for block in iter(lambda: part.read(1 << 20), ""):
+                        write(block)
+                os.remove(part_path)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return rows, errors
+
+
+def _positive_int(value):
+    import argparse
+
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, not {value}")
+    return number
+
+
+def bulk_main(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="timezone_converter.py bulk",
+        description="Convert many HH:MM times or ISO 8601 timestamps at once.",
+    )
+    parser.add_argument("from_tz")
+    parser.add_argument("to_tz")
+    parser.add_argument("--input", help="file to read (default: stdin)")
+    parser.add_argument("--output", help="file to write (default: stdout)")
+    parser.add_argument("--format", choices=["lines", "csv", "jsonl"], default="lines")
+    parser.add_argument("--column", default="time", help="CSV column or JSONL field")
+    parser.add_argument("--output-column", default="converted")
+    parser.add_argument("--chunk-size", type=_positive_int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument(
+        "--engine",
+        choices=["python", "numpy"],
+        default="python",
+        help="numpy converts chunks of naive timestamps as arrays",
+    )
+    parser.add_argument(
+        "--processes", type=int, default=1, help="shard the input file across processes"
+    )
+    args = parser.parse_args(argv)
+    if args.processes > 1 and not args.input:
+        parser.error("--processes needs --input: stdin can't be split into ranges")
+
+    options = {
+        "from_tz": args.from_tz,
+        "to_tz": args.to_tz,
+        "fmt": args.format,
+        "column": args.column,
+        "output": args.output_column,
+        "engine": args.engine,
+    }
+    try:
+        get_timezone(args.from_tz)
+        get_timezone(args.to_tz)
+    except UnknownTimezoneError:
+        print(f"Error: Unknown timezone '{args.from_tz}' or '{args.to_tz}'.")
+        sys.exit(1)
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        if args.input:
+            rows, errors = convert_file(
+                args.input, out.write, options, args.processes, args.chunk_size
+            )
+        else:
+            converter = BulkConverter(**options)
+            converter.convert_stream(sys.stdin, out.write, args.chunk_size)
+            rows, errors = converter.rows, converter.errors
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        if args.output:
+            out.close()
+    if errors:
+        print(f"{errors} of {rows} values could not be converted.", file=sys.stderr)
+
+
+# World clock: one source time into many zones. Each source value is parsed and
+# localized once (to a UTC instant) and each target zone loaded once, so a row
+# costs one conversion per target. Formats and offsets follow convert_value:
+# HH:MM in, HH:MM out (see clock_offset); timestamps in, ISO 8601 out.
+
+
+def _localize_value(value, from_timezone):
+    # (UTC instant, output format) for an HH:MM time or ISO 8601 timestamp
+    value = value.strip()
+    if len(value) <= 5:
+        moment = datetime.strptime(value, "%H:%M") - clock_offset(from_timezone)
+        return moment.replace(tzinfo=timezone.utc), "%H:%M"
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = localize(moment, from_timezone)
+    return moment.astimezone(timezone.utc), None
+
+
+def world_clock_matrix(values, from_tz, to_tzs=None, backend=None):
+    """
+    Convert every value from `from_tz` into every zone in `to_tzs` (all
+    TIMEZONE_MAP abbreviations by default). Returns one dict per value, of
+    target zone name to converted value, or None for a value that can't be
+    parsed (including None and other non-strings). Raises UnknownTimezoneError
+    for an unknown zone.
+    """
+    to_tzs = list(TIMEZONE_MAP) if to_tzs is None else list(to_tzs)
+    from_timezone = get_timezone(from_tz, backend)
+    targets = [(name, get_timezone(name, backend)) for name in to_tzs]
+    localized = {}  # repeated values share one parse
+    rows = []
+    for value in values:
+        if not isinstance(value, str):
+            rows.append(None)
+            continue
+        if value not in localized:
+            try:
+                localized[value] = _localize_value(value, from_timezone)
+            except ValueError:
+                localized[value] = None
+        if localized[value] is None:
+            rows.append(None)
+            continue
+        moment, fmt = localized[value]
+        row = {}
+        for name, zone in targets:
+            if fmt:
+                row[name] = (moment + clock_offset(zone)).strftime(fmt)
+            else:
+                row[name] = to_zone(moment, zone).isoformat()
+        rows.append(row)
+    return rows
+
+
+def world_clock(value, from_tz, to_tzs=None, backend=None):
+    """
+    One value in many zones, as world_clock_matrix; raises ValueError if the
+    value can't be parsed.
+    """
+    row = world_clock_matrix([value], from_tz, to_tzs, backend)[0]
+    if row is None:
+        raise ValueError(f"Invalid time: {value!r}")
+    return row
+
+
+def world_main(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="timezone_converter.py world",
+        description="Convert times into many timezones at once (one row per time).",
+    )
+    parser.add_argument("from_tz")
+    parser.add_argument("times", nargs="+", metavar="TIME", help="HH:MM or ISO 8601")
+    parser.add_argument(
+        "--to", nargs="+", dest="to_tzs", metavar="TZ",
+        help="target timezones (default: every abbreviation)",
+    )
+    parser.add_argument("--format", choices=["table", "csv", "jsonl"], default="table")
+    args = parser.parse_args(argv)
+
+    try:
+        rows = world_clock_matrix(args.times, args.from_tz, args.to_tzs)
+    except UnknownTimezoneError as e:
+        print(f"Error: Unknown timezone '{e.args[0]}'.")
+        sys.exit(1)
+    to_tzs = args.to_tzs or list(TIMEZONE_MAP)
+
+    if args.format == "jsonl":
+        import json
+
+        for value, row in zip(args.times, rows):
+            print(json.dumps({"time": value, "from": args.from_tz, "converted": row}))
+    else:
+        table = [[args.from_tz] + to_tzs] + [
+            [value] + [row[name] if row else "" for name in to_tzs]
+            for value, row in zip(args.times, rows)
+        ]
+        if args.format == "csv":
+            import csv
+
+            csv.writer(sys.stdout, lineterminator="\n").writerows(table)
+        else:
+            widths = [max(len(line[n]) for line in table) for n in range(len(table[0]))]
+            for line in table:
+                print("  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip())
+    errors = rows.count(None)
+    if errors:
+        print(f"{errors} of {len(rows)} values could not be converted.", file=sys.stderr)
+
+
+# Resident server: keeps zones loaded and answers JSON-lines requests on a Unix
+# socket, one JSON object per line in each direction:
+#
+#   {"from": "EST", "to": "UTC", "time": "12:00"}         -> {"result": "16:56"}
+#   {"from": "EST", "to": "UTC", "times": ["12:00", ...]} -> {"results": [...], "errors": 0}
+#
+# "clock": true limits a single request to HH:MM, exactly as convert_time.
+# main() uses a running server transparently; shell scripts can skip Python
+# start-up entirely with e.g. `nc -U <socket>`. The socket path comes from
+# TIMEZONE_CONVERTER_SOCKET; set it to an empty string to never use a server.
+# By default it is in $XDG_RUNTIME_DIR, or else in a 0700 directory of the
+# user's under the temp directory, and is only readable by the user. Clients
+# only talk to a socket owned by the same user.
+
+
+def default_socket_path():
+    import tempfile
+
+    path = os.environ.get("TIMEZONE_CONVERTER_SOCKET")
+    if path is not None:
+        return path or None
+    directory = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+        tempfile.gettempdir(), f"timezone_converter-{os.getuid()}"
+    )
+    return os.path.join(directory, "timezone_converter.sock")
+
+
+def _owned_socket(path):
+    import stat
+
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid()
+
+
+def _private_directory(directory):
+    # Create the socket's directory, or check that no other user can replace
+    # files in it: ours or root's, and writable by others only if sticky (/tmp)
+    import stat
+
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid not in (0, os.getuid()) or (
+        info.st_mode & 0o022 and not info.st_mode & stat.S_ISVTX
+    ):
+        raise RuntimeError(f"{directory} is writable by other users.")
+
+
+def handle_request(request):
+    from_tz = request.get("from")
+    to_tz = request.get("to")
+    try:
+        from_timezone = get_timezone(from_tz)
+        to_timezone = get_timezone(to_tz)
+    except (UnknownTimezoneError, TypeError):
+        return {
+            "error": f"Unknown timezone '{TIMEZONE_MAP.get(from_tz, from_tz)}' "
+            f"or '{TIMEZONE_MAP.get(to_tz, to_tz)}'."
+        }
+
+    if "times" in request:
+        if not isinstance(request["times"], list):
+            return {"error": "Invalid request: 'times' must be a list."}
+        converter = BulkConverter(from_tz, to_tz, engine="numpy")
+        results = converter.convert_values(request["times"])
+        return {"results": results, "errors": converter.errors}
+
+    try:
+        if request.get("clock"):
+            result = _convert_clock_time(request["time"], from_timezone, to_timezone)
+        else:
+            result = convert_value(request["time"], from_timezone, to_timezone)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return {"error": "Invalid time format. Use HH:MM (24-hour format)."}
+    return {"result": result}
+
+
+def _server(path):
+    import json
+    import socketserver
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            # Any number of requests per connection
+            for line in self.rfile:
+                try:
+                    response = handle_request(json.loads(line))
+                except (ValueError, AttributeError, TypeError) as e:
+                    response = {"error": f"Bad request: {e}"}
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+
+    class ConverterServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    return ConverterServer(path, RequestHandler)
+
+
+def serve(path):
+    import signal
+    import threading
+
+    _private_directory(os.path.dirname(os.path.abspath(path)))
+    # Refuse to replace a live server or another user's file; remove a stale socket
+    if os.path.lexists(path):
+        if not _owned_socket(path):
+            raise RuntimeError(f"{path} exists and is not a socket owned by this user.")
+        try:
+            with ConverterClient(path):
+                pass
+        except OSError:
+            os.remove(path)
+        else:
+            raise RuntimeError(f"A server is already listening on {path}.")
+    # Bind with a umask that leaves the socket file only accessible to this user
+    umask = os.umask(0o177)
+    try:
+        server = _server(path)
+    finally:
+        os.umask(umask)
+    with server:
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+        print(f"Listening on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
+
+
+class ConverterClient:
+    """
+    A connection to a running server; raises OSError if none is listening, or
+    if the socket belongs to another user.
+    """
+
+    def __init__(self, path=None, timeout=5.0):
+        import socket
+
+        path = path or default_socket_path()
+        if path and os.path.exists(path) and not _owned_socket(path):
+            raise OSError(f"{path} is not a socket owned by this user.")
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(path)
+        except (OSError, TypeError):
+            self.sock.close()
+            raise OSError("No timezone converter server is running.")
+        self.reader = self.sock.makefile("rb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def request(self, request):
+        import json
+
+        self.sock.sendall(json.dumps(request).encode() + b"\n")
+        line = self.reader.readline()
+        if not line:
+            raise OSError("The timezone converter server closed the connection.")
+        return json.loads(line)
+
+    def convert(self, time_str, from_tz, to_tz):
+        response = self.request({"from": from_tz, "to": to_tz, "time": time_str})
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["result"]
+
+    def convert_many(self, times, from_tz, to_tz):
+        # Failed values come back as empty strings, as in bulk mode
+        response = self.request({"from": from_tz, "to": to_tz, "times": list(times)})
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["results"]
+
+
+def serve_main(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="timezone_converter.py serve",
+        description="Answer conversion requests on a Unix socket.",
+    )
+    parser.add_argument("--socket", default=default_socket_path())
+    args = parser.parse_args(argv)
+    if not args.socket:
+        print("Error: No socket path; set --socket or TIMEZONE_CONVERTER_SOCKET.")
+        sys.exit(1)
+    try:
+        serve(args.socket)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+def _convert_with_server(time_str, from_tz, to_tz):
+    # The server's response, or None when no server is running
+    path = default_socket_path()
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with ConverterClient(path) as client:
+            return client.request(
+                {"from": from_tz, "to": to_tz, "time": time_str, "clock": True}
+            )
+    except OSError:
+        return None
+
+
+COMMANDS = {
+    "bulk": bulk_main,
+    "serve": serve_main,
+    "world": world_main,
+}
+
+
 def main():
+    # Subcommands: bulk, serve, world
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
     # Read command-line arguments
     if len(sys.argv) != 4:
         print("Usage: python timezone_converter.py <HH:MM> <FROM_TZ> <TO_TZ>")
+        print("       python timezone_converter.py bulk <FROM_TZ> <TO_TZ> [--input FILE] ...")
+        print("       python timezone_converter.py serve [--socket PATH]")
+        print("       python timezone_converter.py world <FROM_TZ> <TIME> ... [--to TZ ...]")
         sys.exit(1)
 
     time_str = sys.argv[1]
     from_tz = sys.argv[2]
     to_tz = sys.argv[3]
 
+    # Use a resident server when one is running
+    response = _convert_with_server(time_str, from_tz, to_tz)
+    if response is not None:
+        if "error" in response:
+            print(f"Error: {response['error']}")
+            sys.exit(1)
+        print(f"{time_str} {from_tz} is {response['result']} {to_tz}")
+        return
+
     # Convert time
     converted_time = convert_time(time_str, from_tz, to_tz)
     print(f"{time_str} {from_tz} is {converted_time} {to_tz}")
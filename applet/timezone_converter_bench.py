@@ -0,0 +1,401 @@
+# Benchmarks and the backend conformance check for timezone_converter.py,
+# kept out of the converter so that it only holds the conversion paths.
+#
+#   python timezone_converter_bench.py benchmark [bulk|engine|server|backends|world]
+#   python timezone_converter_bench.py conformance [--start-year Y] [--end-year Y]
+
+import os
+import sys
+from datetime import timedelta
+
+import timezone_converter
+from timezone_converter import (
+    BACKENDS,
+    TIMEZONE_MAP,
+    ConverterClient,
+    _convert_clock_time,
+    convert_array,
+    convert_time,
+    convert_value,
+    format_isoformat,
+    get_timezone,
+    world_clock_matrix,
+)
+
+# The converter script that the CLI benchmarks run
+CONVERTER = os.path.abspath(timezone_converter.__file__)
+
+
+def benchmark_bulk(rows=200000, invocations=20):
+    """
+    Rows per second: one process per value (the classic CLI) versus bulk mode
+    in one process, on a file of timestamps and on a file of HH:MM times.
+    """
+    import shutil
+    import subprocess
+    import tempfile
+    import time
+
+    script = CONVERTER
+
+    # No resident server, so every invocation converts locally
+    env = dict(os.environ, TIMEZONE_CONVERTER_SOCKET="")
+    started = time.perf_counter()
+    for n in range(invocations):
+        subprocess.run(
+            [sys.executable, script, f"{n % 24:02d}:30", "EST", "UTC"],
+            check=True,
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+    print(f"{'per invocation':34} {invocations / (time.perf_counter() - started):12,.0f} rows/s")
+
+    directory = tempfile.mkdtemp(prefix="tz-bench-")
+    try:
+        inputs = {
+            "timestamps": [
+                f"2024-{1 + n % 12:02d}-{1 + n % 28:02d}T{n % 24:02d}:{n % 60:02d}:00"
+                for n in range(rows)
+            ],
+            "HH:MM": [f"{n % 24:02d}:{n % 60:02d}" for n in range(rows)],
+        }
+        processes = sorted({1, os.cpu_count() or 1})
+        for label, values in inputs.items():
+            path = os.path.join(directory, "input.txt")
+            with open(path, "w") as f:
+                f.write("\n".join(values) + "\n")
+            for count in processes:
+                started = time.perf_counter()
+                subprocess.run(
+                    [sys.executable, script, "bulk", "EST", "UTC", "--input", path,
+                     "--output", os.devnull, "--processes", str(count)],
+                    check=True,
+                )
+                elapsed = time.perf_counter() - started
+                name = f"bulk, {label}, {count} process{'es' if count > 1 else ''}"
+                print(f"{name:34} {rows / elapsed:12,.0f} rows/s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def benchmark_engine(values=1000000, sample=100000):
+    """
+    Values per second: convert_value one timestamp at a time versus
+    convert_array, on random timestamps from 1990 to 2030 (checked to agree).
+    """
+    import time
+
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    seconds = rng.integers(631152000, 1893456000, size=values)
+    timestamps = seconds.astype("datetime64[s]")
+    strings = np.datetime_as_string(timestamps[:sample]).tolist()
+
+    from_timezone, to_timezone = get_timezone("EST"), get_timezone("AEST")
+    started = time.perf_counter()
+    expected = [convert_value(value, from_timezone, to_timezone) for value in strings]
+    print(f"{'convert_value':24} {sample / (time.perf_counter() - started):14,.0f} values/s")
+
+    started = time.perf_counter()
+    converted, offsets = convert_array(timestamps, "EST", "AEST")
+    elapsed = time.perf_counter() - started
+    print(f"{'convert_array':24} {values / elapsed:14,.0f} values/s")
+
+    started = time.perf_counter()
+    formatted = format_isoformat(converted[:sample], offsets[:sample])
+    elapsed = time.perf_counter() - started
+    print(f"{'  + format_isoformat':24} {sample / elapsed:14,.0f} values/s")
+    if formatted != expected:
+        raise AssertionError("convert_array disagrees with convert_value")
+
+
+def benchmark_server(requests=200, invocations=20, batch=10000):
+    """
+    Latency of the cold CLI versus the CLI and an open connection going through
+    a resident server started for the benchmark.
+    """
+    import shutil
+    import subprocess
+    import tempfile
+    import time
+
+    script = CONVERTER
+    directory = tempfile.mkdtemp(prefix="tz-serve-")
+    path = os.path.join(directory, "server.sock")
+    server = subprocess.Popen([sys.executable, script, "serve", "--socket", path])
+
+    def report(label, seconds):
+        _report_latency(label, seconds, width=30)
+
+    def run_cli(socket_path):
+        env = dict(os.environ, TIMEZONE_CONVERTER_SOCKET=socket_path)
+        seconds = []
+        for n in range(invocations):
+            started = time.perf_counter()
+            subprocess.run(
+                [sys.executable, script, f"{n % 24:02d}:30", "EST", "UTC"],
+                check=True,
+                env=env,
+                stdout=subprocess.DEVNULL,
+            )
+            seconds.append(time.perf_counter() - started)
+        return seconds
+
+    try:
+        while not os.path.exists(path):
+            time.sleep(0.05)
+        report("cold CLI", run_cli(""))
+        report("CLI through the server", run_cli(path))
+        with ConverterClient(path) as client:
+            seconds = []
+            for n in range(requests):
+                started = time.perf_counter()
+                client.convert(f"{n % 24:02d}:{n % 60:02d}", "EST", "UTC")
+                seconds.append(time.perf_counter() - started)
+            report("open connection, 1 value", seconds)
+            values = [f"2024-{1 + n % 12:02d}-{1 + n % 28:02d}T{n % 24:02d}:00" for n in range(batch)]
+            started = time.perf_counter()
+            client.convert_many(values, "EST", "UTC")
+            elapsed = time.perf_counter() - started
+            print(f"{f'open connection, {batch} values':30} {batch / elapsed:,.0f} values/s")
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _report_latency(label, seconds, width):
+    import statistics
+
+    seconds = sorted(seconds)
+    print(
+        f"{label:{width}} median {statistics.median(seconds) * 1000:8.3f}ms  "
+        f"p95 {seconds[int(0.95 * (len(seconds) - 1))] * 1000:8.3f}ms"
+    )
+
+
+def benchmark_backends(invocations=20, values=50000):
+    """
+    Start-up time of the CLI (a usage error and one conversion, per backend,
+    next to a bare interpreter) and in-process conversions per second per backend.
+    """
+    import subprocess
+    import time
+
+    script = CONVERTER
+
+    def run(command, backend="zoneinfo"):
+        # No resident server, so every run converts locally
+        env = dict(os.environ, TIMEZONE_CONVERTER_BACKEND=backend, TIMEZONE_CONVERTER_SOCKET="")
+        seconds = []
+        for _ in range(invocations):
+            started = time.perf_counter()
+            subprocess.run(command, env=env, stdout=subprocess.DEVNULL)
+            seconds.append(time.perf_counter() - started)
+        return seconds
+
+    _report_latency("python -c pass", run([sys.executable, "-c", "pass"]), width=32)
+    _report_latency("usage error", run([sys.executable, script]), width=32)
+    for backend in BACKENDS:
+        _report_latency(
+            f"one conversion, {backend}",
+            run([sys.executable, script, "12:00", "EST", "UTC"], backend),
+            width=32,
+        )
+
+    timestamps = [
+        f"{1990 + n % 40}-{1 + n % 12:02d}-{1 + n % 28:02d}T{n % 24:02d}:{n % 60:02d}:00"
+        for n in range(values)
+    ]
+    clock_times = [f"{n // 60:02d}:{n % 60:02d}" for n in range(24 * 60)]
+    for backend in BACKENDS:
+        from_timezone, to_timezone = get_timezone("EST", backend), get_timezone("AEST", backend)
+        started = time.perf_counter()
+        for value in timestamps:
+            convert_value(value, from_timezone, to_timezone)
+        elapsed = time.perf_counter() - started
+        print(f"{f'convert_value, {backend}':32} {values / elapsed:12,.0f} values/s")
+        started = time.perf_counter()
+        for value in clock_times:
+            # Uncached, like the classic CLI's single conversion
+            _convert_clock_time.__wrapped__(value, from_timezone, to_timezone)
+        elapsed = time.perf_counter() - started
+        print(f"{f'HH:MM, {backend}':32} {len(clock_times) / elapsed:12,.0f} values/s")
+
+
+def benchmark_world(values=200):
+    """
+    Conversions per second into every TIMEZONE_MAP zone: convert_time per
+    target versus world_clock_matrix.
+    """
+    import time
+
+    clock_times = [f"{n % 24:02d}:{n % 60:02d}" for n in range(values)]
+    targets = list(TIMEZONE_MAP)
+    conversions = values * len(targets)
+
+    started = time.perf_counter()
+    expected = []
+    for value in clock_times:
+        row = {}
+        for name in targets:
+            row[name] = convert_time(value, "EST", name)
+        expected.append(row)
+    elapsed = time.perf_counter() - started
+    print(f"{'one call per target':24} {conversions / elapsed:12,.0f} conversions/s")
+
+    started = time.perf_counter()
+    rows = world_clock_matrix(clock_times, "EST", targets)
+    elapsed = time.perf_counter() - started
+    print(f"{'world_clock_matrix':24} {conversions / elapsed:12,.0f} conversions/s")
+    if rows != expected:
+        raise AssertionError("world_clock_matrix disagrees with per-target conversion")
+
+
+def benchmark_main(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="timezone_converter_bench.py benchmark")
+    parser.add_argument(
+        "which",
+        nargs="?",
+        choices=["bulk", "engine", "server", "backends", "world"],
+        default="bulk",
+    )
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args(argv)
+    if args.which == "engine":
+        benchmark_engine(args.rows * 5)
+    elif args.which == "server":
+        benchmark_server()
+    elif args.which == "backends":
+        benchmark_backends()
+    elif args.which == "world":
+        benchmark_world()
+    else:
+        benchmark_bulk(args.rows)
+
+
+# Conformance: the zoneinfo and pytz backends must give identical conversions.
+# Timestamps are checked around every transition of the TIMEZONE_MAP zones
+# within pytz's data (1901-2037), through both convert_value and convert_array,
+# and every HH:MM time between every pair of zones. Any difference fails.
+
+
+def _transition_samples(name, start_year, end_year, window, step):
+    # Naive wall times within `window` of each transition of zone `name`
+    import pytz
+
+    zone = pytz.timezone(name)
+    samples = set()
+    steps = int(window / step)
+    for moment, (offset, _, _) in zip(
+        getattr(zone, "_utc_transition_times", []), getattr(zone, "_transition_info", [])
+    ):
+        if not start_year <= moment.year < end_year:
+            continue
+        for n in range(-steps, steps + 1):
+            samples.add((moment + offset + n * step).isoformat())
+    return sorted(samples)
+
+
+def check_conformance(start_year=1902, end_year=2037, window=timedelta(hours=3),
+                      step=timedelta(minutes=15)):
+    """
+    Compare the backends, and each backend's two engines, on every pair of
+    TIMEZONE_MAP zones. Returns the mismatches as (from zone, to zone, value,
+    (source, result), (source, result)): "zoneinfo" against "pytz", or
+    "convert_value" against "convert_array" for a backend's first differing value.
+    """
+    zones = sorted(set(TIMEZONE_MAP.values()))
+    mismatches = []
+    for from_name in zones:
+        values = _transition_samples(from_name, start_year, end_year, window, step)
+        for to_name in zones:
+            results = {}
+            for backend in BACKENDS:
+                from_timezone = get_timezone(from_name, backend)
+                to_timezone = get_timezone(to_name, backend)
+                scalar = [convert_value(value, from_timezone, to_timezone) for value in values]
+                converted, offsets = convert_array(values, from_name, to_name, backend)
+                vectorized = format_isoformat(converted, offsets)
+                for value, expected, actual in zip(values, scalar, vectorized):
+                    if expected != actual:
+                        mismatches.append(
+                            (
+                                from_name,
+                                to_name,
+                                value,
+                                (f"{backend} convert_value", expected),
+                                (f"{backend} convert_array", actual),
+                            )
+                        )
+                        break
+                results[backend] = scalar
+            for value, ours, theirs in zip(values, results["zoneinfo"], results["pytz"]):
+                if ours != theirs:
+                    mismatches.append(
+                        (from_name, to_name, value, ("zoneinfo", ours), ("pytz", theirs))
+                    )
+
+    clock_times = [f"{n // 60:02d}:{n % 60:02d}" for n in range(24 * 60)]
+    for from_name in zones:
+        for to_name in zones:
+            results = [
+                [
+                    convert_value(value, get_timezone(from_name, backend), get_timezone(to_name, backend))
+                    for value in clock_times
+                ]
+                for backend in ("zoneinfo", "pytz")
+            ]
+            for value, ours, theirs in zip(clock_times, *results):
+                if ours != theirs:
+                    mismatches.append(
+                        (from_name, to_name, value, ("zoneinfo", ours), ("pytz", theirs))
+                    )
+    return mismatches
+
+
+def conformance_main(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="timezone_converter_bench.py conformance",
+        description="Check that the zoneinfo and pytz backends convert identically.",
+    )
+    parser.add_argument("--start-year", type=int, default=1902)
+    parser.add_argument("--end-year", type=int, default=2037)
+    args = parser.parse_args(argv)
+
+    mismatches = check_conformance(args.start_year, args.end_year)
+    for from_name, to_name, value, (source, result), (other, other_result) in mismatches[:20]:
+        print(
+            f"MISMATCH {from_name} -> {to_name} {value}: "
+            f"{source} {result}, {other} {other_result}"
+        )
+    if mismatches:
+        print(f"{len(mismatches)} mismatches between backends or engines.")
+        sys.exit(1)
+    print(
+        f"HH:MM times and timestamps {args.start_year}-{args.end_year}: "
+        "zoneinfo and pytz agree."
+    )
+
+
+COMMANDS = {
+    "benchmark": benchmark_main,
+    "conformance": conformance_main,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print("Usage: python timezone_converter_bench.py benchmark [WHICH] [--rows N]")
+        print("       python timezone_converter_bench.py conformance [--start-year Y] ...")
+        sys.exit(1)
+    COMMANDS[sys.argv[1]](sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+# apps/insights/services/openai/batch.py
+
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+)
+
+from django.conf import settings
+from pydantic import BaseModel
+
+from .cache import cache_key, get_response_cache
+from .concurrency import BatchResult
+from .prompts import as_messages
+
+# Nightly runs trade latency for cost: requests are written to a JSONL file,
+# submitted through the Batch API and collected when the batch finishes. Each
+# request's custom_id is its response cache key, so results land in the same
+# cache as interactive calls and a manifest file lets a restarted process pick
+# up the batch it already submitted.
+
+M = TypeVar("M", bound=BaseModel)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+DEFAULT_POLL_INTERVAL = 60  # seconds
+
+# Batches in these states will not produce any more output
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+def strict_json_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Adapt a pydantic JSON schema for strict structured outputs: every object
+    lists all of its properties as required and allows no others.
+    """
+    schema = dict(schema)
+    if schema.get("type") == "object" and "properties" in schema:
+        schema["properties"] = {
+            name: strict_json_schema(prop) for name, prop in schema["properties"].items()
+        }
+        schema["required"] = list(schema["properties"])
+        schema["additionalProperties"] = False
+    if "items" in schema:
+        schema["items"] = strict_json_schema(schema["items"])
+    if "$defs" in schema:
+        schema["$defs"] = {
+            name: strict_json_schema(definition)
+            for name, definition in schema["$defs"].items()
+        }
+    for combinator in ("anyOf", "allOf"):
+        if combinator in schema:
+            schema[combinator] = [strict_json_schema(s) for s in schema[combinator]]
+    return schema
+
+
+def response_format(response_model: Type[BaseModel]) -> Dict[str, Any]:
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": response_model.__name__,
+            "schema": strict_json_schema(response_model.model_json_schema()),
+            "strict": True,
+        },
+    }
+
+
+def build_request(
+    custom_id: str, prompt: Any, model: str, response_model: Type[BaseModel]
+) -> Dict[str, Any]:
+    """
+    One line of a Batch API input file.
+    """
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": model,
+            "messages": as_messages(prompt),
+            "response_format": response_format(response_model),
+        },
+    }
+
+
+def _write_json_lines(path: str, rows: Sequence[Dict[str, Any]]) -> None:
+    # Write to a temporary file first so a crash never leaves a partial file behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    os.replace(tmp_path, path)
+
+
+def _read_json_lines(text: str) -> Iterator[Dict[str, Any]]:
+    for line in text.splitlines():
+        if line.strip():
+            yield json.loads(line)
+
+
+@dataclass
+class BatchStatus:
+    id: str
+    status: str
+    output_file_id: Optional[str] = None
+    error_file_id: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+
+class OpenAIBatchBackend:
+    """
+    Submits batches through the OpenAI Files and Batches APIs.
+    """
+
+    name = "openai"
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from .client import get_openai_client
+
+            self._client = get_openai_client()
+        return self._client
+
+    def submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=COMPLETION_WINDOW,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> BatchStatus:
+        batch = self.client.batches.retrieve(batch_id)
+        return BatchStatus(
+            id=batch.id,
+            status=batch.status,
+            output_file_id=batch.output_file_id,
+            error_file_id=batch.error_file_id,
+        )
+
+    def read(self, file_id: str) -> Iterator[Dict[str, Any]]:
+        return _read_json_lines(self.client.files.content(file_id).text)
+
+
+def _chat_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    from .client import get_openai_client
+
+    return get_openai_client().chat.completions.create(**body).model_dump()
+
+
+class LocalBatchBackend:
+    """
+    File-based stand-in for the Batch API, for tests and offline runs.
+    Each batch is a directory holding the input file, a status file and the
+    output files. Requests are answered by `respond` (by default a regular chat
+    completion, which can point at the fake server through OPENAI_BASE_URL)
+    the first time the batch is polled.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        directory: str,
+        respond: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    ):
+        self.directory = directory
+        self.respond = respond or _chat_completion
+
+    def _path(self, batch_id: str, name: str) -> str:
+        return os.path.join(self.directory, batch_id, name)
+
+    def _set_status(self, batch_id: str, status: str) -> None:
+        tmp_path = self._path(batch_id, "status.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(status)
+        os.replace(tmp_path, self._path(batch_id, "status"))
+
+    def submit(self, input_path: str) -> str:
+        batch_id = f"batch_local_{uuid.uuid4().hex}"
+        os.makedirs(os.path.join(self.directory, batch_id))
+        shutil.copyfile(input_path, self._path(batch_id, "input.jsonl"))
+        self._set_status(batch_id, "in_progress")
+        return batch_id
+
+    def _process(self, batch_id: str) -> None:
+        with open(self._path(batch_id, "input.jsonl")) as f:
+            requests = list(_read_json_lines(f.read()))
+        outputs, errors = [], []
+        for request in requests:
+            line = {"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": request["custom_id"]}
+            try:
+                body = self.respond(request["body"])
+            except Exception as e:
+                errors.append(
+                    {**line, "response": None, "error": {"code": "error", "message": str(e)}}
+                )
+            else:
+                outputs.append(
+                    {**line, "response": {"status_code": 200, "body": body}, "error": None}
+                )
+        _write_json_lines(self._path(batch_id, "output.jsonl"), outputs)
+        _write_json_lines(self._path(batch_id, "errors.jsonl"), errors)
+        self._set_status(batch_id, "completed")
+
+    def status(self, batch_id: str) -> BatchStatus:
+        with open(self._path(batch_id, "status")) as f:
+            status = f.read()
+        if status == "in_progress":
+            self._process(batch_id)
+            status = "completed"
+        return BatchStatus(
+            id=batch_id,
+            status=status,
+            output_file_id=self._path(batch_id, "output.jsonl"),
+            error_file_id=self._path(batch_id, "errors.jsonl"),
+        )
+
+    def read(self, file_id: str) -> Iterator[Dict[str, Any]]:
+        with open(file_id) as f:
+            return _read_json_lines(f.read())
+
+
+def get_batch_backend(name: Optional[str] = None, directory: Optional[str] = None):
+    """
+    Return the backend named by `name` or settings.OPENAI_BATCH_BACKEND ("openai" or "local").
+    """
+    name = name or getattr(settings, "OPENAI_BATCH_BACKEND", "openai")
+    if name == "openai":
+        return OpenAIBatchBackend()
+    if name == "local":
+        directory = directory or getattr(settings, "OPENAI_BATCH_DIR", None)
+        if not directory:
+            raise ValueError("OPENAI_BATCH_DIR is not set in Django settings.")
+        return LocalBatchBackend(directory)
+    raise ValueError(f"Unknown batch backend: {name}")
+
+
+@dataclass
+class BatchManifest:
+    """
+    Record of a submitted batch, saved next to its input file so that a
+    restarted process resumes polling instead of submitting again.
+    """
+
+    batch_id: str
+    backend: str
+    model: str
+    response_model: str
+    custom_ids: List[str] = field(default_factory=list)
+    status: str = "submitted"
+    submitted_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BatchManifest"]:
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return cls(**json.load(f))
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(self), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def matches(
+        self, backend: str, model: str, response_model: str, custom_ids: Sequence[str]
+    ) -> bool:
+        return (
+            self.backend == backend
+            and self.model == model
+            and self.response_model == response_model
+            and set(custom_ids) <= set(self.custom_ids)
+            and self.status not in ("failed", "expired", "cancelled")
+        )
+
+
+def _parse_line(line: Dict[str, Any], response_model: Type[M]) -> M:
+    error = line.get("error")
+    if error:
+        raise ValueError(f"Batch request failed: {error.get('message', error)}")
+    response = line.get("response") or {}
+    if response.get("status_code") != 200:
+        body = response.get("body") or {}
+        message = (body.get("error") or {}).get("message", "no response")
+        raise ValueError(
+            f"Batch request failed with status {response.get('status_code')}: {message}"
+        )
+    message = response["body"]["choices"][0]["message"]
+    if message.get("refusal"):
+        raise ValueError(f"Model refused the request: {message['refusal']}")
+    return response_model.model_validate_json(message["content"])
+
+
+def wait_for_batch(
+    backend, batch_id: str, poll_interval: float, timeout: Optional[float] = None
+) -> BatchStatus:
+    started = time.monotonic()
+    while True:
+        status = backend.status(batch_id)
+        if status.done:
+            return status
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(f"Batch {batch_id} did not finish within {timeout}s.")
+        logging.info(f"Batch {batch_id} is {status.status}; polling again in {poll_interval}s.")
+        time.sleep(poll_interval)
+
+
+def run_batch(
+    prompts: Sequence[Any],
+    response_model: Type[M],
+    model: str,
+    manifest_path: str,
+    backend=None,
+    poll_interval: Optional[float] = None,
+    timeout: Optional[float] = None,
+) -> List[BatchResult[M]]:
+    """
+    Run `prompts` through the Batch API and validate the results into `response_model`.
+    Results are returned in input order; failed items carry the error instead of a value.
+    Prompts already in the response cache are not submitted again.
+    """
+    backend = backend or get_batch_backend()
+    if poll_interval is None:
+        poll_interval = getattr(settings, "OPENAI_BATCH_POLL_INTERVAL", DEFAULT_POLL_INTERVAL)
+    cache = get_response_cache()
+    results: Dict[int, BatchResult[M]] = {}
+
+    # Identical prompts share a custom_id and are requested once
+    pending: Dict[str, List[int]] = {}
+    requests = []
+    for index, prompt in enumerate(prompts):
+        custom_id = cache_key(prompt, model, response_model)
+        cached = cache.get(custom_id, response_model)
+        if cached is not None:
+            results[index] = BatchResult(index, cached)
+        elif custom_id in pending:
+            pending[custom_id].append(index)
+        else:
+            pending[custom_id] = [index]
+            requests.append(build_request(custom_id, prompt, model, response_model))
+
+    if pending:
+        manifest = BatchManifest.load(manifest_path)
+        if manifest and manifest.matches(
+            backend.name, model, response_model.__name__, list(pending)
+        ):
+            logging.info(f"Resuming batch {manifest.batch_id} from {manifest_path}.")
+        else:
+            input_path = f"{manifest_path}.input.jsonl"
+            _write_json_lines(input_path, requests)
+            manifest = BatchManifest(
+                batch_id=backend.submit(input_path),
+                backend=backend.name,
+                model=model,
+                response_model=response_model.__name__,
+                custom_ids=list(pending),
+            )
+            manifest.save(manifest_path)
+            logging.info(
+                f"Submitted batch {manifest.batch_id} with {len(requests)} requests."
+            )
+
+        status = wait_for_batch(backend, manifest.batch_id, poll_interval, timeout)
+        manifest.status = status.status
+        manifest.save(manifest_path)
+
+        lines = []
+        for file_id in (status.output_file_id, status.error_file_id):
+            if file_id:
+                lines.extend(backend.read(file_id))
+        for line in lines:
+            indices = pending.pop(line.get("custom_id"), None)
+            if indices is None:
+                continue
+            try:
+                value = _parse_line(line, response_model)
+            except Exception as e:
+                logging.error(f"Batch item {line['custom_id']} failed: {e}")
+                for index in indices:
+                    results[index] = BatchResult(index, error=e)
+                continue
+            cache.set(line["custom_id"], value)
+            for index in indices:
+                results[index] = BatchResult(index, value.model_copy(deep=True))
+
+        # Items the batch never answered, e.g. when it expired part-way through
+        for custom_id, indices in pending.items():
+            error = ValueError(f"No result for batch item (batch {status.status}).")
+            for index in indices:
+                results[index] = BatchResult(index, error=error)
+
+        failed = sum(1 for result in results.values() if not result.ok)
+        logging.info(
+            f"Batch {manifest.batch_id} {status.status}: "
+            f"{len(results) - failed} succeeded, {failed} failed."
+        )
+
+    return [results[index] for index in range(len(prompts))]
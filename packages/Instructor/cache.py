@@ -0,0 +1,271 @@
+# apps/insights/services/openai/cache.py
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    get_args,
+    get_origin,
+)
+
+from django.conf import settings
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_DISK_ENTRIES = 100_000
+
+# Model that produced the response of the call in progress, set by callers that
+# may be answered by another model than the one asked for (hedged requests).
+# Responses are cached under the model that produced them.
+answered_by: ContextVar[Optional[str]] = ContextVar("answered_by", default=None)
+
+
+@lru_cache(maxsize=None)
+def schema_fingerprint(response_model: Type[BaseModel]) -> str:
+    schema = json.dumps(response_model.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode()).hexdigest()
+
+
+def cache_key(prompt: Any, model: str, response_model: Type[BaseModel]) -> str:
+    digest = hashlib.sha256()
+    # Prompts may be plain strings or built prompts, which render to their full text
+    for part in (model, schema_fingerprint(response_model), str(prompt)):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def construct(response_model: Type[M], data: Dict[str, Any]) -> M:
+    """
+    Rebuild a model from previously validated data without re-running validation.
+    Nested models and lists of models are rebuilt recursively.
+    """
+    values = {}
+    for name, field in response_model.model_fields.items():
+        if name not in data:
+            continue
+        value = data[name]
+        annotation = field.annotation
+        if _is_model(annotation) and isinstance(value, dict):
+            value = construct(annotation, value)
+        elif get_origin(annotation) is list and isinstance(value, list):
+            (item_type,) = get_args(annotation) or (None,)
+            if _is_model(item_type):
+                value = [construct(item_type, item) for item in value]
+        values[name] = value
+    return response_model.model_construct(**values)
+
+
+class _SQLiteTier:
+    def __init__(self, path: str, ttl: Optional[float], max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+        self.connection.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.connection.commit()
+                return None
+            self.connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.connection.commit()
+            return payload
+
+    def set(self, key: str, payload: str) -> None:
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            # Evict least recently used rows beyond the size limit
+            self.connection.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self.connection.commit()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.commit()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for structured LLM responses.
+    The in-memory LRU tier holds validated objects; the optional SQLite tier
+    holds their JSON and survives restarts.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None,
+        max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.memory: "OrderedDict[str, Tuple[float, BaseModel]]" = OrderedDict()
+        self.disk = _SQLiteTier(path, ttl, max_disk_entries) if path else None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    @classmethod
+    def from_settings(cls) -> "ResponseCache":
+        return cls(
+            max_entries=getattr(settings, "OPENAI_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+            ttl=getattr(settings, "OPENAI_CACHE_TTL", None),
+            path=getattr(settings, "OPENAI_CACHE_PATH", None),
+            max_disk_entries=getattr(
+                settings, "OPENAI_CACHE_MAX_DISK_ENTRIES", DEFAULT_MAX_DISK_ENTRIES
+            ),
+        )
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits}
+
+    def get(self, key: str, response_model: Type[M]) -> Optional[M]:
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl is None or now - stored_at <= self.ttl:
+                    self.memory.move_to_end(key)
+                    self.hits += 1
+                    # Hand out a copy so callers cannot mutate the cached object
+                    return value.model_copy(deep=True)
+                del self.memory[key]
+
+        payload = self.disk.get(key) if self.disk else None
+        if payload is None:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        value = construct(response_model, json.loads(payload))
+        with self.lock:
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, value, now)
+        return value.model_copy(deep=True)
+
+    def set(self, key: str, value: BaseModel) -> None:
+        with self.lock:
+            self._remember(key, value.model_copy(deep=True), time.time())
+        if self.disk:
+            self.disk.set(key, value.model_dump_json())
+
+    def _remember(self, key: str, value: BaseModel, stored_at: float) -> None:
+        self.memory[key] = (stored_at, value)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.memory.clear()
+        if self.disk:
+            self.disk.clear()
+
+    def get_or_call(
+        self,
+        prompt: Any,
+        model: str,
+        response_model: Type[M],
+        call: Callable[[Any], M],
+    ) -> M:
+        key = cache_key(prompt, model, response_model)
+        cached = self.get(key, response_model)
+        if cached is not None:
+            logging.info(f"Cache hit for {response_model.__name__} response.")
+            return cached
+        response = call(prompt)
+        self.set(key, response)
+        return response
+
+    async def aget_or_call(
+        self,
+        prompt: Any,
+        model: str,
+        response_model: Type[M],
+        call: Callable[[Any], Awaitable[M]],
+    ) -> M:
+        key = cache_key(prompt, model, response_model)
+        cached = self.get(key, response_model)
+        if cached is not None:
+            logging.info(f"Cache hit for {response_model.__name__} response.")
+            return cached
+        token = answered_by.set(None)
+        try:
+            response = await call(prompt)
+            answered = answered_by.get()
+        finally:
+            answered_by.reset(token)
+        if answered is not None and answered != model:
+            logging.info(f"Response came from {answered}; caching it under that model.")
+            key = cache_key(prompt, answered, response_model)
+        self.set(key, response)
+        return response
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Return the process-wide cache, creating it from Django settings on first use.
+    """
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache.from_settings()
+    return _response_cache
@@ -0,0 +1,165 @@
+# apps/insights/services/openai/client.py
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+from .observability import install_hooks
+
+# Clients are created on first use so that importing the generators does not
+# pull in openai/instructor/httpx or read settings.
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+# Async clients hold httpx connections bound to the event loop that opened them,
+# so each loop (e.g. each asyncio.run) gets its own, dropped with the loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_api_key() -> str:
+    # Load OpenAI API key from settings
+    openai_api_key = getattr(settings, "OPENAI_API_KEY", None)
+
+    if not openai_api_key:
+        raise ValueError("OPENAI_API_KEY is not set in Django settings.")
+    return openai_api_key
+
+
+def get_base_url() -> Optional[str]:
+    # Point the clients elsewhere, e.g. at the local fake server used for load tests
+    return getattr(settings, "OPENAI_BASE_URL", None)
+
+
+def _get_or_create(name: str, factory) -> Any:
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+
+def _create_client():
+    from instructor import from_openai
+    from openai import DefaultHttpxClient, OpenAI
+
+    from .rate_limit import get_rate_limiter
+
+    # Rate-limit headers feed the shared limiter; retries are handled by tenacity
+    # after the limiter, so the SDK's own retries are disabled.
+    http_client = DefaultHttpxClient(
+        event_hooks={"response": [get_rate_limiter().on_response]}
+    )
+    client = from_openai(
+        OpenAI(
+            api_key=get_api_key(),
+            base_url=get_base_url(),
+            http_client=http_client,
+            max_retries=0,
+        )
+    )
+    install_hooks(client)
+    return client
+
+
+def _create_async_client():
+    from instructor import from_openai
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    from .rate_limit import get_rate_limiter
+
+    http_client = DefaultAsyncHttpxClient(
+        event_hooks={"response": [get_rate_limiter().aon_response]}
+    )
+    client = from_openai(
+        AsyncOpenAI(
+            api_key=get_api_key(),
+            base_url=get_base_url(),
+            http_client=http_client,
+            max_retries=0,
+        )
+    )
+    install_hooks(client)
+    return client
+
+
+def get_client():
+    """
+    Return the shared Instructor-patched OpenAI client.
+    """
+    return _get_or_create("sync", _create_client)
+
+
+def get_async_client():
+    """
+    Return the Instructor-patched AsyncOpenAI client for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        with _clients_lock:
+            client = _async_clients.get(loop)
+            if client is None:
+                client = _async_clients[loop] = _create_async_client()
+    return client
+
+
+def _create_openai_client():
+    from openai import OpenAI
+
+    return OpenAI(api_key=get_api_key(), base_url=get_base_url())
+
+
+def get_openai_client():
+    """
+    Return a plain (unpatched) OpenAI client, for the Files and Batches APIs.
+    """
+    return _get_or_create("openai", _create_openai_client)
+
+
+def reset_clients() -> None:
+    """
+    Drop cached clients, e.g. after settings change in tests.
+    """
+    with _clients_lock:
+        _clients.clear()
+        _async_clients.clear()
+
+
+def _retry_kwargs() -> Dict[str, Any]:
+    from tenacity import stop_after_attempt, wait_random_exponential
+
+    from .rate_limit import wait_retry_after
+
+    # Jittered exponential backoff so workers do not retry in lockstep,
+    # stretched to any Retry-After the API asks for
+    return {
+        "stop": stop_after_attempt(settings.OPENAI_RETRY_ATTEMPTS),
+        "wait": wait_retry_after(
+            wait_random_exponential(
+                multiplier=settings.OPENAI_RETRY_WAIT_MULTIPLIER,
+                min=settings.OPENAI_RETRY_WAIT_MIN,
+                max=settings.OPENAI_RETRY_WAIT_MAX,
+            )
+        ),
+    }
+
+
+def openai_retrying():
+    """
+    Retry logic for transient errors, configured from settings.OPENAI_RETRY_*.
+    """
+    from tenacity import Retrying
+
+    return Retrying(**_retry_kwargs())
+
+
+def openai_async_retrying():
+    from tenacity import AsyncRetrying
+
+    return AsyncRetrying(**_retry_kwargs())
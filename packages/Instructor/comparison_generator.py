@@ -1,99 +1,98 @@
 # apps/insights/services/openai/comparison_generator.py
 
-from django.conf import settings
-from instructor import from_openai
-from openai import OpenAI
-from .schemas import ComparisonOutput
-import logging
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
+import asyncio
+from functools import partial
+from typing import (
+    AsyncIterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+from pydantic import BaseModel
+from .cache import get_response_cache
+from .client import openai_async_retrying, openai_retrying
+from .concurrency import BatchResult, run_many, stream_many
+from .hedging import hedged
+from .observability import observe_call, record_attempt
+from .prompts import (
+    COMPARISON_NARRATIVE_PROMPT,
+    COMPARISON_PROMPT,
+    BuiltPrompt,
+    as_messages,
 )
+from .repair import acreate_with_repair, create_with_repair, get_repairer
+from .schemas import ComparisonNarrative, ComparisonOutput
+import logging
 
-# Load OpenAI API key from settings
-openai_api_key = settings.OPENAI_API_KEY
+M = TypeVar("M", bound=BaseModel)
 
-if not openai_api_key:
-    raise ValueError("OPENAI_API_KEY is not set in Django settings.")
+OPENAI_MODEL = "gpt-4o-2024-08-06"
 
-# Initialize OpenAI client
-client = from_openai(OpenAI(api_key=openai_api_key))
 
+def call_openai_api(
+    prompt: Union[str, BuiltPrompt], response_model: Type[M] = ComparisonOutput
+) -> M:
+    with observe_call(response_model.__name__):
+        # Retry logic for transient errors
+        for attempt in openai_retrying():
+            with attempt:
+                record_attempt(response_model.__name__, attempt.retry_state.attempt_number)
+                try:
+                    # Make the API call; invalid responses are repaired locally
+                    # before any re-ask
+                    return create_with_repair(
+                        as_messages(prompt), get_repairer(response_model), OPENAI_MODEL
+                    )
+                except Exception as e:
+                    logging.error(f"Error during OpenAI API call: {e}")
+                    raise
 
-# Retry logic for transient errors
-@retry(
-    stop=stop_after_attempt(settings.OPENAI_RETRY_ATTEMPTS),
-    wait=wait_exponential(
-        multiplier=settings.OPENAI_RETRY_WAIT_MULTIPLIER,
-        min=settings.OPENAI_RETRY_WAIT_MIN,
-        max=settings.OPENAI_RETRY_WAIT_MAX,
-    ),
-)
-def call_openai_api(prompt: str) -> ComparisonOutput:
-    try:
-        # Make the API call
-        return client.chat.completions.create(
-            model="gpt-4o-2024-08-06",
-            messages=[{"role": "user", "content": prompt}],
-            response_model=ComparisonOutput,
-        )
-    except Exception as e:
-        logging.error(f"Error during OpenAI API call: {e}")
-        raise
 
+# Async counterpart used by the batch entry points
+async def async_call_openai_api(
+    prompt: Union[str, BuiltPrompt], response_model: Type[M] = ComparisonOutput
+) -> M:
+    with observe_call(response_model.__name__):
+        async for attempt in openai_async_retrying():
+            with attempt:
+                record_attempt(response_model.__name__, attempt.retry_state.attempt_number)
+                try:
 
-def generate_comparison(summary1: str, summary2: str) -> ComparisonOutput:
-    prompt = f"""
-You are a data analyst tasked with comparing two dataset summaries. Here are the summaries:
-
-{summary1} is the current week.
-
-{summary2} is the week prior.
-
-Please provide the comparison in the following JSON format:
-
-{{
-    "comparison_summary": "A comprehensive summary of differences and similarities between the current week and previous week, including notable trends and observations.
-    Ensure that:
-        - Maximum length is 180 words.
-        - Refer to the summaries as 'this week' and 'the previous week' in your summary.
-        - Use precise verbal descriptions to describe the observed differences or trends between the current week and the previous week data in your summary.
-        - Mention up to three salient numerical values in your summary.
-        - Commas should be used in numerical values to separate thousands in your summary.",
-    "key_metrics_comparison": [
-        {{
-            "name": "Name of Metric",
-            "value1": Value from current week,
-            "value2": Value from previous week,
-            "description": "Description of observed difference or trend between the previous week and the current week, including specific figures and percentages where appropriate."
-        }}
-        // Repeat for each key metric
-    ]
-}}
-
-Ensure that:
-- Numerical values for value1 and value2 are provided as numbers (not strings) for each metric.
-- The key_metrics_comparison includes the following metrics in this order:
-    - "Average Sessions"
-    - "Average Users"
-    - "Average New Users"
-    - "Average Pageviews"
-    - "Pages per Session"
-    - "Average Session Duration"
-    - "Bounce Rate"
-    - "Conversion Rate"
-    - "Average Transactions"
-    - "Average Revenue"
-- The description for each metric explains the difference or trend observed between the current week and one week prior, using precise figures (e.g., differences, statistics, percentages).
-- Refer to the summaries as "this week" and "the previous week" in your descriptions.
-"""
+                    async def create(model: str) -> M:
+                        # Make the API call
+                        return await acreate_with_repair(
+                            as_messages(prompt), get_repairer(response_model), model
+                        )
+
+                    # Hedged against slow responses when OPENAI_HEDGING_ENABLED is set
+                    return await hedged(create, OPENAI_MODEL)
+                except Exception as e:
+                    logging.error(f"Error during OpenAI API call: {e}")
+                    raise
+
+
+def build_comparison_prompt(summary1: str, summary2: str) -> BuiltPrompt:
+    return COMPARISON_PROMPT.build(summary1=summary1, summary2=summary2)
+
+
+def build_comparison_narrative_prompt(metric_changes: str) -> BuiltPrompt:
+    return COMPARISON_NARRATIVE_PROMPT.build(metric_changes=metric_changes)
 
+
+def generate_comparison(summary1: str, summary2: str) -> ComparisonOutput:
+    prompt = build_comparison_prompt(summary1, summary2)
     try:
         logging.info("Requesting dataset comparison from OpenAI...")
 
-        # Retry-enabled API call
-        response = call_openai_api(prompt)
+        # Cached, retry-enabled API call
+        response = get_response_cache().get_or_call(
+            prompt, OPENAI_MODEL, ComparisonOutput, call_openai_api
+        )
 
         # Log the raw response from OpenAI for debugging
         logging.info(f"Raw LLM response: {response.json()}")
@@ -104,3 +103,97 @@ Ensure that:
     except Exception as e:
         logging.error(f"Error generating comparison: {e}")
         raise ValueError("Failed to generate comparison using OpenAI.") from e
+
+
+async def agenerate_comparison(summary1: str, summary2: str) -> ComparisonOutput:
+    prompt = build_comparison_prompt(summary1, summary2)
+    try:
+        logging.info("Requesting dataset comparison from OpenAI...")
+
+        # Cached, retry-enabled API call
+        response = await get_response_cache().aget_or_call(
+            prompt, OPENAI_MODEL, ComparisonOutput, async_call_openai_api
+        )
+
+        logging.info("Successfully received structured response.")
+        return response
+
+    except Exception as e:
+        logging.error(f"Error generating comparison: {e}")
+        raise ValueError("Failed to generate comparison using OpenAI.") from e
+
+
+async def _agenerate_comparison_pair(pair: Tuple[str, str]) -> ComparisonOutput:
+    return await agenerate_comparison(*pair)
+
+
+async def agenerate_comparisons_many(
+    summary_pairs: Sequence[Tuple[str, str]], concurrency: Optional[int] = None
+) -> List[BatchResult[ComparisonOutput]]:
+    return await run_many(_agenerate_comparison_pair, summary_pairs, concurrency)
+
+
+def generate_comparisons_many(
+    summary_pairs: Sequence[Tuple[str, str]], concurrency: Optional[int] = None
+) -> List[BatchResult[ComparisonOutput]]:
+    """
+    Compare many (current week, previous week) summary pairs concurrently.
+    Results are returned in input order; failed items carry the error instead of a value.
+    """
+    return asyncio.run(agenerate_comparisons_many(summary_pairs, concurrency))
+
+
+def stream_comparisons_many(
+    summary_pairs: Sequence[Tuple[str, str]], concurrency: Optional[int] = None
+) -> AsyncIterator[BatchResult[ComparisonOutput]]:
+    """
+    Compare many summary pairs concurrently, yielding results as they complete.
+    """
+    return stream_many(_agenerate_comparison_pair, summary_pairs, concurrency)
+
+
+def generate_comparison_from_data(
+    current_data: Mapping[str, Sequence[float]],
+    previous_data: Mapping[str, Sequence[float]],
+) -> ComparisonOutput:
+    """
+    Compare raw daily data for the current and previous week.
+    Metric values are computed locally; the LLM only writes the narrative fields.
+    """
+    # Imported here to keep NumPy out of the module import path
+    from .key_metrics import compute_key_metrics
+
+    return generate_comparison_from_metrics(
+        compute_key_metrics(current_data), compute_key_metrics(previous_data)
+    )
+
+
+def generate_comparison_from_metrics(current, previous) -> ComparisonOutput:
+    """
+    Compare two weeks given their key metric vectors (see `key_metrics`).
+    """
+    from .key_metrics import format_metric_changes, to_key_metric_comparisons
+
+    prompt = build_comparison_narrative_prompt(format_metric_changes(current, previous))
+    try:
+        logging.info("Requesting dataset comparison narrative from OpenAI...")
+
+        # Cached, retry-enabled API call
+        narrative = get_response_cache().get_or_call(
+            prompt,
+            OPENAI_MODEL,
+            ComparisonNarrative,
+            partial(call_openai_api, response_model=ComparisonNarrative),
+        )
+
+        logging.info("Successfully received structured response.")
+        return ComparisonOutput(
+            comparison_summary=narrative.comparison_summary,
+            key_metrics_comparison=to_key_metric_comparisons(
+                current, previous, narrative.metric_descriptions
+            ),
+        )
+
+    except Exception as e:
+        logging.error(f"Error generating comparison: {e}")
+        raise ValueError("Failed to generate comparison using OpenAI.") from e
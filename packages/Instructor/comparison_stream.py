@@ -0,0 +1,164 @@
+# apps/insights/services/openai/comparison_stream.py
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, List, Optional
+
+from .cache import cache_key, get_response_cache
+from .client import get_async_client, get_client
+from .comparison_generator import OPENAI_MODEL, build_comparison_prompt
+from .rate_limit import estimate_tokens, get_rate_limiter
+from .schemas import ComparisonOutput, ComparisonStreamOutput, KeyMetricComparison
+
+
+@dataclass
+class ComparisonEvent:
+    """
+    A single update from a streamed comparison.
+
+    kind is one of:
+        - "metric": `metric` is a validated KeyMetricComparison at position `index`.
+        - "summary": `text` is the next chunk of `comparison_summary`.
+        - "final": `output` is the complete, validated ComparisonOutput.
+    """
+
+    kind: str
+    index: Optional[int] = None
+    metric: Optional[KeyMetricComparison] = None
+    text: Optional[str] = None
+    output: Optional[ComparisonOutput] = None
+
+
+class _ComparisonAssembler:
+    """
+    Turns successive partial responses into metric, summary and final events.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.metrics: List[KeyMetricComparison] = []
+        self.summary = ""
+        self.last = None
+
+    def _emit_metrics(self, partial_metrics, complete: bool) -> List[ComparisonEvent]:
+        events = []
+        # A metric is complete once the model has moved on to the next one
+        ready = len(partial_metrics) if complete else len(partial_metrics) - 1
+        while len(self.metrics) < ready:
+            index = len(self.metrics)
+            metric = KeyMetricComparison.model_validate(
+                partial_metrics[index].model_dump()
+            )
+            if index == 0:
+                logging.info(
+                    f"First metric after {time.monotonic() - self.started:.2f}s."
+                )
+            self.metrics.append(metric)
+            events.append(ComparisonEvent(kind="metric", index=index, metric=metric))
+        return events
+
+    def feed(self, partial) -> List[ComparisonEvent]:
+        self.last = partial
+        # Fields the model has not reached yet may be missing or None
+        text = getattr(partial, "comparison_summary", None) or ""
+        # Metrics are generated first, so all of them are complete once the summary starts
+        events = self._emit_metrics(
+            getattr(partial, "key_metrics_comparison", None) or [],
+            complete=bool(text),
+        )
+        if len(text) > len(self.summary):
+            events.append(ComparisonEvent(kind="summary", text=text[len(self.summary) :]))
+            self.summary = text
+        return events
+
+    def finish(self) -> List[ComparisonEvent]:
+        if self.last is None:
+            raise ValueError("Comparison stream ended without a response.")
+        events = self._emit_metrics(
+            getattr(self.last, "key_metrics_comparison", None) or [], complete=True
+        )
+        # Validate the assembled object in full before handing it out
+        output = ComparisonOutput.model_validate(self.last.model_dump())
+        events.append(ComparisonEvent(kind="final", output=output))
+        return events
+
+
+def _replay(output: ComparisonOutput) -> List[ComparisonEvent]:
+    events = [
+        ComparisonEvent(kind="metric", index=index, metric=metric)
+        for index, metric in enumerate(output.key_metrics_comparison)
+    ]
+    events.append(ComparisonEvent(kind="summary", text=output.comparison_summary))
+    events.append(ComparisonEvent(kind="final", output=output))
+    return events
+
+
+def stream_comparison(summary1: str, summary2: str) -> Iterator[ComparisonEvent]:
+    """
+    Streaming variant of `generate_comparison`.
+    Yields each metric as soon as it is complete, then the summary text as it is
+    generated, and finally the validated ComparisonOutput. Streamed calls are not
+    retried by tenacity, since events may already have been consumed.
+    """
+    prompt = build_comparison_prompt(summary1, summary2)
+    key = cache_key(prompt, OPENAI_MODEL, ComparisonOutput)
+    cached = get_response_cache().get(key, ComparisonOutput)
+    if cached is not None:
+        yield from _replay(cached)
+        return
+
+    try:
+        logging.info("Streaming dataset comparison from OpenAI...")
+        get_rate_limiter().acquire(estimate_tokens(prompt))
+        assembler = _ComparisonAssembler()
+        for partial in get_client().chat.completions.create_partial(
+            model=OPENAI_MODEL,
+            messages=prompt.messages,
+            response_model=ComparisonStreamOutput,
+        ):
+            yield from assembler.feed(partial)
+        events = assembler.finish()
+    except Exception as e:
+        logging.error(f"Error streaming comparison: {e}")
+        raise ValueError("Failed to generate comparison using OpenAI.") from e
+
+    get_response_cache().set(key, events[-1].output)
+    logging.info("Successfully received structured response.")
+    yield from events
+
+
+async def astream_comparison(
+    summary1: str, summary2: str
+) -> AsyncIterator[ComparisonEvent]:
+    """
+    Async variant of `stream_comparison`.
+    """
+    prompt = build_comparison_prompt(summary1, summary2)
+    key = cache_key(prompt, OPENAI_MODEL, ComparisonOutput)
+    cached = get_response_cache().get(key, ComparisonOutput)
+    if cached is not None:
+        for event in _replay(cached):
+            yield event
+        return
+
+    try:
+        logging.info("Streaming dataset comparison from OpenAI...")
+        await get_rate_limiter().aacquire(estimate_tokens(prompt))
+        assembler = _ComparisonAssembler()
+        async for partial in get_async_client().chat.completions.create_partial(
+            model=OPENAI_MODEL,
+            messages=prompt.messages,
+            response_model=ComparisonStreamOutput,
+        ):
+            for event in assembler.feed(partial):
+                yield event
+        events = assembler.finish()
+    except Exception as e:
+        logging.error(f"Error streaming comparison: {e}")
+        raise ValueError("Failed to generate comparison using OpenAI.") from e
+
+    get_response_cache().set(key, events[-1].output)
+    logging.info("Successfully received structured response.")
+    for event in events:
+        yield event
@@ -0,0 +1,95 @@
+# apps/insights/services/openai/concurrency.py
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    TypeVar,
+)
+
+from django.conf import settings
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+@dataclass
+class BatchResult(Generic[R]):
+    """
+    Outcome of a single item in a batch run.
+    `index` is the position of the item in the input sequence.
+    """
+
+    index: int
+    value: Optional[R] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def default_concurrency() -> int:
+    return getattr(settings, "OPENAI_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+
+
+async def _run_one(
+    index: int,
+    item: T,
+    func: Callable[[T], Awaitable[R]],
+    semaphore: asyncio.Semaphore,
+) -> BatchResult[R]:
+    async with semaphore:
+        try:
+            return BatchResult(index=index, value=await func(item))
+        except Exception as e:
+            # Capture the failure so one bad item does not abort the batch
+            logging.error(f"Batch item {index} failed: {e}")
+            return BatchResult(index=index, error=e)
+
+
+async def run_many(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    concurrency: Optional[int] = None,
+) -> List[BatchResult[R]]:
+    """
+    Run `func` over `items` with at most `concurrency` calls in flight.
+    Results are returned in input order.
+    """
+    semaphore = asyncio.Semaphore(concurrency or default_concurrency())
+    return await asyncio.gather(
+        *(_run_one(i, item, func, semaphore) for i, item in enumerate(items))
+    )
+
+
+async def stream_many(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    concurrency: Optional[int] = None,
+) -> AsyncIterator[BatchResult[R]]:
+    """
+    Run `func` over `items` with at most `concurrency` calls in flight.
+    Results are yielded as they complete; use `BatchResult.index` to map them back.
+    """
+    semaphore = asyncio.Semaphore(concurrency or default_concurrency())
+    tasks = [
+        asyncio.ensure_future(_run_one(i, item, func, semaphore))
+        for i, item in enumerate(items)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Cancel outstanding work if the consumer stops iterating early
+        for task in tasks:
+            task.cancel()
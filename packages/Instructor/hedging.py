@@ -0,0 +1,177 @@
+# apps/insights/services/openai/hedging.py
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from django.conf import settings
+
+# Opt-in request hedging for the async path (settings.OPENAI_HEDGING_ENABLED).
+# When a call is still running after the configured percentile of recent
+# latencies, a duplicate is sent (optionally to a secondary model); the first
+# validated result wins and the other request is cancelled. Hedges are capped at
+# a fraction of all calls so the extra cost stays bounded.
+
+R = TypeVar("R")
+
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_MAX_HEDGE_RATE = 0.05
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_WINDOW_SIZE = 500
+
+
+class LatencyWindow:
+    """
+    The most recent `size` successful call latencies, in seconds.
+    """
+
+    def __init__(self, size: int = DEFAULT_WINDOW_SIZE):
+        self.lock = threading.Lock()
+        self.samples = deque(maxlen=size)
+
+    def observe(self, seconds: float) -> None:
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        with self.lock:
+            ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+
+class Hedger:
+    """
+    Runs async calls with a hedge fired after the `percentile` latency.
+    `call(model)` must return a validated result; a call that raises does not win.
+    """
+
+    def __init__(
+        self,
+        percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        max_hedge_rate: float = DEFAULT_MAX_HEDGE_RATE,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        secondary_model: Optional[str] = None,
+        window: Optional[LatencyWindow] = None,
+    ):
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.secondary_model = secondary_model
+        self.window = window or LatencyWindow()
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.hedges = 0
+        self.hedges_won = 0
+
+    @classmethod
+    def from_settings(cls) -> "Hedger":
+        return cls(
+            percentile=getattr(settings, "OPENAI_HEDGE_PERCENTILE", DEFAULT_HEDGE_PERCENTILE),
+            max_hedge_rate=getattr(settings, "OPENAI_HEDGE_MAX_RATE", DEFAULT_MAX_HEDGE_RATE),
+            min_samples=getattr(settings, "OPENAI_HEDGE_MIN_SAMPLES", DEFAULT_MIN_SAMPLES),
+            secondary_model=getattr(settings, "OPENAI_HEDGE_MODEL", None),
+        )
+
+    @property
+    def stats(self):
+        return {"calls": self.calls, "hedges": self.hedges, "hedges_won": self.hedges_won}
+
+    def hedge_delay(self) -> Optional[float]:
+        # No hedging until there are enough samples for a meaningful percentile
+        if len(self.window) < self.min_samples:
+            return None
+        return self.window.percentile(self.percentile)
+
+    def _reserve_hedge(self) -> bool:
+        with self.lock:
+            if self.hedges + 1 > self.max_hedge_rate * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    async def _timed(self, call: Callable[[str], Awaitable[R]], model: str) -> R:
+        started = time.perf_counter()
+        result = await call(model)
+        self.window.observe(time.perf_counter() - started)
+        return result
+
+    async def run(self, call: Callable[[str], Awaitable[R]], model: str) -> R:
+        from .cache import answered_by
+        from .observability import record_hedge
+
+        with self.lock:
+            self.calls += 1
+        primary = asyncio.ensure_future(self._timed(call, model))
+        pending = {primary}
+        try:
+            delay = self.hedge_delay()
+            if delay is None:
+                return await primary
+
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._reserve_hedge():
+                return await primary
+
+            logging.info(f"Call still running after {delay:.2f}s; sending a hedged request.")
+            hedge_model = self.secondary_model or model
+            hedge = asyncio.ensure_future(self._timed(call, hedge_model))
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        winner = "hedge" if task is hedge else "primary"
+                        if task is hedge:
+                            with self.lock:
+                                self.hedges_won += 1
+                            # So the response is not cached as the primary model's
+                            answered_by.set(hedge_model)
+                        record_hedge(winner)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Cancel whatever is still running, also when the caller is cancelled,
+            # and wait for it to unwind
+            pending = {task for task in pending if not task.done()}
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Optional[Hedger]:
+    """
+    Return the process-wide hedger, or None unless settings.OPENAI_HEDGING_ENABLED is set.
+    """
+    global _hedger
+    if not getattr(settings, "OPENAI_HEDGING_ENABLED", False):
+        return None
+    if _hedger is None:
+        with _hedger_lock:
+            if _hedger is None:
+                _hedger = Hedger.from_settings()
+    return _hedger
+
+
+async def hedged(call: Callable[[str], Awaitable[R]], model: str) -> R:
+    """
+    Await `call(model)`, hedged when hedging is enabled.
+    """
+    hedger = get_hedger()
+    if hedger is None:
+        return await call(model)
+    return await hedger.run(call, model)
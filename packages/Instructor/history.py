@@ -0,0 +1,575 @@
+# apps/insights/services/openai/history.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from django.conf import settings
+
+from .schemas import METRIC_INDEX, METRIC_NAMES, ComparisonOutput, SummaryOutput
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Weekly results are stored column-wise so that trend queries ("Bounce Rate for
+# every property over 52 weeks") read only the values they need. Metric values
+# and narrative text are kept apart; the narratives are only read when a full
+# SummaryOutput / ComparisonOutput is rebuilt. Weeks are ISO date strings, which
+# sort chronologically.
+
+SummaryRecord = Tuple[str, str, SummaryOutput]  # (property_id, week, summary)
+ComparisonRecord = Tuple[str, str, ComparisonOutput]  # (property_id, week, comparison)
+
+
+@dataclass
+class MetricSeries:
+    """
+    Values of one metric across properties and weeks, ordered by property then week.
+    `values` has shape (n,) for summaries and (n, 2) (current, previous) for comparisons.
+    """
+
+    metric: str
+    properties: List[str]
+    weeks: List[str]
+    values: "np.ndarray"
+
+    def __len__(self) -> int:
+        return len(self.weeks)
+
+
+def _metric_index(metric: str) -> int:
+    index = METRIC_INDEX.get(metric)
+    if index is None:
+        raise ValueError(f"Unexpected metric name: {metric}")
+    return index
+
+
+def _summary_rows(records: Iterable[SummaryRecord]):
+    import numpy as np
+
+    records = list(records)
+    keys = [(property_id, week) for property_id, week, _ in records]
+    matrix = np.array(
+        [summary.to_vector() for _, _, summary in records], dtype=np.float64
+    ).reshape(len(records), len(METRIC_NAMES))
+    narratives = [summary.dataset_summary for _, _, summary in records]
+    return keys, matrix, narratives
+
+
+def _comparison_rows(records: Iterable[ComparisonRecord]):
+    import numpy as np
+
+    records = list(records)
+    keys = [(property_id, week) for property_id, week, _ in records]
+    # (n, 2, metrics): current and previous week values per record
+    matrix = np.array(
+        [comparison.to_vectors() for _, _, comparison in records], dtype=np.float64
+    ).reshape(len(records), 2, len(METRIC_NAMES))
+    narratives = [
+        (comparison.comparison_summary, comparison.descriptions())
+        for _, _, comparison in records
+    ]
+    return keys, matrix, narratives
+
+
+class SQLiteHistoryStore:
+    """
+    History store on SQLite, one row per (metric, property, week).
+    The primary keys are clustered on metric first, so a metric's range query is a
+    single index range scan.
+    """
+
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS summary_metrics (
+                metric INTEGER NOT NULL, property TEXT NOT NULL, week TEXT NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (metric, property, week)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS comparison_metrics (
+                metric INTEGER NOT NULL, property TEXT NOT NULL, week TEXT NOT NULL,
+                value1 REAL NOT NULL, value2 REAL NOT NULL,
+                PRIMARY KEY (metric, property, week)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS narratives (
+                kind TEXT NOT NULL, property TEXT NOT NULL, week TEXT NOT NULL,
+                text TEXT NOT NULL, descriptions TEXT,
+                PRIMARY KEY (kind, property, week)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS summary_metrics_week
+                ON summary_metrics (metric, week);
+            CREATE INDEX IF NOT EXISTS comparison_metrics_week
+                ON comparison_metrics (metric, week);
+            """
+        )
+        self.connection.commit()
+
+    def append_summaries(self, records: Iterable[SummaryRecord]) -> int:
+        keys, matrix, narratives = _summary_rows(records)
+        metric_rows = (
+            (metric, property_id, week, float(matrix[row, metric]))
+            for row, (property_id, week) in enumerate(keys)
+            for metric in range(len(METRIC_NAMES))
+        )
+        narrative_rows = (
+            ("summary", property_id, week, text, None)
+            for (property_id, week), text in zip(keys, narratives)
+        )
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO summary_metrics VALUES (?, ?, ?, ?)", metric_rows
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO narratives VALUES (?, ?, ?, ?, ?)", narrative_rows
+            )
+        return len(keys)
+
+    def append_comparisons(self, records: Iterable[ComparisonRecord]) -> int:
+        keys, matrix, narratives = _comparison_rows(records)
+        metric_rows = (
+            (
+                metric,
+                property_id,
+                week,
+                float(matrix[row, 0, metric]),
+                float(matrix[row, 1, metric]),
+            )
+            for row, (property_id, week) in enumerate(keys)
+            for metric in range(len(METRIC_NAMES))
+        )
+        narrative_rows = (
+            ("comparison", property_id, week, text, json.dumps(descriptions))
+            for (property_id, week), (text, descriptions) in zip(keys, narratives)
+        )
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO comparison_metrics VALUES (?, ?, ?, ?, ?)",
+                metric_rows,
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO narratives VALUES (?, ?, ?, ?, ?)", narrative_rows
+            )
+        return len(keys)
+
+    def _series(
+        self,
+        table: str,
+        columns: str,
+        metric: str,
+        properties: Optional[Sequence[str]],
+        start: Optional[str],
+        end: Optional[str],
+    ) -> Tuple[List[str], List[str], List[Tuple[float, ...]]]:
+        query = f"SELECT property, week, {columns} FROM {table} WHERE metric = ?"
+        params: List[Any] = [_metric_index(metric)]
+        if properties is not None:
+            query += f" AND property IN ({', '.join('?' * len(properties))})"
+            params.extend(properties)
+        if start is not None:
+            query += " AND week >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND week <= ?"
+            params.append(end)
+        query += " ORDER BY property, week"
+        with self.lock:
+            rows = self.connection.execute(query, params).fetchall()
+        return (
+            [row[0] for row in rows],
+            [row[1] for row in rows],
+            [row[2:] for row in rows],
+        )
+
+    def summary_series(
+        self,
+        metric: str,
+        properties: Optional[Sequence[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> MetricSeries:
+        import numpy as np
+
+        property_ids, weeks, values = self._series(
+            "summary_metrics", "value", metric, properties, start, end
+        )
+        return MetricSeries(
+            metric, property_ids, weeks, np.array(values, dtype=np.float64).reshape(-1)
+        )
+
+    def comparison_series(
+        self,
+        metric: str,
+        properties: Optional[Sequence[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> MetricSeries:
+        import numpy as np
+
+        property_ids, weeks, values = self._series(
+            "comparison_metrics", "value1, value2", metric, properties, start, end
+        )
+        return MetricSeries(
+            metric, property_ids, weeks, np.array(values, dtype=np.float64).reshape(-1, 2)
+        )
+
+    def _week(
+        self, table: str, columns: str, kind: str, property_id: str, week: str
+    ) -> Tuple[Optional[Tuple], List[Tuple]]:
+        with self.lock:
+            narrative = self.connection.execute(
+                "SELECT text, descriptions FROM narratives "
+                "WHERE kind = ? AND property = ? AND week = ?",
+                (kind, property_id, week),
+            ).fetchone()
+            rows = self.connection.execute(
+                f"SELECT {columns} FROM {table} WHERE property = ? AND week = ? "
+                "ORDER BY metric",
+                (property_id, week),
+            ).fetchall()
+        return narrative, rows
+
+    def load_summary(self, property_id: str, week: str) -> Optional[SummaryOutput]:
+        narrative, rows = self._week(
+            "summary_metrics", "value", "summary", property_id, week
+        )
+        if narrative is None:
+            return None
+        return SummaryOutput.from_vector([value for (value,) in rows], narrative[0])
+
+    def load_comparison(self, property_id: str, week: str) -> Optional[ComparisonOutput]:
+        narrative, rows = self._week(
+            "comparison_metrics", "value1, value2", "comparison", property_id, week
+        )
+        if narrative is None:
+            return None
+        return ComparisonOutput.from_vectors(
+            list(zip(*rows)), narrative[0], json.loads(narrative[1])
+        )
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+
+def _latest_rows(keys: Iterable[Tuple], batches: Sequence[int]) -> List[int]:
+    # Row of the latest ingest for each key, in key order
+    latest: Dict[Tuple, int] = {}
+    for row, key in enumerate(keys):
+        previous = latest.get(key)
+        if previous is None or batches[row] >= batches[previous]:
+            latest[key] = row
+    return [latest[key] for key in sorted(latest)]
+
+
+def _comparison_columns() -> List[str]:
+    return [f"{name} (current)" for name in METRIC_NAMES] + [
+        f"{name} (previous)" for name in METRIC_NAMES
+    ]
+
+
+class ParquetHistoryStore:
+    """
+    Append-only history store of Parquet part files, one column per metric.
+    Every ingest writes new part files; rows re-ingested for the same property and
+    week supersede earlier ones at read time. `compact()` merges the parts.
+    """
+
+    TABLES = ("summaries", "comparisons", "narratives")
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        for table in self.TABLES:
+            os.makedirs(os.path.join(directory, table), exist_ok=True)
+
+    def _parts(self, table: str) -> List[str]:
+        directory = os.path.join(self.directory, table)
+        return sorted(
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if name.endswith(".parquet")
+        )
+
+    def _write(self, table: str, columns: Dict[str, Any]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Part names sort in ingest order, which is also the supersede order
+        name = f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+        path = os.path.join(self.directory, table, name)
+        pq.write_table(pa.table(columns), f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+    def _key_columns(self, keys: List[Tuple[str, str]]) -> Dict[str, Any]:
+        import pyarrow as pa
+
+        return {
+            "property": pa.array([key[0] for key in keys], pa.string()),
+            "week": pa.array([key[1] for key in keys], pa.string()),
+            "batch": pa.array([time.time_ns()] * len(keys), pa.int64()),
+        }
+
+    def _write_narratives(
+        self,
+        key_columns: Dict[str, Any],
+        kind: str,
+        texts: List[str],
+        descriptions: List[Optional[List[str]]],
+    ) -> None:
+        import pyarrow as pa
+
+        # Typed explicitly so that parts holding only summaries (no descriptions)
+        # share a schema with the comparison parts
+        self._write(
+            "narratives",
+            {
+                **key_columns,
+                "kind": pa.array([kind] * len(texts), pa.string()),
+                "text": pa.array(texts, pa.string()),
+                "descriptions": pa.array(descriptions, pa.list_(pa.string())),
+            },
+        )
+
+    def append_summaries(self, records: Iterable[SummaryRecord]) -> int:
+        keys, matrix, narratives = _summary_rows(records)
+        if not keys:
+            return 0
+        key_columns = self._key_columns(keys)
+        self._write(
+            "summaries",
+            {
+                **key_columns,
+                **{name: matrix[:, index] for index, name in enumerate(METRIC_NAMES)},
+            },
+        )
+        self._write_narratives(key_columns, "summary", narratives, [None] * len(keys))
+        return len(keys)
+
+    def append_comparisons(self, records: Iterable[ComparisonRecord]) -> int:
+        keys, matrix, narratives = _comparison_rows(records)
+        if not keys:
+            return 0
+        key_columns = self._key_columns(keys)
+        values = matrix.reshape(len(keys), -1)
+        self._write(
+            "comparisons",
+            {
+                **key_columns,
+                **{
+                    name: values[:, index]
+                    for index, name in enumerate(_comparison_columns())
+                },
+            },
+        )
+        self._write_narratives(
+            key_columns,
+            "comparison",
+            [text for text, _ in narratives],
+            [descriptions for _, descriptions in narratives],
+        )
+        return len(keys)
+
+    def _read(
+        self,
+        table: str,
+        columns: List[str],
+        properties: Optional[Sequence[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        extra_filter=None,
+    ) -> Dict[str, list]:
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        parts = self._parts(table)
+        if not parts:
+            return {name: [] for name in ["property", "week", *columns]}
+
+        condition = extra_filter
+        for expression in (
+            pc.field("property").isin(list(properties)) if properties is not None else None,
+            pc.field("week") >= start if start is not None else None,
+            pc.field("week") <= end if end is not None else None,
+        ):
+            if expression is not None:
+                condition = expression if condition is None else condition & expression
+
+        # Only the key columns and the requested metric columns are read from disk
+        data = (
+            ds.dataset(parts, format="parquet")
+            .to_table(columns=["property", "week", "batch", *columns], filter=condition)
+            .to_pydict()
+        )
+
+        rows = _latest_rows(zip(data["property"], data["week"]), data["batch"])
+        return {
+            name: [data[name][row] for row in rows]
+            for name in ["property", "week", *columns]
+        }
+
+    def summary_series(
+        self,
+        metric: str,
+        properties: Optional[Sequence[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> MetricSeries:
+        import numpy as np
+
+        _metric_index(metric)
+        data = self._read("summaries", [metric], properties, start, end)
+        return MetricSeries(
+            metric,
+            data["property"],
+            data["week"],
+            np.array(data[metric], dtype=np.float64),
+        )
+
+    def comparison_series(
+        self,
+        metric: str,
+        properties: Optional[Sequence[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> MetricSeries:
+        import numpy as np
+
+        _metric_index(metric)
+        columns = [f"{metric} (current)", f"{metric} (previous)"]
+        data = self._read("comparisons", columns, properties, start, end)
+        return MetricSeries(
+            metric,
+            data["property"],
+            data["week"],
+            np.array([data[column] for column in columns], dtype=np.float64)
+            .reshape(2, -1)
+            .T,
+        )
+
+    def _narrative(self, kind: str, property_id: str, week: str) -> Optional[Dict]:
+        import pyarrow.compute as pc
+
+        data = self._read(
+            "narratives",
+            ["text", "descriptions"],
+            [property_id],
+            week,
+            week,
+            extra_filter=pc.field("kind") == kind,
+        )
+        if not data["text"]:
+            return None
+        return {"text": data["text"][0], "descriptions": data["descriptions"][0]}
+
+    def load_summary(self, property_id: str, week: str) -> Optional[SummaryOutput]:
+        narrative = self._narrative("summary", property_id, week)
+        if narrative is None:
+            return None
+        data = self._read("summaries", list(METRIC_NAMES), [property_id], week, week)
+        return SummaryOutput.from_vector(
+            [data[name][0] for name in METRIC_NAMES], narrative["text"]
+        )
+
+    def load_comparison(self, property_id: str, week: str) -> Optional[ComparisonOutput]:
+        narrative = self._narrative("comparison", property_id, week)
+        if narrative is None:
+            return None
+        columns = _comparison_columns()
+        data = self._read("comparisons", columns, [property_id], week, week)
+        values = [data[column][0] for column in columns]
+        count = len(METRIC_NAMES)
+        return ComparisonOutput.from_vectors(
+            [values[:count], values[count:]], narrative["text"], narrative["descriptions"]
+        )
+
+    def compact(self) -> None:
+        """
+        Merge each table's part files into one, dropping superseded rows.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        for table in self.TABLES:
+            parts = self._parts(table)
+            if len(parts) < 2:
+                continue
+            data = ds.dataset(parts, format="parquet").to_table()
+            keys = ["kind", "property", "week"] if table == "narratives" else ["property", "week"]
+            rows = _latest_rows(
+                zip(*(data[key].to_pylist() for key in keys)), data["batch"].to_pylist()
+            )
+            merged = data.take(rows)
+            self._write(table, {name: merged[name] for name in data.column_names})
+            for path in parts:
+                os.remove(path)
+            logging.info(f"Compacted {len(parts)} {table} parts ({merged.num_rows} rows).")
+
+    def close(self) -> None:
+        pass
+
+
+def _pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_history_store(backend: Optional[str] = None, path: Optional[str] = None):
+    """
+    Open the history store under `path` or settings.OPENAI_HISTORY_PATH.
+    `backend` (or settings.OPENAI_HISTORY_BACKEND) is "parquet" or "sqlite"; by
+    default Parquet is used when pyarrow is installed.
+    """
+    path = path or getattr(settings, "OPENAI_HISTORY_PATH", None)
+    if not path:
+        raise ValueError("OPENAI_HISTORY_PATH is not set in Django settings.")
+    backend = backend or getattr(settings, "OPENAI_HISTORY_BACKEND", None)
+    if backend in (None, "parquet") and not _pyarrow_available():
+        if backend == "parquet":
+            logging.warning(
+                "OPENAI_HISTORY_BACKEND is parquet but pyarrow is not installed; using SQLite."
+            )
+        backend = "sqlite"
+    os.makedirs(path, exist_ok=True)
+    if backend in (None, "parquet"):
+        return ParquetHistoryStore(path)
+    if backend == "sqlite":
+        return SQLiteHistoryStore(os.path.join(path, "history.sqlite3"))
+    raise ValueError(f"Unknown history backend: {backend}")
+
+
+_history_store = None
+_history_store_lock = threading.Lock()
+
+
+def get_history_store():
+    """
+    Return the process-wide history store, created from Django settings on first use.
+    """
+    global _history_store
+    if _history_store is None:
+        with _history_store_lock:
+            if _history_store is None:
+                _history_store = create_history_store()
+    return _history_store
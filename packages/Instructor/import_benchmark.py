@@ -0,0 +1,94 @@
+# Import-time report for the Instructor generator modules.
+#
+# Runs each import in a fresh interpreter with `python -X importtime` and reports
+# the cumulative cost of the top-level imports. Run from the repository root:
+#
+#   python packages/Instructor/import_benchmark.py
+
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Configure minimal Django settings so the modules can be imported standalone
+SETUP = (
+    "from django.conf import settings; "
+    "settings.configure(OPENAI_API_KEY='sk-benchmark', OPENAI_RETRY_ATTEMPTS=1, "
+    "OPENAI_RETRY_WAIT_MULTIPLIER=1, OPENAI_RETRY_WAIT_MIN=1, OPENAI_RETRY_WAIT_MAX=1); "
+)
+
+SCENARIOS = {
+    "django settings only": "",
+    "summary_generator": "import packages.Instructor.summary_generator",
+    "comparison_generator": "import packages.Instructor.comparison_generator",
+    "both generators": (
+        "import packages.Instructor.summary_generator, "
+        "packages.Instructor.comparison_generator"
+    ),
+    # What every process used to pay at import: the SDKs plus client construction
+    "eager openai + instructor client": (
+        "from instructor import from_openai; from openai import OpenAI; "
+        "from_openai(OpenAI(api_key='sk-benchmark'))"
+    ),
+    # What is now paid on first use only
+    "generator + first client use": (
+        "import packages.Instructor.summary_generator; "
+        "from packages.Instructor.client import get_client; get_client()"
+    ),
+}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int]]:
+    """
+    Return (module, cumulative microseconds) for top-level imports.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Nested imports are indented under their parent
+        if name.startswith(" ") and not name.startswith("  "):
+            modules.append((name.strip(), int(cumulative)))
+    return modules
+
+
+def measure(code: str, runs: int = 5) -> Tuple[float, List[Tuple[str, int]]]:
+    """
+    Return the best total top-level import time in ms, and the module breakdown of that run.
+    """
+    best_total, best_modules = float("inf"), []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", SETUP + code],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        modules = parse_importtime(result.stderr)
+        total = sum(cumulative for _, cumulative in modules) / 1000
+        if total < best_total:
+            best_total, best_modules = total, modules
+    return best_total, best_modules
+
+
+def main(top: int = 5) -> Dict[str, float]:
+    results = {}
+    for label, code in SCENARIOS.items():
+        total, modules = measure(code)
+        results[label] = total
+        print(f"{label:<34} {total:9.1f} ms")
+        for name, cumulative in sorted(modules, key=lambda m: -m[1])[:top]:
+            print(f"    {name:<30} {cumulative / 1000:9.1f} ms")
+
+    # The generators used to pay the eager SDK and client cost on top of their own imports
+    saving = results["eager openai + instructor client"] - results["django settings only"]
+    print(f"\nStartup saving per process when no summary is generated: {saving:.1f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# apps/insights/services/openai/key_metrics.py
+
+from typing import List, Mapping, Sequence
+
+import numpy as np
+
+from .schemas import METRIC_NAMES, KeyMetric, KeyMetricComparison, SummaryOutput
+
+# Daily columns expected in the raw weekly data, one value per day
+WEEKLY_COLUMNS = (
+    "sessions",
+    "users",
+    "new_users",
+    "pageviews",
+    "avg_session_duration",  # seconds
+    "bounce_rate",  # percent
+    "transactions",
+    "revenue",
+)
+
+METRIC_DECIMALS = 2
+
+
+def _column(data: Mapping[str, Sequence[float]], name: str) -> np.ndarray:
+    try:
+        return np.asarray(data[name], dtype=np.float64)
+    except KeyError:
+        raise ValueError(f"Weekly data is missing the '{name}' column.") from None
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator else 0.0
+
+
+def compute_key_metrics(data: Mapping[str, Sequence[float]]) -> np.ndarray:
+    """
+    Compute the key metrics from raw daily data (a dict of columns or a DataFrame).
+    Returns a float64 vector in METRIC_NAMES order.
+    """
+    sessions = _column(data, "sessions")
+    users = _column(data, "users")
+    new_users = _column(data, "new_users")
+    pageviews = _column(data, "pageviews")
+    duration = _column(data, "avg_session_duration")
+    bounce_rate = _column(data, "bounce_rate")
+    transactions = _column(data, "transactions")
+    revenue = _column(data, "revenue")
+
+    if not len(sessions):
+        raise ValueError("Weekly data contains no rows.")
+
+    total_sessions = sessions.sum()
+    # Per-day rates are weighted by that day's sessions
+    weights = sessions if total_sessions else None
+
+    values = np.array(
+        [
+            sessions.mean(),
+            users.mean(),
+            new_users.mean(),
+            pageviews.mean(),
+            _ratio(pageviews.sum(), total_sessions),
+            np.average(duration, weights=weights),
+            np.average(bounce_rate, weights=weights),
+            _ratio(transactions.sum(), total_sessions) * 100,
+            transactions.mean(),
+            revenue.mean(),
+        ],
+        dtype=np.float64,
+    )
+    return np.round(values, METRIC_DECIMALS)
+
+
+def to_key_metrics(values: np.ndarray) -> List[KeyMetric]:
+    return [
+        KeyMetric(name=name, value=float(value))
+        for name, value in zip(METRIC_NAMES, values)
+    ]
+
+
+def from_summary(summary: SummaryOutput) -> np.ndarray:
+    """
+    Recover the ordered metric vector from a stored SummaryOutput.
+    """
+    return summary.to_vector()
+
+
+def to_key_metric_comparisons(
+    current: np.ndarray, previous: np.ndarray, descriptions: Sequence[str]
+) -> List[KeyMetricComparison]:
+    return [
+        KeyMetricComparison(
+            name=name,
+            value1=float(value1),
+            value2=float(value2),
+            description=description,
+        )
+        for name, value1, value2, description in zip(
+            METRIC_NAMES, current, previous, descriptions
+        )
+    ]
+
+
+def format_metrics(values: np.ndarray) -> str:
+    """
+    Render metrics as compact prompt lines, e.g. "- Average Sessions: 1,234.5".
+    """
+    return "\n".join(
+        f"- {name}: {value:,.{METRIC_DECIMALS}f}"
+        for name, value in zip(METRIC_NAMES, values)
+    )
+
+
+def format_metric_changes(current: np.ndarray, previous: np.ndarray) -> str:
+    """
+    Render both weeks and the relative change per metric as compact prompt lines.
+    """
+    lines = []
+    for name, value1, value2 in zip(METRIC_NAMES, current, previous):
+        change = f"{(value1 - value2) / value2:+.1%}" if value2 else "n/a"
+        lines.append(
+            f"- {name}: {value1:,.{METRIC_DECIMALS}f} this week, "
+            f"{value2:,.{METRIC_DECIMALS}f} the previous week ({change})"
+        )
+    return "\n".join(lines)
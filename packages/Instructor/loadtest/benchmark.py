@@ -0,0 +1,196 @@
+# Offline load test for generate_summary / generate_comparison.
+#
+# Starts the fake OpenAI server in-process, points the shared client at it and
+# drives the generators at several concurrency levels, reporting throughput,
+# latency percentiles and retry overhead. Run from the repository root:
+#
+#   python -m packages.Instructor.loadtest.benchmark --requests 200 --concurrency 1 8 32
+
+import argparse
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Sequence
+
+from django.conf import settings
+
+from .fake_openai import FakeConfig, base_url, start_server
+
+
+@dataclass
+class RunReport:
+    target: str
+    driver: str
+    concurrency: int
+    calls: int
+    failures: int
+    seconds: float
+    latencies: List[float]
+    server_requests: int
+
+    @property
+    def throughput(self) -> float:
+        return self.calls / self.seconds if self.seconds else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    @property
+    def retry_overhead(self) -> float:
+        # Extra upstream requests per logical call (429s, 500s and validation re-asks)
+        return self.server_requests / self.calls - 1 if self.calls else 0.0
+
+    def row(self) -> str:
+        return (
+            f"{self.target:<11} {self.driver:<7} {self.concurrency:>5} "
+            f"{self.throughput:>9.2f} {self.percentile(0.5):>7.2f} "
+            f"{self.percentile(0.95):>7.2f} {self.percentile(0.99):>7.2f} "
+            f"{self.retry_overhead:>8.1%} {self.failures:>6}"
+        )
+
+
+HEADER = (
+    f"{'target':<11} {'driver':<7} {'conc':>5} {'calls/s':>9} {'p50':>7} "
+    f"{'p95':>7} {'p99':>7} {'retries':>8} {'failed':>6}"
+)
+
+
+def configure(url: str, retry_attempts: int) -> None:
+    if not settings.configured:
+        settings.configure(
+            OPENAI_API_KEY="sk-fake",
+            OPENAI_BASE_URL=url,
+            OPENAI_RETRY_ATTEMPTS=retry_attempts,
+            OPENAI_RETRY_WAIT_MULTIPLIER=0.5,
+            OPENAI_RETRY_WAIT_MIN=0,
+            OPENAI_RETRY_WAIT_MAX=5,
+            OPENAI_METRICS_ENABLED=True,
+        )
+
+
+def _unique_prompts(count: int) -> List[str]:
+    # Unique inputs so the response cache does not short-circuit the calls
+    return [f"Weekly statistics for property {uuid.uuid4()}" for _ in range(count)]
+
+
+def _timed(func: Callable, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def run_threads(target: Callable, inputs: Sequence, concurrency: int):
+    latencies, failures = [], 0
+
+    def call(args):
+        return _timed(target, *args)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(call, args) for args in inputs]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception:
+                failures += 1
+    return latencies, failures
+
+
+def run_async(target: Callable, inputs: Sequence, concurrency: int):
+    from ..concurrency import run_many
+
+    async def call(args):
+        started = time.perf_counter()
+        await target(*args)
+        return time.perf_counter() - started
+
+    results = asyncio.run(run_many(call, inputs, concurrency))
+    return [r.value for r in results if r.ok], sum(1 for r in results if not r.ok)
+
+
+def benchmark(
+    server, target_name: str, driver: str, concurrency: int, requests: int
+) -> RunReport:
+    from .. import comparison_generator, summary_generator
+
+    prompts = _unique_prompts(requests)
+    if target_name == "summary":
+        inputs = [(prompt,) for prompt in prompts]
+        target = (
+            summary_generator.generate_summary
+            if driver == "threads"
+            else summary_generator.agenerate_summary
+        )
+    else:
+        inputs = [(prompt, prompt[::-1]) for prompt in prompts]
+        target = (
+            comparison_generator.generate_comparison
+            if driver == "threads"
+            else comparison_generator.agenerate_comparison
+        )
+
+    before = server.stats.snapshot()["requests"]
+    started = time.perf_counter()
+    runner = run_threads if driver == "threads" else run_async
+    latencies, failures = runner(target, inputs, concurrency)
+    elapsed = time.perf_counter() - started
+    return RunReport(
+        target=target_name,
+        driver=driver,
+        concurrency=concurrency,
+        calls=requests,
+        failures=failures,
+        seconds=elapsed,
+        latencies=latencies,
+        server_requests=server.stats.snapshot()["requests"] - before,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline generator load test")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--targets", nargs="+", default=["summary", "comparison"])
+    parser.add_argument("--drivers", nargs="+", default=["threads", "async"])
+    parser.add_argument("--latency-median", type=float, default=0.2)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--throttle-rate", type=float, default=0.02)
+    parser.add_argument("--rpm", type=int, default=None)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--retry-attempts", type=int, default=5)
+    args = parser.parse_args()
+
+    server = start_server(
+        FakeConfig(
+            latency_median=args.latency_median,
+            latency_sigma=args.latency_sigma,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            requests_per_minute=args.rpm,
+            retry_after=args.retry_after,
+        )
+    )
+    configure(base_url(server), args.retry_attempts)
+
+    print(HEADER)
+    for target_name in args.targets:
+        for driver in args.drivers:
+            for concurrency in args.concurrency:
+                report = benchmark(
+                    server, target_name, driver, concurrency, args.requests
+                )
+                print(report.row())
+
+    from ..observability import render_prometheus
+
+    print("\n" + render_prometheus())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# Local stand-in for the OpenAI chat-completions API, for offline load tests.
+#
+# Answers tool calls (Instructor's default TOOLS mode) and json_schema response
+# formats with payloads generated from the requested schema, so SummaryOutput,
+# ComparisonOutput and the narrative models all validate. Latency, error rate and
+# 429s are configurable. Streaming is not supported.
+#
+#   python -m packages.Instructor.loadtest.fake_openai --port 8765 --latency-median 1.5
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from ..schemas import METRIC_NAMES
+
+
+@dataclass
+class FakeConfig:
+    latency_median: float = 1.0  # seconds
+    latency_sigma: float = 0.5  # log-normal shape; 0 gives a fixed latency
+    error_rate: float = 0.0  # fraction of requests answered with a 500
+    throttle_rate: float = 0.0  # fraction of requests answered with a 429
+    requests_per_minute: Optional[int] = None  # hard limit enforced with 429s
+    retry_after: float = 1.0
+
+
+@dataclass
+class FakeStats:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    requests: int = 0
+    ok: int = 0
+    errors: int = 0
+    throttled: int = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "ok": self.ok,
+                "errors": self.errors,
+                "throttled": self.throttled,
+            }
+
+
+def fake_value(schema: Dict[str, Any], defs: Dict[str, Any], index: int = 0) -> Any:
+    """
+    Build a value that validates against a (pydantic-generated) JSON schema.
+    Arrays get one item per key metric; "name" fields get the metric names.
+    """
+    if "$ref" in schema:
+        return fake_value(defs[schema["$ref"].split("/")[-1]], defs, index)
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            options = [s for s in schema[combinator] if s.get("type") != "null"]
+            return fake_value(options[0], defs, index)
+
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            name: (
+                METRIC_NAMES[index % len(METRIC_NAMES)]
+                if name == "name"
+                else fake_value(prop, defs, index)
+            )
+            for name, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [fake_value(schema["items"], defs, i) for i in range(len(METRIC_NAMES))]
+    if kind == "number":
+        return round(random.uniform(0, 10_000), 2)
+    if kind == "integer":
+        return random.randint(0, 10_000)
+    if kind == "boolean":
+        return random.random() < 0.5
+    return "This week traffic rose while the bounce rate held steady at 41.2%."
+
+
+class _RequestWindow:
+    """
+    Sliding one-minute window used to enforce `requests_per_minute`.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.times = []
+
+    def admit(self, limit: int) -> Optional[int]:
+        # Requests left in the window after this one, or None when it is refused
+        now = time.monotonic()
+        with self.lock:
+            self.times = [t for t in self.times if now - t < 60]
+            if len(self.times) >= limit:
+                return None
+            self.times.append(now)
+            return limit - len(self.times)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    config: FakeConfig
+    stats: FakeStats
+    window: _RequestWindow
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(
+        self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None
+    ):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send(200, self.stats.snapshot())
+        else:
+            self._send(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "Not found"}})
+            return
+
+        config = self.config
+        with self.stats.lock:
+            self.stats.requests += 1
+
+        remaining, refused = None, False
+        if config.requests_per_minute:
+            remaining = self.window.admit(config.requests_per_minute)
+            refused = remaining is None
+        if refused or random.random() < config.throttle_rate:
+            with self.stats.lock:
+                self.stats.throttled += 1
+            self._send(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests"}},
+                {
+                    "retry-after": f"{config.retry_after:g}",
+                    **self._limit_headers(0),
+                },
+            )
+            return
+
+        latency = config.latency_median * (
+            random.lognormvariate(0, config.latency_sigma) if config.latency_sigma else 1
+        )
+        time.sleep(latency)
+
+        if random.random() < config.error_rate:
+            with self.stats.lock:
+                self.stats.errors += 1
+            self._send(500, {"error": {"message": "Internal server error"}})
+            return
+
+        with self.stats.lock:
+            self.stats.ok += 1
+        self._send(200, self._completion(request), self._limit_headers(remaining))
+
+    def _limit_headers(self, remaining: Optional[int]) -> Dict[str, str]:
+        limit = self.config.requests_per_minute
+        if not limit:
+            return {}
+        return {
+            "x-ratelimit-limit-requests": str(limit),
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": "60s",
+        }
+
+    def _completion(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        message: Dict[str, Any] = {"role": "assistant", "content": None}
+        tools = request.get("tools") or []
+        response_format = request.get("response_format") or {}
+        if tools:
+            function = tools[0]["function"]
+            schema = function["parameters"]
+            arguments = fake_value(schema, schema.get("$defs", {}))
+            message["tool_calls"] = [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:24]}",
+                    "type": "function",
+                    "function": {
+                        "name": function["name"],
+                        "arguments": json.dumps(arguments),
+                    },
+                }
+            ]
+            finish_reason = "tool_calls"
+        elif response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            message["content"] = json.dumps(fake_value(schema, schema.get("$defs", {})))
+            finish_reason = "stop"
+        else:
+            message["content"] = "OK"
+            finish_reason = "stop"
+
+        messages = request.get("messages", [])
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [
+                {"index": 0, "message": message, "finish_reason": finish_reason}
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": 400,
+                "total_tokens": prompt_tokens + 400,
+            },
+        }
+
+
+def start_server(
+    config: Optional[FakeConfig] = None, host: str = "127.0.0.1", port: int = 0
+) -> ThreadingHTTPServer:
+    """
+    Start the fake server on a background thread. Use `server.server_address`
+    for the bound port and `server.stats` for request counters.
+    """
+    handler = type(
+        "ConfiguredFakeOpenAIHandler",
+        (FakeOpenAIHandler,),
+        {
+            "config": config or FakeConfig(),
+            "stats": FakeStats(),
+            "window": _RequestWindow(),
+        },
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.stats = handler.stats
+    server.config = handler.config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-median", type=float, default=1.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=None)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+
+    config = FakeConfig(
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        requests_per_minute=args.rpm,
+        retry_after=args.retry_after,
+    )
+    server = start_server(config, args.host, args.port)
+    print(f"Fake OpenAI server listening on {base_url(server)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# apps/insights/services/openai/observability.py
+
+import contextlib
+import contextvars
+import logging
+import time
+from typing import Callable, Iterator, Optional
+
+from django.conf import settings
+
+from packages.metrics import (
+    CallbackCounter,
+    Counter,
+    Histogram,
+    registry,
+    render_prometheus,
+)
+
+# Instrumentation is off unless settings.OPENAI_METRICS_ENABLED is set. When off,
+# every helper below returns after a single boolean check.
+
+# Schema of the call in progress, read by the Instructor hooks
+current_schema: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_schema", default="unknown"
+)
+
+call_latency = registry.register(
+    Histogram(
+        "openai_call_duration_seconds",
+        "Latency of call_openai_api including retries.",
+        labels=("schema", "outcome"),
+    )
+)
+retries = registry.register(
+    Counter("openai_call_retries_total", "Retried OpenAI API attempts.", ("schema",))
+)
+validation_failures = registry.register(
+    Counter(
+        "openai_validation_failures_total",
+        "Responses that failed response_model validation.",
+        ("schema",),
+    )
+)
+tokens = registry.register(
+    Counter("openai_tokens_total", "Tokens used by OpenAI calls.", ("schema", "kind"))
+)
+repairs = registry.register(
+    Counter(
+        "openai_repairs_total",
+        "Responses that failed validation, by how they were resolved "
+        "(repaired locally, re-asked or failed).",
+        ("schema", "outcome"),
+    )
+)
+hedges = registry.register(
+    Counter(
+        "openai_hedged_requests_total",
+        "Hedged requests sent, by which request returned first.",
+        ("schema", "winner"),
+    )
+)
+
+
+def _cache_stat(name: str) -> Callable[[], float]:
+    def read() -> float:
+        from .cache import get_response_cache
+
+        return get_response_cache().stats[name]
+
+    return read
+
+
+registry.register(
+    CallbackCounter("openai_cache_hits_total", "Response cache hits.", _cache_stat("hits"))
+)
+registry.register(
+    CallbackCounter(
+        "openai_cache_misses_total", "Response cache misses.", _cache_stat("misses")
+    )
+)
+
+_enabled: Optional[bool] = None
+
+
+def enabled() -> bool:
+    global _enabled
+    if _enabled is None:
+        _enabled = bool(getattr(settings, "OPENAI_METRICS_ENABLED", False))
+    return _enabled
+
+
+def set_enabled(value: bool) -> None:
+    global _enabled
+    _enabled = value
+
+
+_tracer = None
+_tracer_loaded = False
+
+
+def get_tracer():
+    """
+    Return an OpenTelemetry tracer when settings.OPENAI_TRACING_ENABLED is set and
+    opentelemetry is installed, otherwise None.
+    """
+    global _tracer, _tracer_loaded
+    if not _tracer_loaded:
+        _tracer_loaded = True
+        if getattr(settings, "OPENAI_TRACING_ENABLED", False):
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                logging.warning(
+                    "OPENAI_TRACING_ENABLED is set but opentelemetry is not installed."
+                )
+            else:
+                _tracer = trace.get_tracer(__name__)
+    return _tracer
+
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+@contextlib.contextmanager
+def _observed_call(schema: str, tracer) -> Iterator[None]:
+    token = current_schema.set(schema)
+    started = time.perf_counter()
+    outcome = "error"
+    span = (
+        tracer.start_as_current_span(
+            "call_openai_api", attributes={"openai.schema": schema}
+        )
+        if tracer
+        else _NULL_CONTEXT
+    )
+    try:
+        with span:
+            yield
+        outcome = "success"
+    finally:
+        if enabled():
+            call_latency.observe(time.perf_counter() - started, schema, outcome)
+        current_schema.reset(token)
+
+
+def observe_call(schema: str):
+    """
+    Context manager timing and tracing one call_openai_api invocation.
+    """
+    tracer = get_tracer()
+    if not enabled() and tracer is None:
+        return _NULL_CONTEXT
+    return _observed_call(schema, tracer)
+
+
+def record_attempt(schema: str, attempt_number: int) -> None:
+    if enabled() and attempt_number > 1:
+        retries.inc(schema)
+
+
+def record_repair(schema: str, outcome: str) -> None:
+    if enabled():
+        repairs.inc(schema, outcome)
+
+
+def record_hedge(winner: str) -> None:
+    if enabled():
+        hedges.inc(current_schema.get(), winner)
+
+
+def record_usage(response) -> None:
+    # Token usage of a raw completion (Instructor's hooks only see validated calls)
+    if not enabled():
+        return
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        schema = current_schema.get()
+        tokens.inc(schema, "prompt", amount=usage.prompt_tokens or 0)
+        tokens.inc(schema, "completion", amount=usage.completion_tokens or 0)
+
+
+def record_validation_failure() -> None:
+    if enabled():
+        validation_failures.inc(current_schema.get())
+
+
+def _on_completion(response) -> None:
+    record_usage(response)
+
+
+def _on_parse_error(error) -> None:
+    record_validation_failure()
+
+
+def install_hooks(client) -> None:
+    """
+    Attach usage and validation-failure hooks to an Instructor client.
+    """
+    client.on("completion:response", _on_completion)
+    client.on("parse:error", _on_parse_error)
+
+
+def metrics_view(request):
+    """
+    Django view serving every package's metrics in Prometheus text format.
+    """
+    from django.http import HttpResponse
+
+    return HttpResponse(
+        render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,101 @@
+# apps/insights/services/openai/pipeline.py
+
+import logging
+from functools import partial
+from typing import Mapping, MutableMapping, Sequence
+
+from .cache import get_response_cache
+from .comparison_generator import generate_comparison_from_metrics
+from .key_metrics import (
+    compute_key_metrics,
+    format_metric_changes,
+    from_summary,
+    to_key_metric_comparisons,
+    to_key_metrics,
+)
+from .prompts import WEEKLY_PROMPT, BuiltPrompt
+from .schemas import ComparisonOutput, SummaryOutput, WeeklyInsights, WeeklyNarrative
+from .summary_generator import (
+    OPENAI_MODEL,
+    call_openai_api,
+    generate_summary_from_data,
+)
+
+
+def build_weekly_prompt(metric_changes: str) -> BuiltPrompt:
+    return WEEKLY_PROMPT.build(metric_changes=metric_changes)
+
+
+def generate_weekly_insights(
+    current_data: Mapping[str, Sequence[float]], previous_summary: SummaryOutput
+) -> WeeklyInsights:
+    """
+    Summarize the current week and compare it with the stored previous week in a
+    single round trip. The previous week is never re-summarized.
+    """
+    current = compute_key_metrics(current_data)
+    previous = from_summary(previous_summary)
+    prompt = build_weekly_prompt(format_metric_changes(current, previous))
+    try:
+        logging.info("Requesting weekly summary and comparison from OpenAI...")
+
+        # Cached, retry-enabled API call
+        narrative = get_response_cache().get_or_call(
+            prompt,
+            OPENAI_MODEL,
+            WeeklyNarrative,
+            partial(call_openai_api, response_model=WeeklyNarrative),
+        )
+
+        logging.info("Successfully received structured response.")
+        return WeeklyInsights(
+            summary=SummaryOutput(
+                dataset_summary=narrative.dataset_summary,
+                key_metrics=to_key_metrics(current),
+            ),
+            comparison=ComparisonOutput(
+                comparison_summary=narrative.comparison_summary,
+                key_metrics_comparison=to_key_metric_comparisons(
+                    current, previous, narrative.metric_descriptions
+                ),
+            ),
+        )
+
+    except Exception as e:
+        logging.error(f"Error generating weekly insights: {e}")
+        raise ValueError("Failed to generate weekly insights using OpenAI.") from e
+
+
+def run_week(
+    summaries: MutableMapping[str, SummaryOutput],
+    week: str,
+    previous_week: str,
+    current_data: Mapping[str, Sequence[float]],
+) -> WeeklyInsights:
+    """
+    Produce this week's insights using stored summaries keyed by week.
+
+    - Neither week stored: summarize this week only (no comparison is possible).
+    - Only the previous week stored: one combined summary + comparison call.
+    - Both weeks stored: one comparison call from the stored metrics.
+
+    A newly generated summary for `week` is written back to `summaries`.
+    """
+    current_summary = summaries.get(week)
+    previous_summary = summaries.get(previous_week)
+
+    if previous_summary is None:
+        logging.info(f"No stored summary for {previous_week}; skipping comparison.")
+        if current_summary is None:
+            current_summary = summaries[week] = generate_summary_from_data(current_data)
+        return WeeklyInsights(summary=current_summary)
+
+    if current_summary is None:
+        insights = generate_weekly_insights(current_data, previous_summary)
+        summaries[week] = insights.summary
+        return insights
+
+    comparison = generate_comparison_from_metrics(
+        from_summary(current_summary), from_summary(previous_summary)
+    )
+    return WeeklyInsights(summary=current_summary, comparison=comparison)
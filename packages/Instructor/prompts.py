@@ -0,0 +1,302 @@
+# apps/insights/services/openai/prompts.py
+
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from .schemas import METRIC_NAMES
+
+# Prompts are sent as a static system message followed by a user message with the
+# variable data. Keeping the long instruction block first and byte-identical across
+# calls makes it a stable prefix that provider-side prompt caching can reuse.
+
+DEFAULT_TOKEN_BUDGET = 12_000
+TOKENIZER_MODEL = "gpt-4o"
+TRUNCATION_MARKER = "\n[... truncated ...]"
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = TOKENIZER_MODEL) -> int:
+    """
+    Count tokens with tiktoken when installed, otherwise estimate ~4 characters per token.
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // 4)
+    return len(encoding.encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str = TOKENIZER_MODEL) -> str:
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    max_tokens = max(max_tokens - count_tokens(TRUNCATION_MARKER, model), 0)
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[: max_tokens * 4] + TRUNCATION_MARKER
+    return encoding.decode(encoding.encode(text)[:max_tokens]) + TRUNCATION_MARKER
+
+
+def compact(text: str) -> str:
+    """
+    Drop redundant whitespace: runs of spaces, trailing spaces and repeated blank lines.
+    """
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def default_token_budget() -> int:
+    return getattr(settings, "OPENAI_PROMPT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET)
+
+
+@dataclass
+class BuiltPrompt:
+    name: str
+    system: str
+    user: str
+    static_tokens: int
+    variable_tokens: int
+    truncated: bool = False
+
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.user},
+        ]
+
+    @property
+    def total_tokens(self) -> int:
+        return self.static_tokens + self.variable_tokens
+
+    def __str__(self) -> str:
+        # Used as the response cache key
+        return f"{self.system}\n\n{self.user}"
+
+
+class PromptTemplate:
+    """
+    A static instruction block plus a small template for the variable data.
+    The static part is tokenized once and reused for every call.
+    """
+
+    def __init__(self, name: str, instructions: str, data_template: str):
+        self.name = name
+        self.instructions = instructions.strip()
+        self.data_template = data_template.strip()
+        self._static_tokens: Optional[int] = None
+
+    @property
+    def static_tokens(self) -> int:
+        if self._static_tokens is None:
+            self._static_tokens = count_tokens(self.instructions)
+        return self._static_tokens
+
+    def _fit(self, fields: Dict[str, str], budget: int) -> Tuple[Dict[str, str], bool]:
+        fields = {name: compact(value) for name, value in fields.items()}
+        sizes = {name: count_tokens(value) for name, value in fields.items()}
+        remaining = budget - count_tokens(self.data_template.format(**{n: "" for n in fields}))
+        if sum(sizes.values()) <= remaining:
+            return fields, False
+
+        # Give the smallest fields their full size first, then share what is left
+        truncated = False
+        pending = sorted(fields, key=sizes.get)
+        while pending:
+            name = pending.pop(0)
+            share = max(remaining // (len(pending) + 1), 0)
+            if sizes[name] > share:
+                fields[name] = truncate_tokens(fields[name], share)
+                truncated = True
+            remaining -= min(sizes[name], share)
+        return fields, truncated
+
+    def build(self, token_budget: Optional[int] = None, **fields: str) -> BuiltPrompt:
+        """
+        Fill in the variable data, compacting and trimming it to `token_budget` tokens.
+        """
+        budget = token_budget or default_token_budget()
+        fields, truncated = self._fit(fields, budget)
+        user = self.data_template.format(**fields)
+        prompt = BuiltPrompt(
+            name=self.name,
+            system=self.instructions,
+            user=user,
+            static_tokens=self.static_tokens,
+            variable_tokens=count_tokens(user),
+            truncated=truncated,
+        )
+        if truncated:
+            logging.warning(
+                f"Trimmed {self.name} prompt data to a {budget}-token budget."
+            )
+        logging.info(
+            f"Prompt {self.name}: {prompt.static_tokens} static + "
+            f"{prompt.variable_tokens} variable tokens."
+        )
+        return prompt
+
+
+def as_messages(prompt) -> List[Dict[str, str]]:
+    if isinstance(prompt, BuiltPrompt):
+        return prompt.messages
+    return [{"role": "user", "content": prompt}]
+
+
+ORDERED_METRICS_INSTRUCTION = "\n".join(f'    - "{name}"' for name in METRIC_NAMES)
+
+SUMMARY_PROMPT = PromptTemplate(
+    "summary",
+    f"""
+You are a data analyst tasked with summarizing a dataset. The user message contains a statistical summary of the dataset.
+
+Please provide the summary in the following JSON format:
+
+{{
+    "dataset_summary": "A concise, insightful summary highlighting significant findings, trends, or patterns observed in the data. Mention any notable data or anomalies in the key metrics, providing context by referencing the actual values and what they indicate about user behavior or performance metrics.
+    Ensure that:
+        - Commas are used in numerical values to separate thousands in the summary.",
+    "key_metrics": [
+        {{
+            "name": "Name of Metric",
+            "value": Numeric value
+        }}
+        // Repeat for each key metric
+    ]
+}}
+
+Ensure that:
+- All numeric values are provided as numbers (not strings).
+- The key_metrics include the following metrics in this order:
+{ORDERED_METRICS_INSTRUCTION}
+- Do not include descriptions for the key metrics.
+- Focus on delivering specific insights derived from the data.
+- Avoid generic statements or repeating information without analysis.
+""",
+    """
+The following is a statistical summary of the dataset:
+
+{statistical_summary}
+""",
+)
+
+COMPARISON_PROMPT = PromptTemplate(
+    "comparison",
+    f"""
+You are a data analyst tasked with comparing two dataset summaries. The user message contains the summary of the current week and the summary of the week prior.
+
+Please provide the comparison in the following JSON format:
+
+{{
+    "comparison_summary": "A comprehensive summary of differences and similarities between the current week and previous week, including notable trends and observations.
+    Ensure that:
+        - Maximum length is 180 words.
+        - Refer to the summaries as 'this week' and 'the previous week' in your summary.
+        - Use precise verbal descriptions to describe the observed differences or trends between the current week and the previous week data in your summary.
+        - Mention up to three salient numerical values in your summary.
+        - Commas should be used in numerical values to separate thousands in your summary.",
+    "key_metrics_comparison": [
+        {{
+            "name": "Name of Metric",
+            "value1": Value from current week,
+            "value2": Value from previous week,
+            "description": "Description of observed difference or trend between the previous week and the current week, including specific figures and percentages where appropriate."
+        }}
+        // Repeat for each key metric
+    ]
+}}
+
+Ensure that:
+- Numerical values for value1 and value2 are provided as numbers (not strings) for each metric.
+- The key_metrics_comparison includes the following metrics in this order:
+{ORDERED_METRICS_INSTRUCTION}
+- The description for each metric explains the difference or trend observed between the current week and one week prior, using precise figures (e.g., differences, statistics, percentages).
+- Refer to the summaries as "this week" and "the previous week" in your descriptions.
+""",
+    """
+The current week:
+
+{summary1}
+
+The week prior:
+
+{summary2}
+""",
+)
+
+SUMMARY_NARRATIVE_PROMPT = PromptTemplate(
+    "summary_narrative",
+    """
+You are a data analyst tasked with summarizing a week of website analytics. The user message lists the key metrics for the week.
+
+Write "dataset_summary": a concise, insightful summary highlighting significant findings, trends, or patterns in these metrics, referencing the actual values and what they indicate about user behavior or performance.
+
+Ensure that:
+- Commas are used in numerical values to separate thousands in the summary.
+- Focus on delivering specific insights derived from the data.
+- Avoid generic statements or repeating information without analysis.
+""",
+    """
+Key metrics for the week:
+
+{metrics}
+""",
+)
+
+COMPARISON_NARRATIVE_PROMPT = PromptTemplate(
+    "comparison_narrative",
+    """
+You are a data analyst tasked with comparing two weeks of website analytics. The user message lists the key metrics for this week and the previous week.
+
+Provide:
+- "comparison_summary": a comprehensive summary of differences and similarities between this week and the previous week, including notable trends and observations.
+- "metric_descriptions": one description per metric, in the order given, explaining the difference or trend using precise figures (e.g., differences, percentages).
+
+Ensure that:
+- The comparison_summary is at most 180 words and mentions up to three salient numerical values.
+- Refer to the weeks as "this week" and "the previous week".
+- Commas are used in numerical values to separate thousands.
+""",
+    """
+Key metrics:
+
+{metric_changes}
+""",
+)
+
+WEEKLY_PROMPT = PromptTemplate(
+    "weekly",
+    """
+You are a data analyst reporting on a week of website analytics and comparing it with the week before. The user message lists the key metrics for this week and the previous week.
+
+Provide:
+- "dataset_summary": a concise, insightful summary of this week alone, highlighting significant findings, trends, or patterns and referencing the actual values.
+- "comparison_summary": a comprehensive summary of differences and similarities between this week and the previous week, including notable trends and observations.
+- "metric_descriptions": one description per metric, in the order given, explaining the difference or trend using precise figures (e.g., differences, percentages).
+
+Ensure that:
+- The comparison_summary is at most 180 words and mentions up to three salient numerical values.
+- Refer to the weeks as "this week" and "the previous week".
+- Commas are used in numerical values to separate thousands.
+""",
+    """
+Key metrics:
+
+{metric_changes}
+""",
+)
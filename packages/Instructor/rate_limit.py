@@ -0,0 +1,239 @@
+# apps/insights/services/openai/rate_limit.py
+
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from typing import Mapping, Optional
+
+from django.conf import settings
+
+DEFAULT_COMPLETION_TOKENS = 1000
+
+# Fraction of the advertised limit we aim for, leaving headroom for other clients
+TARGET_UTILIZATION = 0.9
+
+# Multiplicative slow-down applied on every 429. It holds for BACKOFF_RECOVERY
+# seconds after the last 429; only then do rate-limit headers raise the rate again.
+BACKOFF_FACTOR = 0.5
+BACKOFF_RECOVERY = 60.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse OpenAI reset durations such as "20ms", "1s" or "6m0s" into seconds.
+    """
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    if "retry-after-ms" in headers:
+        return float(headers["retry-after-ms"]) / 1000
+    return parse_duration(headers.get("retry-after"))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`.
+    Callers reserve capacity up front and are told how long to wait, so sync and
+    async callers can share one bucket. A rate of None means unlimited.
+    """
+
+    def __init__(self, rate_per_minute: Optional[float]):
+        self.lock = threading.Lock()
+        self.rate_per_minute = rate_per_minute
+        self.tokens = rate_per_minute or 0.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.rate_per_minute:
+            elapsed = now - self.updated
+            self.tokens = min(
+                self.rate_per_minute, self.tokens + elapsed * self.rate_per_minute / 60
+            )
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take `amount` tokens and return the seconds to wait before using them.
+        """
+        with self.lock:
+            if not self.rate_per_minute:
+                return 0.0
+            now = time.monotonic()
+            self._refill(now)
+            # Allow the balance to go negative so later callers queue behind earlier ones
+            self.tokens -= min(amount, self.rate_per_minute)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens * 60 / self.rate_per_minute
+
+    def set_rate(self, rate_per_minute: float) -> None:
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.rate_per_minute is None:
+                self.tokens = rate_per_minute
+            self.rate_per_minute = rate_per_minute
+            self.tokens = min(self.tokens, rate_per_minute)
+
+    def sync_remaining(self, remaining: float) -> None:
+        # The server's view wins when it has less capacity left than we think
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, remaining)
+
+
+class RateLimiter:
+    """
+    Client-side limiter on requests per minute and tokens per minute.
+    Rates adapt to the x-ratelimit-* and Retry-After headers seen on responses.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        backoff_recovery: float = BACKOFF_RECOVERY,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.backoff_recovery = backoff_recovery
+        self.lock = threading.Lock()
+        self.paused_until = 0.0
+        self.backoff_until = 0.0
+        self.throttled = 0
+
+    @classmethod
+    def from_settings(cls) -> "RateLimiter":
+        return cls(
+            requests_per_minute=getattr(settings, "OPENAI_RPM_LIMIT", None),
+            tokens_per_minute=getattr(settings, "OPENAI_TPM_LIMIT", None),
+            backoff_recovery=getattr(
+                settings, "OPENAI_RATE_BACKOFF_RECOVERY", BACKOFF_RECOVERY
+            ),
+        )
+
+    def _delay(self, tokens: int) -> float:
+        with self.lock:
+            paused = max(self.paused_until - time.monotonic(), 0.0)
+        return max(paused, self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def acquire(self, tokens: int = 0) -> None:
+        delay = self._delay(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        delay = self._delay(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """
+        Adapt to the rate-limit headers of a response.
+        """
+        with self.lock:
+            backing_off = time.monotonic() < self.backoff_until
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            if limit:
+                target = float(limit) * TARGET_UTILIZATION
+                if backing_off and bucket.rate_per_minute:
+                    # Keep a 429's reduced rate until the recovery window ends
+                    target = min(target, bucket.rate_per_minute)
+                if status_code != 429 and bucket.rate_per_minute != target:
+                    bucket.set_rate(target)
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining:
+                bucket.sync_remaining(float(remaining))
+
+        if status_code == 429:
+            self.throttled += 1
+            for bucket in (self.requests, self.tokens):
+                if bucket.rate_per_minute:
+                    bucket.set_rate(bucket.rate_per_minute * BACKOFF_FACTOR)
+            with self.lock:
+                self.backoff_until = time.monotonic() + self.backoff_recovery
+            wait = retry_after(headers) or parse_duration(
+                headers.get("x-ratelimit-reset-requests")
+            )
+            if wait:
+                # Jitter so that workers resume at different times
+                wait *= 1 + random.random() * 0.25
+                with self.lock:
+                    self.paused_until = max(self.paused_until, time.monotonic() + wait)
+                logging.warning(f"Rate limited by OpenAI; pausing for {wait:.2f}s.")
+
+    # httpx event hooks, installed on the OpenAI clients by the client factory
+    def on_response(self, response) -> None:
+        self.observe(response.status_code, response.headers)
+
+    async def aon_response(self, response) -> None:
+        self.observe(response.status_code, response.headers)
+
+
+class wait_retry_after:
+    """
+    Tenacity wait strategy that honors Retry-After on rate-limit errors and
+    otherwise falls back to `fallback` (normally a jittered exponential wait).
+    """
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def __call__(self, retry_state) -> float:
+        fallback = self.fallback(retry_state)
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+        # Instructor may wrap the SDK error; look at the cause as well
+        response = getattr(error, "response", None) or getattr(
+            getattr(error, "__cause__", None), "response", None
+        )
+        if response is not None and getattr(response, "status_code", None) == 429:
+            wait = retry_after(response.headers)
+            if wait is not None:
+                return wait + random.uniform(0, min(fallback, wait) or 0.1)
+        return fallback
+
+
+def estimate_tokens(prompt) -> int:
+    """
+    Tokens a request is expected to consume: the prompt plus the expected completion.
+    """
+    from .prompts import BuiltPrompt, count_tokens
+
+    if isinstance(prompt, BuiltPrompt):
+        prompt_tokens = prompt.total_tokens
+    else:
+        prompt_tokens = count_tokens(str(prompt))
+    return prompt_tokens + getattr(
+        settings, "OPENAI_EXPECTED_COMPLETION_TOKENS", DEFAULT_COMPLETION_TOKENS
+    )
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Return the process-wide limiter shared by all sync and async clients.
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter.from_settings()
+    return _rate_limiter
@@ -0,0 +1,430 @@
+# apps/insights/services/openai/repair.py
+
+import copy
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generator,
+    Generic,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from pydantic import BaseModel, ValidationError, create_model
+
+from .schemas import METRIC_NAMES, ComparisonOutput, SummaryOutput
+
+# A response that fails validation is first repaired locally by per-field fixers.
+# Only the fields that still fail are re-asked, in a short message listing their
+# values and errors, instead of resending the whole conversation.
+
+M = TypeVar("M", bound=BaseModel)
+
+# A fixer returns the repaired value, or the value unchanged if it does not apply
+Fixer = Callable[[Any], Any]
+
+DEFAULT_MAX_REASKS = 2
+
+_THOUSANDS = re.compile(r"^[+-]?\d{1,3}(,\d{3})+(\.\d+)?$")
+_NUMBER = re.compile(r"^[+-]?\d+(\.\d+)?$")
+
+
+def strip_thousands_separators(value: Any) -> Any:
+    if isinstance(value, str) and _THOUSANDS.match(value.strip()):
+        return value.strip().replace(",", "")
+    return value
+
+
+def numeric_string(value: Any) -> Any:
+    """
+    Turn "1,234.5", "$12" or "41.2%" into a float.
+    """
+    if not isinstance(value, str):
+        return value
+    text = strip_thousands_separators(value.strip().lstrip("$").rstrip("%").strip())
+    return float(text) if _NUMBER.match(text) else value
+
+
+def upper_case(value: Any) -> Any:
+    return value.upper() if isinstance(value, str) else value
+
+
+def lower_case(value: Any) -> Any:
+    return value.lower() if isinstance(value, str) else value
+
+
+def title_case(value: Any) -> Any:
+    return value.title() if isinstance(value, str) else value
+
+
+def _normalize_name(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", name.casefold()).strip()
+
+
+@lru_cache(maxsize=None)
+def _metric_aliases() -> Dict[str, str]:
+    aliases = {}
+    for name in METRIC_NAMES:
+        aliases[_normalize_name(name)] = name
+        # "Sessions" for "Average Sessions"
+        if name.startswith("Average "):
+            aliases.setdefault(_normalize_name(name[len("Average ") :]), name)
+    return aliases
+
+
+def canonical_metric_name(value: Any) -> Any:
+    """
+    Map spelling variants such as "bounce rate" or "Avg. Sessions" to METRIC_NAMES.
+    """
+    if not isinstance(value, str):
+        return value
+    normalized = _normalize_name(value)
+    normalized = re.sub(r"^avg\b", "average", normalized)
+    return _metric_aliases().get(normalized, value)
+
+
+# Fixers applied to any field failing with one of these pydantic error types
+DEFAULT_TYPE_FIXERS: Mapping[str, Sequence[Fixer]] = {
+    "float_parsing": (numeric_string,),
+    "int_parsing": (numeric_string,),
+}
+
+
+def _get(data: Any, loc: Sequence) -> Any:
+    for part in loc:
+        data = data[part]
+    return data
+
+
+def _set(data: Any, loc: Sequence, value: Any) -> None:
+    _get(data, loc[:-1])[loc[-1]] = value
+
+
+@dataclass
+class RepairStats:
+    validated: int = 0  # responses that were valid as returned
+    repaired: int = 0  # invalid responses fixed locally, i.e. re-asks avoided
+    reasked: int = 0  # targeted re-asks sent
+    reasked_fields: int = 0
+    failed: int = 0
+
+
+@dataclass
+class RepairResult(Generic[M]):
+    value: Optional[M]  # None if the data is still invalid
+    errors: List[Dict[str, Any]]
+    data: Any  # the (partially) repaired data
+    changed: int = 0  # values changed by fixers
+
+
+class Repairer(Generic[M]):
+    """
+    Validates raw response data, fixing mechanical failures locally.
+    `fixers` maps dotted field paths to fixers tried in order; paths are fnmatch
+    patterns over the error location, e.g. "name" or "key_metrics.*.value".
+    `context` is passed to model validation.
+    """
+
+    def __init__(
+        self,
+        response_model: Type[M],
+        fixers: Optional[Mapping[str, Sequence[Fixer]]] = None,
+        type_fixers: Mapping[str, Sequence[Fixer]] = DEFAULT_TYPE_FIXERS,
+        context: Optional[Dict[str, Any]] = None,
+    ):
+        self.response_model = response_model
+        self.fixers = dict(fixers or {})
+        self.type_fixers = type_fixers
+        self.context = context
+        self.lock = threading.Lock()
+        self.stats = RepairStats()
+
+    def _fixers_for(self, error: Dict[str, Any]) -> List[Fixer]:
+        path = ".".join(str(part) for part in error["loc"])
+        fixers = [
+            fixer
+            for pattern, pattern_fixers in self.fixers.items()
+            if fnmatchcase(path, pattern)
+            for fixer in pattern_fixers
+        ]
+        return fixers + list(self.type_fixers.get(error["type"], ()))
+
+    def repair(self, data: Any, errors: Sequence[Dict[str, Any]]) -> Tuple[Any, int]:
+        """
+        Apply fixers at the locations of `errors`; return the data and the number of
+        values changed. The input data is not modified.
+        """
+        data = copy.deepcopy(data)
+        changed = 0
+        for error in errors:
+            loc = error["loc"]
+            if not loc:
+                continue
+            try:
+                value = _get(data, loc)
+            except (KeyError, IndexError, TypeError):
+                continue  # e.g. a missing field
+            fixed = value
+            for fixer in self._fixers_for(error):
+                fixed = fixer(fixed)
+            if fixed != value:
+                _set(data, loc, fixed)
+                changed += 1
+        return data, changed
+
+    def _validate(self, data: Any) -> M:
+        return self.response_model.model_validate(data, context=self.context)
+
+    def validate(self, data: Any) -> RepairResult[M]:
+        """
+        Validate `data`, repairing it locally if needed.
+        """
+        try:
+            value = self._validate(data)
+        except ValidationError as e:
+            errors = e.errors()
+        else:
+            with self.lock:
+                self.stats.validated += 1
+            return RepairResult(value, [], data)
+
+        repaired, changed = self.repair(data, errors)
+        if not changed:
+            return RepairResult(None, errors, data)
+        try:
+            value = self._validate(repaired)
+        except ValidationError as e:
+            return RepairResult(None, e.errors(), repaired, changed)
+        with self.lock:
+            self.stats.repaired += 1
+        logging.info(
+            f"Repaired {changed} field(s) of {self.response_model.__name__} locally."
+        )
+        return RepairResult(value, [], repaired, changed)
+
+
+def summary_repairer() -> Repairer[SummaryOutput]:
+    return Repairer(
+        SummaryOutput,
+        fixers={
+            "key_metrics.*.name": (canonical_metric_name,),
+            "key_metrics.*.value": (numeric_string,),
+        },
+        context={"canonical_metrics": True},
+    )
+
+
+def comparison_repairer() -> Repairer[ComparisonOutput]:
+    return Repairer(
+        ComparisonOutput,
+        fixers={
+            "key_metrics_comparison.*.name": (canonical_metric_name,),
+            "key_metrics_comparison.*.value[12]": (numeric_string,),
+        },
+        context={"canonical_metrics": True},
+    )
+
+
+@lru_cache(maxsize=None)
+def get_repairer(response_model: Type[M]) -> Repairer[M]:
+    """
+    The shared repairer the generators use for `response_model`.
+    """
+    if response_model is SummaryOutput:
+        return summary_repairer()
+    if response_model is ComparisonOutput:
+        return comparison_repairer()
+    return Repairer(response_model)
+
+
+@lru_cache(maxsize=None)
+def fields_model(response_model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    A model holding only `fields` of `response_model`, used to re-ask for them.
+    """
+    return create_model(
+        f"{response_model.__name__}Fields",
+        **{name: (response_model.model_fields[name].annotation, ...) for name in fields},
+    )
+
+
+def _error_text(error: Dict[str, Any]) -> str:
+    path = ".".join(str(part) for part in error["loc"]) or "(response)"
+    return f"- {path}: {error['msg']}"
+
+
+def targeted_reask_messages(
+    source: Optional[str],
+    data: Any,
+    errors: Sequence[Dict[str, Any]],
+    fields: Sequence[str],
+) -> List[Dict[str, str]]:
+    """
+    A short exchange asking only for `fields`, with their current values and errors.
+    `source` is the original request text, if the values depend on it.
+    """
+    current = {name: data.get(name) for name in fields} if isinstance(data, dict) else data
+    parts = [
+        "Your previous answer failed validation. Return corrected values for these fields only.",
+        f"Current values:\n{json.dumps(current, default=str)}",
+        "Errors:\n" + "\n".join(_error_text(error) for error in errors),
+    ]
+    if source:
+        parts.insert(0, f"Original request:\n{source}")
+    return [{"role": "user", "content": "\n\n".join(parts)}]
+
+
+def complete_json(
+    messages: List[Dict[str, str]], response_model: Type[BaseModel], model: str
+) -> Any:
+    """
+    Request `response_model` as strict JSON and return the parsed, unvalidated data.
+    Goes through the shared client, so the rate limiter sees the request and its
+    response headers, and retries are left to the caller's tenacity loop.
+    """
+    from .batch import response_format
+    from .client import get_client
+    from .observability import record_usage
+    from .rate_limit import estimate_tokens, get_rate_limiter
+
+    get_rate_limiter().acquire(estimate_tokens(json.dumps(messages)))
+    # Without a response_model Instructor returns the raw completion
+    completion = get_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        response_model=None,
+        response_format=response_format(response_model),
+    )
+    record_usage(completion)
+    return json.loads(completion.choices[0].message.content)
+
+
+async def acomplete_json(
+    messages: List[Dict[str, str]], response_model: Type[BaseModel], model: str
+) -> Any:
+    from .batch import response_format
+    from .client import get_async_client
+    from .observability import record_usage
+    from .rate_limit import estimate_tokens, get_rate_limiter
+
+    await get_rate_limiter().aacquire(estimate_tokens(json.dumps(messages)))
+    completion = await get_async_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        response_model=None,
+        response_format=response_format(response_model),
+    )
+    record_usage(completion)
+    return json.loads(completion.choices[0].message.content)
+
+
+def _source(messages: Sequence[Dict[str, str]]) -> Optional[str]:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return message.get("content")
+    return None
+
+
+# (messages, model to request) sent to a completion function, which returns raw data
+Request = Tuple[List[Dict[str, str]], Type[BaseModel]]
+
+
+def _repair_steps(
+    messages: List[Dict[str, str]], repairer: Repairer[M], max_reasks: int
+) -> Generator[Request, Any, M]:
+    # The repair loop without I/O: yields each request and is sent its data back,
+    # so that the sync and async entry points share it
+    from .observability import record_repair, record_validation_failure
+
+    response_model = repairer.response_model
+    schema = response_model.__name__
+    data = yield messages, response_model
+    reasks = 0
+    while True:
+        result = repairer.validate(data)
+        data, errors = result.data, result.errors
+        if result.value is None or result.changed:
+            record_validation_failure()
+        if result.value is not None:
+            if reasks:
+                record_repair(schema, "reasked")
+            elif result.changed:
+                record_repair(schema, "repaired")
+            return result.value
+        if reasks == max_reasks:
+            break
+
+        # Model-level errors have no field location; re-ask for every field then
+        fields = tuple(
+            sorted({error["loc"][0] for error in errors if error["loc"]})
+        ) or tuple(response_model.model_fields)
+        logging.warning(f"Re-asking for {schema} fields: {', '.join(fields)}")
+        with repairer.lock:
+            repairer.stats.reasked += 1
+            repairer.stats.reasked_fields += len(fields)
+        fix = yield (
+            targeted_reask_messages(_source(messages), data, errors, fields),
+            fields_model(response_model, fields),
+        )
+        data = {**data, **fix} if isinstance(data, dict) else fix
+        reasks += 1
+
+    with repairer.lock:
+        repairer.stats.failed += 1
+    record_repair(schema, "failed")
+    raise ValueError(
+        f"{schema} still invalid after {max_reasks} targeted re-asks: "
+        + "; ".join(_error_text(error)[2:] for error in errors)
+    )
+
+
+def create_with_repair(
+    messages: List[Dict[str, str]],
+    repairer: Repairer[M],
+    model: str,
+    max_reasks: int = DEFAULT_MAX_REASKS,
+    complete: Callable[[List[Dict[str, str]], Type[BaseModel], str], Any] = complete_json,
+) -> M:
+    """
+    Request `repairer.response_model`, repairing invalid responses locally and
+    re-asking only for the fields that still fail.
+    """
+    steps = _repair_steps(messages, repairer, max_reasks)
+    request = next(steps)
+    while True:
+        try:
+            request = steps.send(complete(*request, model))
+        except StopIteration as done:
+            return done.value
+
+
+async def acreate_with_repair(
+    messages: List[Dict[str, str]],
+    repairer: Repairer[M],
+    model: str,
+    max_reasks: int = DEFAULT_MAX_REASKS,
+    complete: Callable[
+        [List[Dict[str, str]], Type[BaseModel], str], Awaitable[Any]
+    ] = acomplete_json,
+) -> M:
+    steps = _repair_steps(messages, repairer, max_reasks)
+    request = next(steps)
+    while True:
+        try:
+            request = steps.send(await complete(*request, model))
+        except StopIteration as done:
+            return done.value
@@ -2,11 +2,6 @@
 
 from pydantic import BaseModel, Field, create_model
 from typing import Optional, Literal, List
-from openai import OpenAI
-import instructor
-
-# Initialize the Instructor client
-client = instructor.from_openai(OpenAI())
 
 
 # *** Prompting ***
@@ -79,24 +74,40 @@ class SearchQuery(BaseModel):
 
 
 # *** Use Case: Creating a Response Model ***
-response = client.chat.completions.create(
-    model="gpt-3.5-turbo",
-    messages=[{"role": "user", "content": "Search for pictures of cute puppies"}],
-    response_model=SearchQuery,
-)
+def search_query_example():
+    # Imported and initialized here so importing this module makes no API calls
+    from openai import OpenAI
+    import instructor
+
+    # Initialize the Instructor client
+    client = instructor.from_openai(OpenAI())
+
+    response = client.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[{"role": "user", "content": "Search for pictures of cute puppies"}],
+        response_model=SearchQuery,
+    )
+
+    # Execute the search query
+    search_results = response.execute()
+    print(
+        search_results
+    )  # Output: ['cute puppies result 1', 'cute puppies result 2', 'cute puppies result 3']
 
-# Execute the search query
-search_results = response.execute()
-print(
-    search_results
-)  # Output: ['cute puppies result 1', 'cute puppies result 2', 'cute puppies result 3']
 
 # Example usage of dynamic user model
-dynamic_user = DynamicUserModel(
-    name="John Doe", age=30, email="john.doe@example.com", active=True
-)
-dynamic_user.promote_to_admin()  # Promotes the user to admin
-print(dynamic_user.is_admin)  # Output: True
+def dynamic_user_example():
+    dynamic_user = DynamicUserModel(
+        name="John Doe", age=30, email="john.doe@example.com", active=True
+    )
+    dynamic_user.promote_to_admin()  # Promotes the user to admin
+    print(dynamic_user.is_admin)  # Output: True
+
+    dynamic_user.deactivate()  # Deactivates the user
+    print(dynamic_user.active)  # Output: False
+
 
-dynamic_user.deactivate()  # Deactivates the user
-print(dynamic_user.active)  # Output: False
+if __name__ == "__main__":
+    # Run examples
+    search_query_example()
+    dynamic_user_example()
@@ -2,9 +2,6 @@
 
 from typing import Annotated, Literal
 from pydantic import BaseModel, Field, AfterValidator, field_validator
-import openai
-import instructor
-from instructor.exceptions import InstructorRetryException
 from tenacity import (
     Retrying,
     AsyncRetrying,
@@ -14,8 +11,20 @@ from tenacity import (
     wait_exponential,
 )
 
-# Initialize the Instructor client
-client = instructor.from_openai(openai.OpenAI(), mode=instructor.Mode.TOOLS)
+
+# Initialize the Instructor clients on first use so importing this module makes no API calls
+def get_client():
+    import openai
+    import instructor
+
+    return instructor.from_openai(openai.OpenAI(), mode=instructor.Mode.TOOLS)
+
+
+def get_async_client():
+    import openai
+    import instructor
+
+    return instructor.from_openai(openai.AsyncOpenAI(), mode=instructor.Mode.TOOLS)
 
 
 # *** VALIDATION EXAMPLE ***
@@ -38,16 +47,17 @@ class UserDetail(BaseModel):
     age: int
 
 
-try:
-    UserDetail(name="jason", age=12)
-except Exception as e:
-    print(e)
-    """
-    Output:
-    1 validation error for UserDetail
-    name
-      Value error, Name must be ALL CAPS [type=value_error, input_value='jason', input_type=str]
-    """
+def validation_example():
+    try:
+        UserDetail(name="jason", age=12)
+    except Exception as e:
+        print(e)
+        """
+        Output:
+        1 validation error for UserDetail
+        name
+          Value error, Name must be ALL CAPS [type=value_error, input_value='jason', input_type=str]
+        """
 
 
 # *** SIMPLE RETRIES ***
@@ -60,20 +70,21 @@ class UserResponse(BaseModel):
     age: int
 
 
-response = client.chat.completions.create(
-    model="gpt-3.5-turbo",
-    response_model=UserResponse,
-    messages=[{"role": "user", "content": "Extract `jason is 12`"}],
-    max_retries=3,  # Retries up to 3 times
-)
-print(response.model_dump_json(indent=2))
-"""
-Output:
-{
-  "name": "jason",
-  "age": 12
-}
-"""
+def simple_retries_example():
+    response = get_client().chat.completions.create(
+        model="gpt-3.5-turbo",
+        response_model=UserResponse,
+        messages=[{"role": "user", "content": "Extract `jason is 12`"}],
+        max_retries=3,  # Retries up to 3 times
+    )
+    print(response.model_dump_json(indent=2))
+    """
+    Output:
+    {
+      "name": "jason",
+      "age": 12
+    }
+    """
 
 # *** ADVANCED RETRY LOGIC ***
 # Example 2: Retry logic with Tenacity
@@ -88,21 +99,22 @@ class AdvancedUserDetail(BaseModel):
     age: int
 
 
-response = client.chat.completions.create(
-    model="gpt-4-turbo-preview",
-    response_model=AdvancedUserDetail,
-    messages=[{"role": "user", "content": "Extract `Jason is 25 years old`"}],
-    max_retries=retries,  # Apply custom retry logic
-)
+def advanced_retries_example():
+    response = get_client().chat.completions.create(
+        model="gpt-4-turbo-preview",
+        response_model=AdvancedUserDetail,
+        messages=[{"role": "user", "content": "Extract `Jason is 25 years old`"}],
+        max_retries=retries,  # Apply custom retry logic
+    )
 
-print(response.model_dump_json(indent=2))
-"""
-Output:
-{
-  "name": "Jason",
-  "age": 25
-}
-"""
+    print(response.model_dump_json(indent=2))
+    """
+    Output:
+    {
+      "name": "Jason",
+      "age": 25
+    }
+    """
 
 
 # *** HANDLING RETRY EXCEPTIONS ***
@@ -115,43 +127,74 @@ class ValidatedUser(BaseModel):
         raise ValueError(f"Invalid age: {value}")
 
 
-try:
-    client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        response_model=ValidatedUser,
-        messages=[{"role": "user", "content": "Extract `Jason is 25 years old`"}],
-        max_retries=retries,
-    )
-except InstructorRetryException as e:
-    print("Validation Error Messages:", e.messages[-1]["content"])  # Last error message
-    print("Number of Attempts:", e.n_attempts)  # Total attempts made
-    print("Last Completion Object:", e.last_completion)  # Details of the last attempt
+def retry_exception_example():
+    from instructor.exceptions import InstructorRetryException
+
+    try:
+        get_client().chat.completions.create(
+            model="gpt-3.5-turbo",
+            response_model=ValidatedUser,
+            messages=[{"role": "user", "content": "Extract `Jason is 25 years old`"}],
+            max_retries=retries,
+        )
+    except InstructorRetryException as e:
+        print("Validation Error Messages:", e.messages[-1]["content"])  # Last error message
+        print("Number of Attempts:", e.n_attempts)  # Total attempts made
+        print("Last Completion Object:", e.last_completion)  # Details of the last attempt
 
 
 # *** ASYNCHRONOUS RETRIES ***
 # Asynchronous version of the retry logic
-async_client = instructor.from_openai(openai.AsyncOpenAI(), mode=instructor.Mode.TOOLS)
-
-
 class AsyncUserDetail(BaseModel):
     name: str
     age: int
 
 
-async_task = async_client.chat.completions.create(
-    model="gpt-4-turbo-preview",
-    response_model=AsyncUserDetail,
-    messages=[{"role": "user", "content": "Extract `Jason is 12`"}],
-    max_retries=AsyncRetrying(
-        stop=stop_after_attempt(3),  # Stop after 3 attempts
-        wait=wait_fixed(1),  # Wait 1 second between attempts
-    ),
-)
+def async_retries_example():
+    import asyncio
 
-import asyncio
+    async_task = get_async_client().chat.completions.create(
+        model="gpt-4-turbo-preview",
+        response_model=AsyncUserDetail,
+        messages=[{"role": "user", "content": "Extract `Jason is 12`"}],
+        max_retries=AsyncRetrying(
+            stop=stop_after_attempt(3),  # Stop after 3 attempts
+            wait=wait_fixed(1),  # Wait 1 second between attempts
+        ),
+    )
 
-response = asyncio.run(async_task)
-print(response.model_dump_json(indent=2))
+    response = asyncio.run(async_task)
+    print(response.model_dump_json(indent=2))
+
+
+# *** HEDGED REQUESTS ***
+# Retries only help after a failure; a hedge also covers a slow success. If a call
+# is still running after the p95 of recent latencies, a duplicate is sent (here to
+# a cheaper model) and whichever validated result arrives first is used.
+# Uses the app's hedging module, so run as a module: python -m <package>.retrying
+def hedged_requests_example():
+    import asyncio
+
+    from .hedging import Hedger
+
+    hedger = Hedger(percentile=0.95, max_hedge_rate=0.05, secondary_model="gpt-4o-mini")
+    client = get_async_client()
+
+    async def extract(model: str) -> AsyncUserDetail:
+        return await client.chat.completions.create(
+            model=model,
+            response_model=AsyncUserDetail,
+            messages=[{"role": "user", "content": "Extract `Jason is 12`"}],
+            max_retries=AsyncRetrying(stop=stop_after_attempt(3), wait=wait_fixed(1)),
+        )
+
+    async def run_all():
+        return await asyncio.gather(
+            *(hedger.run(extract, "gpt-4o") for _ in range(50))
+        )
+
+    responses = asyncio.run(run_all())
+    print(responses[0].model_dump_json(indent=2), hedger.stats)
 
 
 # *** RETRY CALLBACKS ***
@@ -166,18 +209,19 @@ class UserWithLogging(BaseModel):
         return value
 
 
-response = client.chat.completions.create(
-    model="gpt-3.5-turbo",
-    max_retries=Retrying(
-        stop=stop_after_attempt(3),
-        wait=wait_random(0, 1),  # Random wait between 0 and 1 second
-        before=lambda retry_state: print("Before:", retry_state),
-        after=lambda retry_state: print("After:", retry_state),
-    ),
-    messages=[{"role": "user", "content": "Extract John is 18 years old"}],
-    response_model=UserWithLogging,
-)
-print(response)
+def retry_callbacks_example():
+    response = get_client().chat.completions.create(
+        model="gpt-3.5-turbo",
+        max_retries=Retrying(
+            stop=stop_after_attempt(3),
+            wait=wait_random(0, 1),  # Random wait between 0 and 1 second
+            before=lambda retry_state: print("Before:", retry_state),
+            after=lambda retry_state: print("After:", retry_state),
+        ),
+        messages=[{"role": "user", "content": "Extract John is 18 years old"}],
+        response_model=UserWithLogging,
+    )
+    print(response)
 
 
 # *** OTHER TENACITY FEATURES ***
@@ -189,10 +233,67 @@ exponential_retries = Retrying(
     ),  # Exponential backoff between 2 and 10 seconds
 )
 
-response = client.chat.completions.create(
-    model="gpt-3.5-turbo",
-    response_model=UserResponse,
-    messages=[{"role": "user", "content": "Extract Jason is 35"}],
-    max_retries=exponential_retries,
-)
-print(response.model_dump_json(indent=2))
+
+def exponential_backoff_example():
+    response = get_client().chat.completions.create(
+        model="gpt-3.5-turbo",
+        response_model=UserResponse,
+        messages=[{"role": "user", "content": "Extract Jason is 35"}],
+        max_retries=exponential_retries,
+    )
+    print(response.model_dump_json(indent=2))
+
+
+# *** LOCAL REPAIR BEFORE RE-ASKING ***
+# Mechanical failures (wrong case, "1,024" for a number) are fixed locally; only
+# fields that still fail are re-asked, without resending the whole conversation.
+# Uses the app's repair module, so run as a module: python -m <package>.retrying
+def local_repair_example():
+    from .repair import Repairer, upper_case
+
+    repairer = Repairer(UserDetail, fixers={"name": [upper_case]})
+    result = repairer.validate({"name": "jason", "age": "1,024"})
+    print(result.value, repairer.stats)
+    """
+    Output:
+    name='JASON' age=1024 RepairStats(validated=0, repaired=1, reasked=0, reasked_fields=0, failed=0)
+    """
+
+
+def repair_reask_example():
+    import json
+
+    import openai
+
+    from .batch import response_format
+    from .repair import Repairer, create_with_repair, upper_case
+
+    # Raw JSON in, so that validation (and repair) happens here rather than in Instructor
+    def complete(messages, response_model, model):
+        completion = openai.OpenAI().chat.completions.create(
+            model=model, messages=messages, response_format=response_format(response_model)
+        )
+        return json.loads(completion.choices[0].message.content)
+
+    repairer = Repairer(UserWithLogging, fixers={"name": [upper_case]})
+    response = create_with_repair(
+        [{"role": "user", "content": "Extract John is 18 years old"}],
+        repairer,
+        model="gpt-4o-mini",
+        complete=complete,
+    )
+    print(response, repairer.stats)
+
+
+if __name__ == "__main__":
+    # Run examples
+    validation_example()
+    simple_retries_example()
+    advanced_retries_example()
+    retry_exception_example()
+    async_retries_example()
+    hedged_requests_example()
+    retry_callbacks_example()
+    exponential_backoff_example()
+    local_repair_example()
+    repair_reask_example()
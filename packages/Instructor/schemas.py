@@ -1,31 +1,68 @@
 # apps/insights/services/openai/schemas.py
 
-from pydantic import BaseModel, Field
-from typing import List
+from types import MappingProxyType
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
+from typing import TYPE_CHECKING, List, Mapping, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Key metrics in their canonical order, shared by the schemas, prompts and metric vectors
+METRIC_NAMES: Tuple[str, ...] = (
+    "Average Sessions",
+    "Average Users",
+    "Average New Users",
+    "Average Pageviews",
+    "Pages per Session",
+    "Average Session Duration",
+    "Bounce Rate",
+    "Conversion Rate",
+    "Average Transactions",
+    "Average Revenue",
+)
+
+# Metric name -> position in METRIC_NAMES (read-only)
+METRIC_INDEX: Mapping[str, int] = MappingProxyType(
+    {name: index for index, name in enumerate(METRIC_NAMES)}
+)
+
+
+def _ordered_values(named_values: Sequence[Tuple[str, float]]) -> List[float]:
+    # Place each value at its metric's index, requiring every metric exactly once
+    values: List[Optional[float]] = [None] * len(METRIC_NAMES)
+    for name, value in named_values:
+        index = METRIC_INDEX.get(name)
+        if index is None:
+            raise ValueError(f"Unexpected metric name: {name}")
+        if values[index] is not None:
+            raise ValueError(f"Duplicate metric name: {name}")
+        values[index] = value
+    missing = [name for name, value in zip(METRIC_NAMES, values) if value is None]
+    if missing:
+        raise ValueError(f"Missing metrics: {', '.join(missing)}")
+    return values
+
+
+def _check_metric_name(name: str, info: ValidationInfo) -> str:
+    # Only enforced when requested through the validation context (e.g. by the
+    # repair stage); plain validation accepts any name
+    if info.context and info.context.get("canonical_metrics") and name not in METRIC_INDEX:
+        raise ValueError(f"Unexpected metric name: {name}")
+    return name
 
 
 class KeyMetric(BaseModel):
     name: str
     value: float
 
+    check_name = field_validator("name")(_check_metric_name)
+
     @classmethod
     def ordered_metrics(cls) -> List["KeyMetric"]:
-        return [
-            cls(name="Average Sessions", value=0),
-            cls(name="Average Users", value=0),
-            cls(name="Average New Users", value=0),
-            cls(name="Average Pageviews", value=0),
-            cls(name="Pages per Session", value=0),
-            cls(name="Average Session Duration", value=0),
-            cls(name="Bounce Rate", value=0),
-            cls(name="Conversion Rate", value=0),
-            cls(name="Average Transactions", value=0),
-            cls(name="Average Revenue", value=0),
-        ]
+        return [cls(name=name, value=0) for name in METRIC_NAMES]
 
     def validate_name(self) -> bool:
-        expected_names = [metric.name for metric in self.ordered_metrics()]
-        if self.name not in expected_names:
+        if self.name not in METRIC_INDEX:
             raise ValueError(f"Unexpected metric name: {self.name}")
         return True
 
@@ -39,18 +76,33 @@ class SummaryOutput(BaseModel):
     )
 
     def enforce_ordered_metrics(self):
-        ordered_names = [metric.name for metric in KeyMetric.ordered_metrics()]
-        self.key_metrics = sorted(
-            self.key_metrics,
-            key=lambda metric: (
-                ordered_names.index(metric.name)
-                if metric.name in ordered_names
-                else float("inf")
-            ),
-        )
         # Ensure no unexpected metrics
         for metric in self.key_metrics:
             metric.validate_name()
+        self.key_metrics = sorted(
+            self.key_metrics, key=lambda metric: METRIC_INDEX[metric.name]
+        )
+
+    def to_vector(self) -> "np.ndarray":
+        """
+        Return the key metric values as a float64 vector in METRIC_NAMES order.
+        """
+        import numpy as np
+
+        return np.array(
+            _ordered_values([(m.name, m.value) for m in self.key_metrics]),
+            dtype=np.float64,
+        )
+
+    @classmethod
+    def from_vector(cls, values: "np.ndarray", dataset_summary: str) -> "SummaryOutput":
+        return cls(
+            dataset_summary=dataset_summary,
+            key_metrics=[
+                KeyMetric(name=name, value=float(value))
+                for name, value in zip(METRIC_NAMES, values, strict=True)
+            ],
+        )
 
 
 class KeyMetricComparison(BaseModel):
@@ -59,6 +111,8 @@ class KeyMetricComparison(BaseModel):
     value2: float
     description: str
 
+    check_name = field_validator("name")(_check_metric_name)
+
 
 class ComparisonOutput(BaseModel):
     comparison_summary: str = Field(
@@ -69,3 +123,100 @@ class ComparisonOutput(BaseModel):
         ...,
         description="Key metrics with values from both weeks and descriptions of differences.",
     )
+
+    def to_vectors(self) -> "np.ndarray":
+        """
+        Return a (2, n) float64 array: row 0 is the current week, row 1 the previous week.
+        """
+        import numpy as np
+
+        metrics = self.key_metrics_comparison
+        return np.array(
+            [
+                _ordered_values([(m.name, m.value1) for m in metrics]),
+                _ordered_values([(m.name, m.value2) for m in metrics]),
+            ],
+            dtype=np.float64,
+        )
+
+    def descriptions(self) -> List[str]:
+        """
+        Return the metric descriptions in METRIC_NAMES order.
+        """
+        by_name = {m.name: m.description for m in self.key_metrics_comparison}
+        return [by_name[name] for name in METRIC_NAMES if name in by_name]
+
+    @classmethod
+    def from_vectors(
+        cls,
+        values: "np.ndarray",
+        comparison_summary: str,
+        descriptions: Sequence[str],
+    ) -> "ComparisonOutput":
+        current, previous = values
+        return cls(
+            comparison_summary=comparison_summary,
+            key_metrics_comparison=[
+                KeyMetricComparison(
+                    name=name,
+                    value1=float(value1),
+                    value2=float(value2),
+                    description=description,
+                )
+                for name, value1, value2, description in zip(
+                    METRIC_NAMES, current, previous, descriptions, strict=True
+                )
+            ],
+        )
+
+
+class ComparisonStreamOutput(BaseModel):
+    # Same content as ComparisonOutput with the metrics first, so that when the
+    # response is streamed each metric completes before the long summary text.
+    key_metrics_comparison: List[KeyMetricComparison] = Field(
+        ...,
+        description="Key metrics with values from both weeks and descriptions of differences.",
+    )
+    comparison_summary: str = Field(
+        ...,
+        description="A concise English summary highlighting differences and similarities between the current week and the previous week.",
+    )
+
+
+class SummaryNarrative(BaseModel):
+    # Narrative-only response; key metrics are computed locally
+    dataset_summary: str = Field(
+        ..., description="A concise English summary of the dataset."
+    )
+
+
+class ComparisonNarrative(BaseModel):
+    # Narrative-only response; metric values are computed locally
+    comparison_summary: str = Field(
+        ...,
+        description="A concise English summary highlighting differences and similarities between the current week and the previous week.",
+    )
+    metric_descriptions: List[str] = Field(
+        ...,
+        description="One description of the observed difference or trend per key metric, in the order the metrics were given.",
+    )
+
+    @field_validator("metric_descriptions")
+    @classmethod
+    def one_per_metric(cls, value: List[str]) -> List[str]:
+        expected = len(METRIC_NAMES)
+        if len(value) != expected:
+            raise ValueError(f"Expected {expected} metric descriptions, got {len(value)}")
+        return value
+
+
+class WeeklyNarrative(ComparisonNarrative):
+    # Combined narrative for the current week's summary and its comparison
+    dataset_summary: str = Field(
+        ..., description="A concise English summary of the current week."
+    )
+
+
+class WeeklyInsights(BaseModel):
+    summary: SummaryOutput
+    comparison: Optional[ComparisonOutput] = None
@@ -1,91 +1,97 @@
 # apps/insights/services/openai/summary_generator.py
+import asyncio
 import os
-from django.conf import settings
-from instructor import from_openai
-from openai import OpenAI
-from .schemas import SummaryOutput
-import logging
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
+from functools import partial
+from typing import (
+    AsyncIterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
+from pydantic import BaseModel
+from .cache import get_response_cache
+from .client import openai_async_retrying, openai_retrying
+from .concurrency import BatchResult, run_many, stream_many
+from .hedging import hedged
+from .observability import observe_call, record_attempt
+from .prompts import (
+    SUMMARY_NARRATIVE_PROMPT,
+    SUMMARY_PROMPT,
+    BuiltPrompt,
+    as_messages,
 )
+from .repair import acreate_with_repair, create_with_repair, get_repairer
+from .schemas import SummaryNarrative, SummaryOutput
+import logging
 
-# Load OpenAI API key from settings
-openai_api_key = settings.OPENAI_API_KEY
+M = TypeVar("M", bound=BaseModel)
 
-if not openai_api_key:
-    raise ValueError("OPENAI_API_KEY is not set in Django settings.")
+OPENAI_MODEL = "gpt-4o-2024-08-06"
 
-# Initialize OpenAI client
-client = from_openai(OpenAI(api_key=openai_api_key))
 
+def call_openai_api(
+    prompt: Union[str, BuiltPrompt], response_model: Type[M] = SummaryOutput
+) -> M:
+    with observe_call(response_model.__name__):
+        # Retry logic for transient errors
+        for attempt in openai_retrying():
+            with attempt:
+                record_attempt(response_model.__name__, attempt.retry_state.attempt_number)
+                try:
+                    # Make the API call; invalid responses are repaired locally
+                    # before any re-ask
+                    return create_with_repair(
+                        as_messages(prompt), get_repairer(response_model), OPENAI_MODEL
+                    )
+                except Exception as e:
+                    logging.error(f"Error during OpenAI API call: {e}")
+                    raise
+
+
+# Async counterpart used by the batch entry points
+async def async_call_openai_api(
+    prompt: Union[str, BuiltPrompt], response_model: Type[M] = SummaryOutput
+) -> M:
+    with observe_call(response_model.__name__):
+        async for attempt in openai_async_retrying():
+            with attempt:
+                record_attempt(response_model.__name__, attempt.retry_state.attempt_number)
+                try:
+
+                    async def create(model: str) -> M:
+                        # Make the API call
+                        return await acreate_with_repair(
+                            as_messages(prompt), get_repairer(response_model), model
+                        )
+
+                    # Hedged against slow responses when OPENAI_HEDGING_ENABLED is set
+                    return await hedged(create, OPENAI_MODEL)
+                except Exception as e:
+                    logging.error(f"Error during OpenAI API call: {e}")
+                    raise
+
+
+def build_summary_prompt(statistical_summary: str) -> BuiltPrompt:
+    return SUMMARY_PROMPT.build(statistical_summary=statistical_summary)
 
-# Retry logic for transient errors
-@retry(
-    stop=stop_after_attempt(settings.OPENAI_RETRY_ATTEMPTS),
-    wait=wait_exponential(
-        multiplier=settings.OPENAI_RETRY_WAIT_MULTIPLIER,
-        min=settings.OPENAI_RETRY_WAIT_MIN,
-        max=settings.OPENAI_RETRY_WAIT_MAX,
-    ),
-)
-def call_openai_api(prompt: str) -> SummaryOutput:
-    try:
-        # Make the API call
-        return client.chat.completions.create(
-            model="gpt-4o-2024-08-06",
-            messages=[{"role": "user", "content": prompt}],
-            response_model=SummaryOutput,
-        )
-    except Exception as e:
-        logging.error(f"Error during OpenAI API call: {e}")
-        raise
+
+def build_summary_narrative_prompt(metrics: str) -> BuiltPrompt:
+    return SUMMARY_NARRATIVE_PROMPT.build(metrics=metrics)
 
 
 def generate_summary(statistical_summary: str) -> SummaryOutput:
-    prompt = f"""
-You are a data analyst tasked with summarizing a dataset. The following is a statistical summary of the dataset:
-
-{statistical_summary}
-
-Please provide the summary in the following JSON format:
-
-{{
-    "dataset_summary": "A concise, insightful summary highlighting significant findings, trends, or patterns observed in the data. Mention any notable data or anomalies in the key metrics, providing context by referencing the actual values and what they indicate about user behavior or performance metrics.
-    Ensure that:
-        - Commas are used in numerical values to separate thousands in the summary.",
-    "key_metrics": [
-        {{
-            "name": "Name of Metric",
-            "value": Numeric value
-        }}
-        // Repeat for each key metric
-    ]
-}}
-
-Ensure that:
-- All numeric values are provided as numbers (not strings).
-- The key_metrics include the following metrics in this order:
-    - "Average Sessions"
-    - "Average Users"
-    - "Average New Users"
-    - "Average Pageviews"
-    - "Pages per Session"
-    - "Average Session Duration"
-    - "Bounce Rate"
-    - "Conversion Rate"
-    - "Average Transactions"
-    - "Average Revenue"
-- Do not include descriptions for the key metrics.
-- Focus on delivering specific insights derived from the data.
-- Avoid generic statements or repeating information without analysis.
-"""
+    prompt = build_summary_prompt(statistical_summary)
     try:
         logging.info("Requesting dataset summary from OpenAI...")
 
-        # Retry-enabled API call
-        response = call_openai_api(prompt)
+        # Cached, retry-enabled API call
+        response = get_response_cache().get_or_call(
+            prompt, OPENAI_MODEL, SummaryOutput, call_openai_api
+        )
 
         # Log the raw response from OpenAI for debugging
         logging.info(f"Raw LLM response: {response.json()}")
@@ -96,3 +102,93 @@ Ensure that:
     except Exception as e:
         logging.error(f"Error generating summary: {e}")
         raise ValueError("Failed to generate summary using OpenAI.") from e
+
+
+async def agenerate_summary(statistical_summary: str) -> SummaryOutput:
+    prompt = build_summary_prompt(statistical_summary)
+    try:
+        logging.info("Requesting dataset summary from OpenAI...")
+
+        # Cached, retry-enabled API call
+        response = await get_response_cache().aget_or_call(
+            prompt, OPENAI_MODEL, SummaryOutput, async_call_openai_api
+        )
+
+        logging.info("Successfully received structured response.")
+        return response
+
+    except Exception as e:
+        logging.error(f"Error generating summary: {e}")
+        raise ValueError("Failed to generate summary using OpenAI.") from e
+
+
+async def agenerate_summaries_many(
+    statistical_summaries: Sequence[str], concurrency: Optional[int] = None
+) -> List[BatchResult[SummaryOutput]]:
+    return await run_many(agenerate_summary, statistical_summaries, concurrency)
+
+
+def generate_summaries_many(
+    statistical_summaries: Sequence[str], concurrency: Optional[int] = None
+) -> List[BatchResult[SummaryOutput]]:
+    """
+    Summarize many datasets concurrently.
+    Results are returned in input order; failed items carry the error instead of a value.
+    """
+    return asyncio.run(agenerate_summaries_many(statistical_summaries, concurrency))
+
+
+def stream_summaries_many(
+    statistical_summaries: Sequence[str], concurrency: Optional[int] = None
+) -> AsyncIterator[BatchResult[SummaryOutput]]:
+    """
+    Summarize many datasets concurrently, yielding results as they complete.
+    """
+    return stream_many(agenerate_summary, statistical_summaries, concurrency)
+
+
+def generate_summaries_batch(
+    statistical_summaries: Sequence[str], manifest_path: str, backend=None
+) -> List[BatchResult[SummaryOutput]]:
+    """
+    Summarize many datasets through the Batch API, for non-interactive runs.
+    Blocks until the batch finishes; rerunning with the same manifest_path after a
+    restart resumes the submitted batch. Failed items carry the error instead of a value.
+    """
+    # Imported here; the batch machinery is only needed by scheduled jobs
+    from .batch import run_batch
+
+    prompts = [build_summary_prompt(summary) for summary in statistical_summaries]
+    return run_batch(prompts, SummaryOutput, OPENAI_MODEL, manifest_path, backend)
+
+
+def generate_summary_from_data(weekly_data: Mapping[str, Sequence[float]]) -> SummaryOutput:
+    """
+    Summarize raw daily data for one week.
+    Key metrics are computed locally; the LLM only writes `dataset_summary`.
+    """
+    # Imported here to keep NumPy out of the module import path
+    from .key_metrics import compute_key_metrics, format_metrics, to_key_metrics
+
+    values = compute_key_metrics(weekly_data)
+    prompt = build_summary_narrative_prompt(format_metrics(values))
+    try:
+        logging.info("Requesting dataset summary narrative from OpenAI...")
+
+        # Cached, retry-enabled API call
+        narrative = get_response_cache().get_or_call(
+            prompt,
+            OPENAI_MODEL,
+            SummaryNarrative,
+            partial(call_openai_api, response_model=SummaryNarrative),
+        )
+
+        logging.info("Successfully received structured response.")
+        return SummaryOutput(
+            dataset_summary=narrative.dataset_summary,
+            key_metrics=to_key_metrics(values),
+        )
+
+    except Exception as e:
+        logging.error(f"Error generating summary: {e}")
+        raise ValueError("Failed to generate summary using OpenAI.") from e
@@ -0,0 +1,366 @@
+# Queue-depth-driven autoscaling for Django Q
+#
+# A Django Q cluster runs a fixed number of workers (Q_CLUSTER["workers"]), so
+# the autoscaler scales in whole clusters: each unit is one cluster process
+# with that many workers, and it keeps between `min_units` and `max_units` of
+# them running against the same broker.
+#
+# Every `interval` seconds it reads the broker's queue depth and the number of
+# tasks finished over the last `window` seconds. From those it estimates how long
+# a new task would wait (depth / throughput):
+#   - scale up when the estimate stays above `scale_up_wait` for `up_after`
+#     checks in a row, in proportion to the backlog;
+#   - scale down one unit when it stays below `scale_down_wait` for `down_after`
+#     checks and the remaining workers can hold the tasks in progress.
+# The gap between the two thresholds, the streaks and a `cooldown` after every
+# change keep it from flapping. Decisions are exported as q_autoscaler_* metrics
+# on the shared metrics registry (packages/metrics.py).
+#
+# Throughput is read from saved task results, so it needs results in the
+# database (not cached=True).
+#
+#   python -m packages.Q2.local_cluster autoscaler --no-cluster --workers 2
+
+import logging
+import math
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Deque, List, Optional, Sequence
+
+from django.utils import timezone
+from django_q.brokers import Broker, get_broker
+from django_q.conf import Conf
+from django_q.models import Task
+
+from packages.metrics import Counter, Gauge, registry
+
+DEFAULT_INTERVAL = 5.0  # seconds between checks
+DEFAULT_WINDOW = 60.0  # seconds of finished tasks used for throughput
+
+workers_gauge = registry.register(
+    Gauge("q_autoscaler_workers", "Worker processes the autoscaler is running.")
+)
+queue_depth_gauge = registry.register(
+    Gauge("q_autoscaler_queue_depth", "Tasks waiting in the broker at the last check.")
+)
+wait_estimate_gauge = registry.register(
+    Gauge(
+        "q_autoscaler_wait_estimate_seconds",
+        "Estimated queue wait for a new task (queue depth / throughput).",
+    )
+)
+decisions = registry.register(
+    Counter(
+        "q_autoscaler_decisions_total",
+        "Autoscaler checks, by action taken and reason.",
+        labels=("action", "reason"),
+    )
+)
+
+
+@dataclass
+class Observation:
+    queue_depth: int
+    in_flight: int  # tasks taken off the queue but not finished
+    throughput: float  # tasks finished per second over the window
+
+    @property
+    def wait_estimate(self) -> float:
+        if self.queue_depth == 0:
+            return 0.0
+        if self.throughput == 0:
+            return math.inf
+        return self.queue_depth / self.throughput
+
+
+def observe(broker: Broker, window: float = DEFAULT_WINDOW) -> Observation:
+    since = timezone.now() - timedelta(seconds=window)
+    finished = Task.objects.filter(stopped__gte=since).count()
+    return Observation(
+        queue_depth=broker.queue_size(),
+        in_flight=broker.lock_size() or 0,
+        throughput=finished / window,
+    )
+
+
+@dataclass
+class Decision:
+    at: float
+    units: int  # before
+    target: int
+    action: str  # "scale_up", "scale_down" or "hold"
+    reason: str
+    observation: Observation
+
+
+class ScalingPolicy:
+    """
+    Decides the number of cluster units from successive observations.
+    """
+
+    def __init__(
+        self,
+        min_units: int = 1,
+        max_units: int = 4,
+        workers_per_unit: int = 1,
+        scale_up_wait: float = 30.0,
+        scale_down_wait: float = 5.0,
+        up_after: int = 2,
+        down_after: int = 5,
+        cooldown: float = 60.0,
+    ):
+        if not 0 <= min_units <= max_units:
+            raise ValueError("Expected 0 <= min_units <= max_units.")
+        if scale_down_wait >= scale_up_wait:
+            raise ValueError("scale_down_wait must be below scale_up_wait.")
+        self.min_units = min_units
+        self.max_units = max_units
+        self.workers_per_unit = workers_per_unit
+        self.scale_up_wait = scale_up_wait
+        self.scale_down_wait = scale_down_wait
+        self.up_after = up_after
+        self.down_after = down_after
+        self.cooldown = cooldown
+        self.up_streak = 0
+        self.down_streak = 0
+        self.last_change: Optional[float] = None
+
+    def decide(self, observation: Observation, units: int, now: float) -> Decision:
+        def decision(target: int, action: str, reason: str) -> Decision:
+            return Decision(now, units, target, action, reason, observation)
+
+        # Bounds apply immediately, e.g. on startup
+        if units < self.min_units:
+            return self._changed(decision(self.min_units, "scale_up", "below_min"))
+        if units > self.max_units:
+            return self._changed(decision(self.max_units, "scale_down", "above_max"))
+
+        wait = observation.wait_estimate
+        if wait > self.scale_up_wait:
+            self.up_streak, self.down_streak = self.up_streak + 1, 0
+        elif wait < self.scale_down_wait:
+            self.up_streak, self.down_streak = 0, self.down_streak + 1
+        else:
+            self.up_streak = self.down_streak = 0
+            return decision(units, "hold", "within_band")
+
+        if self.up_streak and self.up_streak < self.up_after:
+            return decision(units, "hold", "up_pending")
+        if self.down_streak and self.down_streak < self.down_after:
+            return decision(units, "hold", "down_pending")
+        if self.last_change is not None and now - self.last_change < self.cooldown:
+            return decision(units, "hold", "cooldown")
+
+        if self.up_streak:
+            if units >= self.max_units:
+                return decision(units, "hold", "at_max")
+            # Enough capacity to bring the wait back to the threshold, at least one unit
+            factor = wait / self.scale_up_wait if math.isfinite(wait) else 2.0
+            target = min(max(math.ceil(max(units, 1) * factor), units + 1), self.max_units)
+            return self._changed(decision(target, "scale_up", "queue_wait"))
+
+        if units <= self.min_units:
+            return decision(units, "hold", "at_min")
+        if observation.in_flight > (units - 1) * self.workers_per_unit:
+            return decision(units, "hold", "busy")
+        return self._changed(decision(units - 1, "scale_down", "idle"))
+
+    def _changed(self, decision: Decision) -> Decision:
+        self.up_streak = self.down_streak = 0
+        self.last_change = decision.at
+        return decision
+
+
+class LocalClusterPool:
+    """
+    Units as clusters started from this process (django_q.cluster.Cluster).
+    Clusters install signal handlers, so resize only from the main thread, i.e.
+    call Autoscaler.run() rather than start().
+    """
+
+    def __init__(self, broker: Optional[Broker] = None):
+        self.broker = broker
+        self.clusters: List = []
+
+    def __len__(self) -> int:
+        return len(self.clusters)
+
+    def scale_to(self, units: int) -> None:
+        from django_q.cluster import Cluster
+
+        while len(self.clusters) < units:
+            cluster = Cluster(self.broker or get_broker())
+            cluster.start()
+            self.clusters.append(cluster)
+        while len(self.clusters) > units:
+            # Waits for the cluster's workers to finish their current tasks
+            self.clusters.pop().stop()
+
+
+class QclusterProcessPool:
+    """
+    Units as `manage.py qcluster` subprocesses, stopped with SIGTERM so they
+    finish their current tasks first.
+    """
+
+    def __init__(
+        self,
+        command: Sequence[str] = (sys.executable, "manage.py", "qcluster"),
+        stop_timeout: Optional[float] = None,
+    ):
+        self.command = list(command)
+        self.stop_timeout = stop_timeout
+        self.processes: List[subprocess.Popen] = []
+
+    def __len__(self) -> int:
+        # Forget processes that exited on their own; the next check replaces them
+        self.processes = [p for p in self.processes if p.poll() is None]
+        return len(self.processes)
+
+    def scale_to(self, units: int) -> None:
+        while len(self) < units:
+            self.processes.append(subprocess.Popen(self.command, env=os.environ.copy()))
+        while len(self) > units:
+            process = self.processes.pop()
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(self.stop_timeout)
+            except subprocess.TimeoutExpired:
+                logging.warning(f"qcluster {process.pid} did not stop in time; killing it.")
+                process.kill()
+
+
+class Autoscaler:
+    """
+    Periodically observes the broker and resizes `pool` according to `policy`.
+    """
+
+    def __init__(
+        self,
+        pool,
+        policy: Optional[ScalingPolicy] = None,
+        broker: Optional[Broker] = None,
+        interval: float = DEFAULT_INTERVAL,
+        window: float = DEFAULT_WINDOW,
+        history: int = 100,
+    ):
+        self.pool = pool
+        self.policy = policy or ScalingPolicy(workers_per_unit=Conf.WORKERS)
+        self.broker = broker or get_broker()
+        self.interval = interval
+        self.window = window
+        self.decisions: Deque[Decision] = deque(maxlen=history)
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def tick(self) -> Decision:
+        observation = observe(self.broker, self.window)
+        decision = self.policy.decide(observation, len(self.pool), time.monotonic())
+        if decision.target != decision.units:
+            logging.info(
+                f"Autoscaler: {decision.action} from {decision.units} to "
+                f"{decision.target} units ({decision.reason}, queue depth "
+                f"{observation.queue_depth}, estimated wait {observation.wait_estimate:.1f}s)"
+            )
+            self.pool.scale_to(decision.target)
+        self.decisions.append(decision)
+        decisions.inc(decision.action, decision.reason)
+        workers_gauge.set(len(self.pool) * self.policy.workers_per_unit)
+        queue_depth_gauge.set(observation.queue_depth)
+        wait_estimate_gauge.set(observation.wait_estimate)
+        return decision
+
+    def run(self) -> None:
+        """
+        Check every `interval` seconds until stop() is called.
+        """
+        while not self.stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logging.error(f"Autoscaler check failed: {e}")
+            self.stop_event.wait(self.interval)
+
+    def start(self) -> None:
+        # Run the checks in a background thread
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="q-autoscaler", daemon=True)
+        self.thread.start()
+
+    def stop(self, scale_to: Optional[int] = 0) -> None:
+        """
+        Stop checking and, unless scale_to is None, resize the pool (to 0 by default).
+        """
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        if scale_to is not None:
+            self.pool.scale_to(scale_to)
+
+
+# Local demo: a burst of chains, then idle time, with clusters started in this
+# process. Run with --no-cluster so the autoscaler owns every cluster.
+def local_example(chains: int = 120, idle: float = 20.0):
+    from django.db import connection
+    from django_q.tasks import async_chain
+
+    from packages.metrics import render_prometheus
+
+    autoscaler = Autoscaler(
+        LocalClusterPool(),
+        ScalingPolicy(
+            min_units=1,
+            max_units=4,
+            workers_per_unit=Conf.WORKERS,
+            scale_up_wait=3.0,
+            scale_down_wait=0.5,
+            up_after=2,
+            down_after=3,
+            cooldown=3.0,
+        ),
+        interval=1.0,
+        window=5.0,
+    )
+
+    def load():
+        # Synthetic load like the chain examples, with slow first links
+        try:
+            groups = [
+                async_chain([("time.sleep", (0.5,)), ("math.floor", (n + 0.5,))])
+                for n in range(chains)
+            ]
+            started = time.perf_counter()
+            while Task.objects.filter(group__in=groups).count() < 2 * chains:
+                time.sleep(1.0)
+            print(f"Burst of {chains} chains done in {time.perf_counter() - started:.1f}s")
+            time.sleep(idle)
+        finally:
+            connection.close()
+            autoscaler.stop(scale_to=None)
+
+    threading.Thread(target=load, daemon=True).start()
+    try:
+        autoscaler.run()  # in the main thread, for LocalClusterPool
+    finally:
+        autoscaler.pool.scale_to(0)
+
+    for decision in autoscaler.decisions:
+        if decision.action != "hold":
+            print(
+                f"{decision.action}: {decision.units} -> {decision.target} units "
+                f"({decision.reason}, depth {decision.observation.queue_depth})"
+            )
+    print(
+        "\n".join(
+            line
+            for line in render_prometheus().splitlines()
+            if line.startswith("q_autoscaler")
+        )
+    )
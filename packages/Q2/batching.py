@@ -0,0 +1,249 @@
+# Micro-batching for tiny Django Q tasks
+#
+# A call like math.floor(1.5) costs far less than its broker round trip: the
+# signed task package, the enqueue, a worker picking it up and the monitor saving
+# its result. A Batcher coalesces calls to one function into a single task whose
+# payload carries only the arguments of each call (pickled and compressed in
+# one blob), runs them in one worker invocation and splits the results back out
+# per call, in submission order:
+#
+#   with Batcher("math.floor") as batcher:
+#       calls = [batcher.submit(x) for x in values]
+#   results = batcher.results(timeout=30)  # CallResult per call
+#
+# A batch is sent when it reaches `max_batch` calls, `max_delay` seconds after its
+# first call, or on flush() / leaving the block. A call that raises fails alone;
+# the rest of its batch still returns results.
+#
+#   python -m packages.Q2.local_cluster batching
+#   python -m packages.Q2.local_cluster batching --example benchmark_example
+
+import pickle
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from django.utils.module_loading import import_string
+from django_q.brokers import Broker
+from django_q.tasks import async_task
+
+from packages.Q2.notify import wait_task
+
+DEFAULT_MAX_BATCH = 100
+DEFAULT_MAX_DELAY = 0.05  # seconds
+COMPRESS_ABOVE = 512  # bytes; smaller payloads are not worth compressing
+
+Func = Union[str, Callable[..., Any]]
+Call = Tuple[Tuple, Dict[str, Any]]
+
+
+# Payloads are pickled like Django Q task packages, so a batched call accepts the
+# same argument types as async_task. The first byte says whether zlib was applied.
+def encode(obj: Any) -> bytes:
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) > COMPRESS_ABOVE:
+        return b"z" + zlib.compress(data)
+    return b"p" + data
+
+
+def decode(payload: bytes) -> Any:
+    data = payload[1:]
+    if payload[:1] == b"z":
+        data = zlib.decompress(data)
+    return pickle.loads(data)
+
+
+def encode_calls(calls: Sequence[Call]) -> bytes:
+    # Positional arguments per call; keyword arguments only for the calls that have them
+    return encode(
+        (
+            [args for args, _ in calls],
+            {position: kwargs for position, (_, kwargs) in enumerate(calls) if kwargs},
+        )
+    )
+
+
+def decode_calls(payload: bytes) -> List[Call]:
+    args_list, kwargs_by_position = decode(payload)
+    return [(args, kwargs_by_position.get(position, {})) for position, args in enumerate(args_list)]
+
+
+def run_batch(func: Func, payload: bytes) -> bytes:
+    """
+    Task body for a batch: runs `func` once per encoded call and returns the
+    encoded (ok, value or error message) pairs in call order.
+    """
+    if isinstance(func, str):
+        func = import_string(func)
+    outcomes = []
+    for args, kwargs in decode_calls(payload):
+        try:
+            outcomes.append((True, func(*args, **kwargs)))
+        except Exception as e:
+            outcomes.append((False, f"{type(e).__name__}: {e}"))
+    return encode(outcomes)
+
+
+@dataclass
+class CallResult:
+    index: int  # submission index
+    value: Any = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class Batcher:
+    """
+    Coalesces calls to `func` into batch tasks in one Django Q group.
+    `func` should be a dotted path or an importable function.
+    """
+
+    def __init__(
+        self,
+        func: Func,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_delay: Optional[float] = DEFAULT_MAX_DELAY,
+        group: Optional[str] = None,
+        cached: Union[bool, int] = False,
+        broker: Optional[Broker] = None,
+    ):
+        self.func = func
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.group = group or f"batch-{uuid.uuid4().hex}"
+        self.cached = cached
+        self.broker = broker
+        self.lock = threading.Lock()
+        self.pending: List[Call] = []
+        self.timer: Optional[threading.Timer] = None
+        self.task_ids: List[str] = []
+        # Submission index -> (batch task id, position in the batch)
+        self.placements: List[Tuple[int, int]] = []
+
+    def __enter__(self) -> "Batcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    def submit(self, *args, **kwargs) -> int:
+        """
+        Queue one call; returns its index in `results()`.
+        """
+        with self.lock:
+            index = len(self.placements)
+            self.placements.append((len(self.task_ids), len(self.pending)))
+            self.pending.append((args, kwargs))
+            if len(self.pending) >= self.max_batch:
+                self._send()
+            elif len(self.pending) == 1 and self.max_delay is not None:
+                self.timer = threading.Timer(self.max_delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        return index
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.pending:
+                self._send()
+
+    def _send(self) -> None:
+        # Called with the lock held
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        options = {
+            "group": self.group,
+            "task_name": f"{self.group}-{len(self.task_ids)}",
+            "cached": self.cached,
+        }
+        if self.broker is not None:
+            options["broker"] = self.broker
+        self.task_ids.append(
+            async_task(run_batch, self.func, encode_calls(self.pending), q_options=options)
+        )
+        self.pending = []
+
+    def results(self, timeout: Optional[float] = None) -> List[CallResult]:
+        """
+        Flush, wait for every batch and return one result per submitted call,
+        in submission order.
+        """
+        self.flush()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        outcomes: Dict[int, Optional[List[Tuple[bool, Any]]]] = {}
+        for batch, task_id in enumerate(self.task_ids):
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            payload = wait_task(task_id, timeout=remaining, cached=self.cached)
+            outcomes[batch] = decode(payload) if isinstance(payload, bytes) else None
+
+        results = []
+        for index, (batch, position) in enumerate(self.placements):
+            batch_outcomes = outcomes.get(batch)
+            if batch_outcomes is None:
+                results.append(CallResult(index, error="Batch did not finish."))
+                continue
+            ok, value = batch_outcomes[position]
+            results.append(CallResult(index, value) if ok else CallResult(index, error=value))
+        return results
+
+
+def local_example():
+    with Batcher("math.sqrt", max_batch=4) as batcher:
+        for x in [16, 2, -1, 81, 0.25, 9]:
+            batcher.submit(x)
+    for result in batcher.results(timeout=30):
+        print(result.index, result.value if result.ok else result.error)
+    print(f"{len(batcher.placements)} calls in {len(batcher.task_ids)} tasks")
+
+
+# Benchmark: per-call overhead with one task per call versus batched calls
+def benchmark_example(calls: int = 500, max_batch: int = 100):
+    from django_q.signals import pre_enqueue
+    from django_q.signing import SignedPackage
+
+    from packages.Q2.notify import wait_group
+
+    sizes: List[int] = []
+
+    def measure(sender, task, **kwargs):
+        sizes.append(len(SignedPackage.dumps(task)))
+
+    pre_enqueue.connect(measure)
+    try:
+        sizes.clear()
+        group = f"single-{uuid.uuid4().hex}"
+        started = time.perf_counter()
+        for n in range(calls):
+            async_task("math.floor", n + 0.5, group=group)
+        enqueued = time.perf_counter() - started
+        wait_group(group, calls, timeout=600)
+        single = (time.perf_counter() - started, enqueued, sum(sizes))
+
+        sizes.clear()
+        started = time.perf_counter()
+        with Batcher("math.floor", max_batch=max_batch) as batcher:
+            for n in range(calls):
+                batcher.submit(n + 0.5)
+        enqueued = time.perf_counter() - started
+        results = batcher.results(timeout=600)
+        batched = (time.perf_counter() - started, enqueued, sum(sizes))
+    finally:
+        pre_enqueue.disconnect(measure)
+
+    wrong = [r for r in results if not (r.ok and r.value == r.index)]
+    if wrong:
+        raise RuntimeError(f"{len(wrong)} batched calls returned wrong results, e.g. {wrong[0]}")
+    print(f"{calls} math.floor calls, {max_batch} per batch")
+    for label, (total, enqueued, size) in [("one task per call", single), ("batched", batched)]:
+        print(
+            f"{label:18} {total:6.2f}s total, {total / calls * 1000:6.2f}ms per call, "
+            f"enqueue {enqueued / calls * 1000:5.2f}ms per call, "
+            f"{size / calls:6.1f} payload bytes per call"
+        )
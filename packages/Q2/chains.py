@@ -79,9 +79,24 @@ def group_chain_example():
     print(f"Group results: {results}")
 
 
+# Example 5: Waiting on a chain without polling (see packages/Q2/notify.py)
+def notified_chain_example():
+    from packages.Q2.notify import wait_chain
+
+    chain = Chain()
+    chain.append("math.copysign", 1, -1)
+    chain.append("math.floor", 1)
+    chain.run()
+
+    # Resolves as soon as the last task is saved, instead of polling every 10ms
+    results = wait_chain(chain, timeout=5)
+    print(f"Results from notified chain: {results}")
+
+
 if __name__ == "__main__":
     # Run examples
     async_chain_example()
     chain_class_example()
     sync_chain_example()
     group_chain_example()
+    notified_chain_example()
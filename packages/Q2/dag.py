@@ -0,0 +1,262 @@
+# DAG executor on top of Django Q
+#
+# Chain runs its tasks one after another. A DAG declares each task's
+# dependencies instead: every task whose dependencies have finished is submitted
+# right away with async_task, so independent steps run concurrently on the
+# cluster, and each task receives its upstream results as extra positional
+# arguments (in the order of `depends_on`). With cached=True results go to the
+# cache backend instead of the database, as with Chain(cached=True).
+#
+#   python -m packages.Q2.local_cluster dag
+#   python -m packages.Q2.local_cluster dag --example weekly_example
+
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from django.utils.module_loading import import_string
+from django_q.brokers import Broker
+from django_q.tasks import async_task, fetch_group
+
+DEFAULT_POLL_INTERVAL = 0.1  # seconds
+
+Func = Union[str, Callable[..., Any]]
+
+
+def run_node(func: Func, *args, **kwargs) -> Dict[str, Any]:
+    """
+    Task body for every DAG node: runs `func` and times it on the worker, so the
+    report reflects execution time rather than time spent queued.
+    """
+    if isinstance(func, str):
+        func = import_string(func)
+    started = time.perf_counter()
+    value = func(*args, **kwargs)
+    return {"value": value, "seconds": time.perf_counter() - started}
+
+
+@dataclass
+class Node:
+    name: str
+    func: Func
+    args: Tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass
+class DAGResult:
+    results: Dict[str, Any]
+    errors: Dict[str, str]
+    durations: Dict[str, float]  # execution seconds per completed node
+    critical_path: List[str]
+    wall_time: float
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def critical_path_time(self) -> float:
+        return sum(self.durations.get(name, 0.0) for name in self.critical_path)
+
+    @property
+    def sequential_time(self) -> float:
+        # What a Chain running the same tasks one by one would spend executing them
+        return sum(self.durations.values())
+
+    def report(self) -> str:
+        return (
+            f"critical path {' -> '.join(self.critical_path)}: "
+            f"{self.critical_path_time:.2f}s; sequential chain: "
+            f"{self.sequential_time:.2f}s; wall time: {self.wall_time:.2f}s"
+        )
+
+
+class DAG:
+    """
+    A set of Django Q tasks with declared dependencies.
+    """
+
+    def __init__(
+        self,
+        group: Optional[str] = None,
+        cached: Union[bool, int] = False,
+        sync: bool = False,
+        broker: Optional[Broker] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        self.group = group or f"dag-{uuid.uuid4().hex}"
+        self.cached = cached
+        self.sync = sync
+        self.broker = broker
+        self.poll_interval = poll_interval
+        self.nodes: Dict[str, Node] = {}
+
+    def add(
+        self, name: str, func: Func, *args, depends_on: Sequence[str] = (), **kwargs
+    ) -> str:
+        """
+        Add a task; its upstream results are appended to `args` in `depends_on` order.
+        """
+        if name in self.nodes:
+            raise ValueError(f"Duplicate DAG node: {name}")
+        self.nodes[name] = Node(name, func, args, kwargs, tuple(depends_on))
+        return name
+
+    def order(self) -> List[str]:
+        """
+        Node names in a topological order; raises ValueError on a cycle or an
+        unknown dependency.
+        """
+        for node in self.nodes.values():
+            for dependency in node.depends_on:
+                if dependency not in self.nodes:
+                    raise ValueError(f"{node.name} depends on unknown node {dependency}")
+        remaining = {name: set(node.depends_on) for name, node in self.nodes.items()}
+        ordered = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Cycle between DAG nodes: {', '.join(sorted(remaining))}")
+            for name in ready:
+                del remaining[name]
+                ordered.append(name)
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return ordered
+
+    def critical_path(self, durations: Dict[str, float]) -> List[str]:
+        # Longest path through the DAG, weighting each node by its duration
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for name in self.order():
+            upstream = max(
+                self.nodes[name].depends_on, key=lambda dep: finish[dep], default=None
+            )
+            previous[name] = upstream
+            finish[name] = durations.get(name, 0.0) + (finish[upstream] if upstream else 0.0)
+        if not finish:
+            return []
+        name = max(finish, key=finish.get)
+        path = []
+        while name is not None:
+            path.append(name)
+            name = previous[name]
+        return path[::-1]
+
+    def _submit(self, node: Node, results: Dict[str, Any]) -> str:
+        upstream = [results[dependency] for dependency in node.depends_on]
+        options = {
+            "group": self.group,
+            "task_name": f"{self.group}-{node.name}",
+            "cached": self.cached,
+            "sync": self.sync,
+        }
+        if self.broker is not None:
+            options["broker"] = self.broker
+        return async_task(
+            run_node, node.func, *node.args, *upstream, q_options=options, **node.kwargs
+        )
+
+    def run(self, timeout: Optional[float] = None) -> DAGResult:
+        """
+        Submit every ready node, wait for the whole DAG and return the results.
+        A failed node's downstream nodes are not run and are reported as errors.
+        """
+        self.order()  # validate before submitting anything
+        started = time.perf_counter()
+        results: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        durations: Dict[str, float] = {}
+        running: Dict[str, str] = {}  # task id -> node name
+        waiting = dict(self.nodes)
+
+        while waiting or running:
+            # Skip nodes below a failure, then submit everything that is ready
+            for name, node in list(waiting.items()):
+                failed = [dep for dep in node.depends_on if dep in errors]
+                if failed:
+                    errors[name] = f"Upstream node {failed[0]} failed."
+                    del waiting[name]
+                elif all(dep in results for dep in node.depends_on):
+                    del waiting[name]
+                    try:
+                        running[self._submit(node, results)] = name
+                    except Exception as e:
+                        # In sync mode the task runs inline and its error is raised here
+                        if not self.sync:
+                            raise
+                        errors[name] = str(e)
+
+            finished = {}
+            if running:
+                # One group query per poll, however many nodes are running
+                tasks = fetch_group(self.group, failures=True, cached=self.cached)
+                for task in tasks or []:
+                    if task.id in running:
+                        finished[task.id] = task
+            for task_id, task in finished.items():
+                name = running.pop(task_id)
+                if task.success:
+                    results[name] = task.result["value"]
+                    durations[name] = task.result["seconds"]
+                else:
+                    errors[name] = str(task.result)
+
+            if not finished and running:
+                if timeout is not None and time.perf_counter() - started > timeout:
+                    for name in running.values():
+                        errors[name] = "Timed out."
+                    for name in waiting:
+                        errors[name] = "Not started before the timeout."
+                    break
+                time.sleep(self.poll_interval)
+
+        return DAGResult(
+            results=results,
+            errors=errors,
+            durations=durations,
+            critical_path=self.critical_path(durations),
+            wall_time=time.perf_counter() - started,
+        )
+
+
+# Example helpers; DAG tasks must be importable by the workers
+def slow(func: str, *args, seconds: float = 1.0):
+    time.sleep(seconds)
+    return import_string(func)(*args)
+
+
+def total(*values):
+    return sum(values)
+
+
+# Example 1: the Chain example's independent steps, run side by side
+def local_example():
+    dag = DAG(cached=True)
+    dag.add("copysign", slow, "math.copysign", 1, -1)
+    dag.add("floor", slow, "math.floor", 1.5)
+    dag.add("sqrt", slow, "math.sqrt", 16)
+    dag.add("total", total, depends_on=["copysign", "floor", "sqrt"])
+    result = dag.run(timeout=60)
+    print(f"Results: {result.results}")
+    print(result.report())
+
+
+# Example 2: two weekly summaries in parallel, then their comparison
+def weekly_comparison(current: Dict[str, Any], previous: Dict[str, Any]):
+    from packages.Q2.summary_tasks import compare_task
+
+    return compare_task(0, current["value"], previous["value"])
+
+
+def weekly_example():
+    dag = DAG()
+    dag.add("this_week", "packages.Q2.summary_tasks.summarize_task", 0, "Week 2 statistics")
+    dag.add("last_week", "packages.Q2.summary_tasks.summarize_task", 1, "Week 1 statistics")
+    dag.add("comparison", weekly_comparison, depends_on=["this_week", "last_week"])
+    result = dag.run(timeout=120)
+    print(result.results["comparison"]["value"]["comparison_summary"] if result.ok else result.errors)
+    print(result.report())
@@ -0,0 +1,149 @@
+# Local Django Q setup for trying the Q2 task modules without a project:
+# an ORM broker on a SQLite database, a cluster started in this process and the
+# offline fake OpenAI server from the Instructor load tests.
+#
+# Django Q reads its settings on import, so this module configures Django before
+# importing the module to run. From the repository root:
+#
+#   python -m packages.Q2.local_cluster summary_tasks
+#
+# runs packages.Q2.summary_tasks.local_example() against a fresh cluster.
+
+import argparse
+import contextlib
+import importlib
+import os
+import shutil
+from typing import Any, Dict, Iterator, Optional
+
+DEFAULT_DATABASE = "q2_local.sqlite3"
+
+
+def configure_local(
+    database: str = DEFAULT_DATABASE,
+    workers: int = 4,
+    fake_openai: bool = True,
+    q_cluster: Optional[Dict[str, Any]] = None,
+    **extra_settings,
+) -> None:
+    """
+    Configure Django for a local ORM-broker cluster and migrate the database.
+    """
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    openai_settings = {}
+    if fake_openai:
+        from packages.Instructor.loadtest.fake_openai import (
+            FakeConfig,
+            base_url,
+            start_server,
+        )
+
+        server = start_server(FakeConfig(latency_median=0.2, latency_sigma=0.3))
+        openai_settings = {
+            "OPENAI_API_KEY": "sk-fake",
+            "OPENAI_BASE_URL": base_url(server),
+            "OPENAI_RETRY_ATTEMPTS": 3,
+            "OPENAI_RETRY_WAIT_MULTIPLIER": 0.1,
+            "OPENAI_RETRY_WAIT_MIN": 0,
+            "OPENAI_RETRY_WAIT_MAX": 1,
+        }
+
+    settings.configure(
+        INSTALLED_APPS=["django_q"],
+        DATABASES={
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": database,
+                # Several processes poll the ORM broker at once: WAL lets reads
+                # run alongside the single writer, and IMMEDIATE transactions
+                # take the write lock up front, so a busy database is waited on
+                # (up to `timeout`) instead of failing with "database is locked"
+                "OPTIONS": {
+                    "timeout": 20,
+                    "transaction_mode": "IMMEDIATE",
+                    "init_command": "PRAGMA journal_mode=WAL;",
+                },
+            }
+        },
+        USE_TZ=True,
+        SECRET_KEY="local-only",  # Django Q signs task packages
+        # Shared between the cluster's worker processes, for cached=True results
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": f"{database}.cache",
+            }
+        },
+        Q_CLUSTER={
+            "name": "local",
+            "orm": "default",
+            "workers": workers,
+            "timeout": 120,
+            "retry": 180,
+            "save_limit": 0,
+            "poll": 0.1,
+            **(q_cluster or {}),
+        },
+        # Completion notifications for packages.Q2.notify
+        **{
+            "Q_NOTIFY_BACKEND": "local",
+            "Q_NOTIFY_PATH": f"{database}.notify",
+            **openai_settings,
+            **extra_settings,
+        },
+    )
+    django.setup()
+    call_command("migrate", verbosity=0)
+
+
+@contextlib.contextmanager
+def running_cluster() -> Iterator[Any]:
+    """
+    Start a Django Q cluster in this process for the duration of the block.
+    """
+    from django_q.brokers import get_broker
+    from django_q.cluster import Cluster
+
+    cluster = Cluster(get_broker())
+    cluster.start()
+    try:
+        yield cluster
+    finally:
+        cluster.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a Q2 example on a local cluster")
+    parser.add_argument("module", help="module in packages.Q2, e.g. summary_tasks")
+    parser.add_argument("--example", default="local_example")
+    parser.add_argument("--database", default=DEFAULT_DATABASE)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--no-cluster",
+        action="store_true",
+        help="don't start a cluster, for examples that manage their own",
+    )
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        os.remove(args.database)
+    for directory in (f"{args.database}.cache", f"{args.database}.notify"):
+        shutil.rmtree(directory, ignore_errors=True)
+    configure_local(args.database, args.workers)
+    # Connect the completion publisher before the cluster forks, as a project's
+    # AppConfig.ready() would
+    importlib.import_module("packages.Q2.notify")
+    module = importlib.import_module(f"packages.Q2.{args.module}")
+    example = getattr(module, args.example)
+    if args.no_cluster:
+        example()
+        return
+    with running_cluster():
+        example()
+
+
+if __name__ == "__main__":
+    main()
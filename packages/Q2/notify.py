@@ -0,0 +1,532 @@
+# Event-driven waiting for Django Q tasks, groups and chains
+#
+# result(wait=...) and result_group(count=...) poll the result backend every
+# 10ms, one query per poll per waiter. Here the cluster's monitor publishes a
+# small message when it has saved a task (post_execute signal) and waiters
+# resolve as soon as the message for their task or group arrives:
+#
+#   results = await await_chain(chain, timeout=30)
+#   results = await await_group(group_id, count=2, timeout=30)
+#   result = await await_task(task_id, timeout=30)
+#
+# (wait_chain / wait_group / wait_task are the blocking equivalents.) A waiter
+# checks the backend once when it starts, once more when its count is reached to
+# read the results, and otherwise only every Q_NOTIFY_FALLBACK_INTERVAL seconds
+# in case a message was lost.
+#
+# Settings:
+#   Q_NOTIFY_BACKEND  "local" (Unix datagram sockets in Q_NOTIFY_PATH, for one
+#                     host), "redis" (pub/sub on the Django Q Redis connection),
+#                     or unset to poll with backoff instead
+#   Q_NOTIFY_PATH     socket directory for the local backend
+#   Q_NOTIFY_CHANNEL  Redis channel name
+#
+# The publishing receiver is connected when this module is imported, so import
+# it in an AppConfig.ready() of the project running the cluster.
+#
+#   python -m packages.Q2.local_cluster notify
+#   python -m packages.Q2.local_cluster notify --example benchmark_example
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.dispatch import receiver
+from django_q.brokers import get_broker
+from django_q.models import Task
+from django_q.signals import post_execute
+from django_q.signing import SignedPackage
+from django_q.tasks import Chain, async_chain, result_group
+
+DEFAULT_CHANNEL = "django_q:completed"
+DEFAULT_FALLBACK_INTERVAL = 5.0  # seconds between safety checks with a notifier
+POLL_MIN_INTERVAL = 0.05  # polling fallback without a notifier, doubling up to
+POLL_MAX_INTERVAL = 1.0  # this interval
+
+Event = Dict[str, Any]
+
+
+class LocalNotifier:
+    """
+    Pub/sub between processes on one host: every listener binds a Unix datagram
+    socket in `directory` and a publisher sends each message to all of them.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def publish(self, event: Event) -> None:
+        payload = json.dumps(event).encode()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            for name in os.listdir(self.directory):
+                if not name.endswith(".sock"):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    sock.sendto(payload, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # The listening process is gone
+                    with contextlib.suppress(OSError):
+                        os.remove(path)
+                except BlockingIOError:
+                    logging.warning(f"Notification listener {path} is not keeping up.")
+
+    def listen(self, callback: Callable[[Event], None]) -> Callable[[], None]:
+        path = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex}.sock")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(path)
+
+        def run():
+            while True:
+                try:
+                    payload = sock.recv(65536)
+                except OSError:
+                    return  # closed
+                callback(json.loads(payload))
+
+        threading.Thread(target=run, name="q-notify-local", daemon=True).start()
+
+        def close():
+            sock.close()
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+        return close
+
+
+class RedisNotifier:
+    """
+    Pub/sub on a Redis channel, using the Django Q Redis connection settings.
+    """
+
+    def __init__(self, channel: str = DEFAULT_CHANNEL):
+        from django_q.brokers.redis_broker import Redis
+
+        self.channel = channel
+        self.connection = Redis.get_connection()
+
+    def publish(self, event: Event) -> None:
+        self.connection.publish(self.channel, json.dumps(event))
+
+    def listen(self, callback: Callable[[Event], None]) -> Callable[[], None]:
+        pubsub = self.connection.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+
+        def run():
+            try:
+                for message in pubsub.listen():
+                    callback(json.loads(message["data"]))
+            except Exception as e:
+                if pubsub.connection is not None:
+                    logging.error(f"Redis notification listener stopped: {e}")
+
+        threading.Thread(target=run, name="q-notify-redis", daemon=True).start()
+        return pubsub.close
+
+
+def create_notifier(backend: Optional[str]):
+    if not backend:
+        return None
+    if backend == "local":
+        return LocalNotifier(
+            getattr(settings, "Q_NOTIFY_PATH", None)
+            or os.path.join(tempfile.gettempdir(), "django_q_notify")
+        )
+    if backend == "redis":
+        return RedisNotifier(getattr(settings, "Q_NOTIFY_CHANNEL", DEFAULT_CHANNEL))
+    raise ValueError(f"Unknown Q_NOTIFY_BACKEND: {backend}")
+
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier():
+    """
+    Return the process-wide notifier for settings.Q_NOTIFY_BACKEND, or None.
+    """
+    global _notifier
+    if _notifier is None:
+        with _notifier_lock:
+            if _notifier is None:
+                _notifier = create_notifier(getattr(settings, "Q_NOTIFY_BACKEND", None))
+    return _notifier
+
+
+@receiver(post_execute, dispatch_uid="packages.Q2.notify.publish_completion")
+def publish_completion(sender, task, **kwargs):
+    # Runs in the cluster's monitor process, after the task has been saved
+    notifier = get_notifier()
+    if notifier is None:
+        return
+    try:
+        notifier.publish(
+            {"id": task["id"], "group": task.get("group"), "success": task["success"]}
+        )
+    except Exception as e:
+        # Waiters still find the task on their next fallback check
+        logging.error(f"Failed to publish completion of task {task['id']}: {e}")
+
+
+class Waiter:
+    """
+    Completion messages for one task id or group, delivered to an asyncio loop.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.ids: Set[str] = set()
+        self.event = asyncio.Event()
+
+    def _deliver(self, task_id: str) -> None:
+        self.ids.add(task_id)
+        self.event.set()
+
+    def notify(self, task_id: str) -> None:
+        # Called from the listener thread
+        try:
+            self.loop.call_soon_threadsafe(self._deliver, task_id)
+        except RuntimeError:
+            pass  # the loop has closed
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait for a message; False if `timeout` passed without one.
+        """
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+
+class Listener:
+    """
+    One subscription per process, dispatching messages to the registered waiters.
+    """
+
+    def __init__(self, notifier):
+        self.lock = threading.Lock()
+        self.waiters: Dict[Tuple[str, str], List[Waiter]] = {}
+        self.close = notifier.listen(self.dispatch)
+
+    def dispatch(self, event: Event) -> None:
+        keys = [("task", event["id"])]
+        if event.get("group"):
+            keys.append(("group", event["group"]))
+        with self.lock:
+            waiters = [w for key in keys for w in self.waiters.get(key, ())]
+        for waiter in waiters:
+            waiter.notify(event["id"])
+
+    def watch(self, key: Tuple[str, str]) -> Waiter:
+        waiter = Waiter(asyncio.get_running_loop())
+        with self.lock:
+            self.waiters.setdefault(key, []).append(waiter)
+        return waiter
+
+    def unwatch(self, key: Tuple[str, str], waiter: Waiter) -> None:
+        with self.lock:
+            waiters = self.waiters.get(key, [])
+            if waiter in waiters:
+                waiters.remove(waiter)
+            if not waiters:
+                self.waiters.pop(key, None)
+
+
+_listener: Optional[Listener] = None
+_listener_lock = threading.Lock()
+
+
+def get_listener() -> Optional[Listener]:
+    """
+    Return the process-wide listener, or None when no notifier is configured.
+    """
+    global _listener
+    if _listener is None:
+        notifier = get_notifier()
+        if notifier is None:
+            return None
+        with _listener_lock:
+            if _listener is None:
+                _listener = Listener(notifier)
+    return _listener
+
+
+# Backend reads, run off the event loop with sync_to_async
+def _finished_ids(key: Tuple[str, str], cached: bool) -> Set[str]:
+    kind, value = key
+    if cached:
+        broker = get_broker()
+        if kind == "task":
+            found = broker.cache.get(f"{broker.list_key}:{value}") is not None
+            return {value} if found else set()
+        prefix = f"{broker.list_key}:"
+        keys = broker.cache.get(f"{prefix}{value}:keys") or []
+        return {task_key[len(prefix) :] for task_key in keys}
+    if kind == "task":
+        return set(Task.objects.filter(id=value).values_list("id", flat=True))
+    return set(Task.objects.filter(group=value).values_list("id", flat=True))
+
+
+def _task_result(task_id: str, cached: bool) -> Any:
+    if cached:
+        broker = get_broker()
+        package = broker.cache.get(f"{broker.list_key}:{task_id}")
+        return SignedPackage.loads(package)["result"] if package else None
+    return Task.get_result(task_id)
+
+
+def _group_results(group_id: str, failures: bool, cached: bool) -> Optional[List[Any]]:
+    # wait=0: read once, without polling; listed so no query runs on the loop later
+    results = result_group(group_id, failures=failures, cached=cached)
+    return None if results is None else list(results)
+
+
+async def _wait_until(
+    key: Tuple[str, str],
+    count: int,
+    timeout: Optional[float],
+    cached: bool,
+    fallback_interval: Optional[float],
+) -> bool:
+    """
+    Wait until `count` tasks matching `key` have finished; False on timeout.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    listener = get_listener()
+    waiter = listener.watch(key) if listener else None
+    if fallback_interval is None:
+        fallback_interval = getattr(
+            settings, "Q_NOTIFY_FALLBACK_INTERVAL", DEFAULT_FALLBACK_INTERVAL
+        )
+    poll_interval = POLL_MIN_INTERVAL
+    try:
+        # Subscribed before this first check, so no completion can fall in between
+        finished = await sync_to_async(_finished_ids)(key, cached)
+        while True:
+            if waiter:
+                finished |= waiter.ids
+            if len(finished) >= count:
+                return True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            if waiter:
+                interval = fallback_interval
+            else:
+                interval, poll_interval = poll_interval, min(poll_interval * 2, POLL_MAX_INTERVAL)
+            if remaining is not None:
+                interval = min(interval, remaining)
+            if waiter:
+                if not await waiter.wait(interval):
+                    finished = await sync_to_async(_finished_ids)(key, cached)
+            else:
+                await asyncio.sleep(interval)
+                finished = await sync_to_async(_finished_ids)(key, cached)
+    finally:
+        if waiter:
+            listener.unwatch(key, waiter)
+
+
+async def await_task(
+    task_id: str,
+    timeout: Optional[float] = None,
+    cached: bool = False,
+    fallback_interval: Optional[float] = None,
+) -> Any:
+    """
+    The task's result once it has finished, or None on timeout.
+    """
+    if await _wait_until(("task", task_id), 1, timeout, cached, fallback_interval):
+        return await sync_to_async(_task_result)(task_id, cached)
+    return None
+
+
+async def await_group(
+    group_id: str,
+    count: int,
+    timeout: Optional[float] = None,
+    failures: bool = False,
+    cached: bool = False,
+    fallback_interval: Optional[float] = None,
+) -> Optional[List[Any]]:
+    """
+    Results of the group once `count` of its tasks have finished, successful or
+    not; on timeout, the results available so far. Like result_group, failed
+    tasks' results are only included with failures=True.
+    """
+    await _wait_until(("group", group_id), count, timeout, cached, fallback_interval)
+    return await sync_to_async(_group_results)(group_id, failures, cached)
+
+
+async def await_chain(
+    chain: Chain,
+    timeout: Optional[float] = None,
+    failures: bool = False,
+    fallback_interval: Optional[float] = None,
+) -> Optional[List[Any]]:
+    """
+    Results of a chain that has been run, once every link has finished.
+    """
+    return await await_group(
+        chain.group,
+        chain.length(),
+        timeout=timeout,
+        failures=failures,
+        cached=chain.cached,
+        fallback_interval=fallback_interval,
+    )
+
+
+def wait_task(task_id: str, **options) -> Any:
+    return asyncio.run(await_task(task_id, **options))
+
+
+def wait_group(group_id: str, count: int, **options) -> Optional[List[Any]]:
+    return asyncio.run(await_group(group_id, count, **options))
+
+
+def wait_chain(chain: Chain, **options) -> Optional[List[Any]]:
+    return asyncio.run(await_chain(chain, **options))
+
+
+# Example 1: awaiting many chains at once
+def local_example(chains: int = 20):
+    started = []
+    for n in range(chains):
+        chain = Chain()
+        chain.append("math.copysign", n, -1)
+        chain.append("math.floor", n + 0.5)
+        chain.run()
+        started.append(chain)
+
+    async def run():
+        return await asyncio.gather(*(await_chain(chain, timeout=60) for chain in started))
+
+    results = asyncio.run(run())
+    print(f"{len(results)} chains finished; first: {results[0]}")
+
+
+# Example 2: database queries and wake-up latency, polling versus notifications
+class QueryCounter:
+    """
+    Counts queries on every database connection of this process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _count_queries(counter: QueryCounter):
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def install(sender, connection, **kwargs):
+        if counter not in connection.execute_wrappers:
+            connection.execute_wrappers.append(counter)
+
+    connection_created.connect(install, weak=False)
+    for connection in connections.all():
+        install(None, connection)
+    return lambda: connection_created.disconnect(install)
+
+
+def _wake_up_latency(group_id: str, woke: float) -> float:
+    # From the last link being saved to its waiter returning
+    stopped = max(Task.objects.filter(group=group_id).values_list("stopped", flat=True))
+    return woke - stopped.timestamp()
+
+
+def _start_chains(chains: int) -> List[str]:
+    return [
+        async_chain([("time.sleep", (0.2,)), ("math.floor", (n + 0.5,))])
+        for n in range(chains)
+    ]
+
+
+def _poll_with_result_group(chains: int) -> Dict[str, float]:
+    groups = _start_chains(chains)
+
+    def wait(group_id):
+        from django.db import connection
+
+        try:
+            result_group(group_id, count=2, wait=60000)
+            return time.time()
+        finally:
+            connection.close()
+
+    # One blocking waiter per chain, as with chain.result(wait=...) in views
+    with ThreadPoolExecutor(max_workers=chains) as pool:
+        woke = list(pool.map(wait, groups))
+    return {group_id: at for group_id, at in zip(groups, woke)}
+
+
+def _await_with_notify(chains: int) -> Dict[str, float]:
+    groups = _start_chains(chains)
+
+    async def wait(group_id):
+        await await_group(group_id, 2, timeout=60)
+        return time.time()
+
+    async def run():
+        return await asyncio.gather(*(wait(group_id) for group_id in groups))
+
+    return dict(zip(groups, asyncio.run(run())))
+
+
+def benchmark_example(chains: int = 50):
+    global _notifier, _listener
+
+    modes = [
+        ("result_group polling", None, _poll_with_result_group),
+        ("await_group, polling fallback", None, _await_with_notify),
+        ("await_group, local notifier", "local", _await_with_notify),
+    ]
+    print(f"{chains} two-link chains per run, waited on concurrently")
+    for label, backend, run in modes:
+        # The cluster keeps publishing with its configured notifier; only this
+        # process switches between listening and polling
+        with _notifier_lock:
+            if _listener is not None:
+                _listener.close()
+            _listener = None
+            _notifier = create_notifier(backend)
+
+        counter = QueryCounter()
+        stop_counting = _count_queries(counter)
+        started = time.perf_counter()
+        try:
+            woke = run(chains)
+        finally:
+            stop_counting()
+        elapsed = time.perf_counter() - started
+        latencies = sorted(
+            _wake_up_latency(group_id, at) * 1000 for group_id, at in woke.items()
+        )
+        print(
+            f"{label:32} {counter.count:6} queries, wake-up latency median "
+            f"{statistics.median(latencies):6.1f}ms p95 "
+            f"{latencies[int(0.95 * (len(latencies) - 1))]:6.1f}ms, {elapsed:.1f}s"
+        )
@@ -0,0 +1,224 @@
+# Fan-out / fan-in summary generation over Django Q
+#
+# Summaries are fanned out as Django Q tasks in a group, keeping at most
+# `max_in_flight` tasks queued or running on the cluster. Results are collected
+# with result_group and fed into a fan-in stage that compares each property's
+# current week with its previous week, from the stored key metrics.
+#
+# Successful results must be saved for result_group to see them, so the cluster
+# needs "save_limit": 0 (keep all) or a limit above the group size.
+#
+# Run the local demo (ORM broker on SQLite, fake OpenAI server) from the
+# repository root:
+#
+#   python -m packages.Q2.local_cluster summary_tasks
+
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django_q.brokers import Broker, get_broker
+from django_q.conf import Conf
+from django_q.tasks import async_task, count_group, fetch_group, result_group
+
+DEFAULT_POLL_INTERVAL = 0.5  # seconds
+
+
+# Task bodies. Each returns its input index with the result so that results
+# collected with result_group (which are unordered) can be put back in order.
+def summarize_task(index: int, statistical_summary: str) -> Dict[str, Any]:
+    from packages.Instructor.summary_generator import generate_summary
+
+    return {"index": index, "value": generate_summary(statistical_summary).model_dump()}
+
+
+def compare_task(
+    index: int, current: Dict[str, Any], previous: Dict[str, Any]
+) -> Dict[str, Any]:
+    from packages.Instructor.comparison_generator import generate_comparison_from_metrics
+    from packages.Instructor.schemas import SummaryOutput
+
+    comparison = generate_comparison_from_metrics(
+        SummaryOutput.model_validate(current).to_vector(),
+        SummaryOutput.model_validate(previous).to_vector(),
+    )
+    return {"index": index, "value": comparison.model_dump()}
+
+
+@dataclass
+class TaskResult:
+    index: int
+    value: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def default_max_in_flight() -> int:
+    # Enough to keep every worker busy with one task queued behind it
+    return getattr(settings, "Q_MAX_IN_FLIGHT", None) or Conf.WORKERS * 2
+
+
+def cluster_in_flight(broker: Broker) -> Optional[int]:
+    """
+    Tasks queued or being processed on the cluster, or None if the broker
+    cannot tell (only brokers that track locks, such as the ORM broker, can).
+    """
+    lock_size = broker.lock_size()
+    if lock_size is None:
+        return None
+    return broker.queue_size() + lock_size
+
+
+class FanOut:
+    """
+    Submits tasks to one Django Q group with backpressure: `submit` blocks while
+    `max_in_flight` tasks are outstanding, counted both for this group and,
+    where the broker supports it, for the whole cluster.
+    """
+
+    def __init__(
+        self,
+        func,
+        group: Optional[str] = None,
+        max_in_flight: Optional[int] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        broker: Optional[Broker] = None,
+    ):
+        self.func = func
+        self.group = group or f"fanout-{uuid.uuid4().hex}"
+        self.max_in_flight = max_in_flight or default_max_in_flight()
+        self.poll_interval = poll_interval
+        self.broker = broker or get_broker()
+        self.indices: List[int] = []
+
+    def completed(self) -> int:
+        # Finished tasks of the group, successful or failed
+        return count_group(self.group, cached=False)
+
+    def in_flight(self) -> int:
+        own = len(self.indices) - self.completed()
+        cluster = cluster_in_flight(self.broker)
+        return own if cluster is None else max(own, cluster)
+
+    def submit(self, index: int, *args) -> None:
+        while self.in_flight() >= self.max_in_flight:
+            time.sleep(self.poll_interval)
+        async_task(
+            self.func,
+            index,
+            *args,
+            group=self.group,
+            task_name=f"{self.group}-{index}",
+            broker=self.broker,
+        )
+        self.indices.append(index)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every submitted task has finished; False on timeout.
+        """
+        started = time.monotonic()
+        while self.completed() < len(self.indices):
+            if timeout is not None and time.monotonic() - started > timeout:
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+    def results(self) -> List[TaskResult]:
+        """
+        Results in submission order; failed or unfinished tasks carry an error.
+        """
+        collected: Dict[int, TaskResult] = {}
+        for result in result_group(self.group, cached=False) or []:
+            collected[result["index"]] = TaskResult(result["index"], result["value"])
+        for task in fetch_group(self.group, failures=True, cached=False) or []:
+            if not task.success:
+                collected[task.args[0]] = TaskResult(task.args[0], error=str(task.result))
+        return [
+            collected.get(index, TaskResult(index, error="Task did not finish."))
+            for index in self.indices
+        ]
+
+
+def fan_out_summaries(
+    statistical_summaries: Sequence[str], **options
+) -> FanOut:
+    fan_out = FanOut(summarize_task, **options)
+    for index, statistical_summary in enumerate(statistical_summaries):
+        fan_out.submit(index, statistical_summary)
+    return fan_out
+
+
+def fan_in_comparisons(
+    current: Sequence[TaskResult], previous: Sequence[TaskResult], **options
+) -> FanOut:
+    """
+    Compare each current-week summary with the previous-week summary at the same
+    position. Pairs with a failed summary are skipped.
+    """
+    fan_out = FanOut(compare_task, **options)
+    for index, (this_week, last_week) in enumerate(zip(current, previous)):
+        if this_week.ok and last_week.ok:
+            fan_out.submit(index, this_week.value, last_week.value)
+        else:
+            logging.warning(f"Skipping comparison {index}: a summary failed.")
+    return fan_out
+
+
+def summarize_and_compare(
+    current_week: Sequence[str],
+    previous_week: Sequence[str],
+    timeout: Optional[float] = None,
+    **options,
+) -> Tuple[List[TaskResult], List[TaskResult], List[TaskResult]]:
+    """
+    Summarize both weeks for every property in one task group, then compare the
+    pairs. Returns (current summaries, previous summaries, comparisons), each in
+    input order.
+    """
+    if len(current_week) != len(previous_week):
+        raise ValueError("Expected one previous-week summary per current-week summary.")
+
+    summaries = fan_out_summaries([*current_week, *previous_week], **options)
+    if not summaries.wait(timeout):
+        logging.warning(f"Timed out waiting for summary group {summaries.group}.")
+    results = summaries.results()
+    current, previous = results[: len(current_week)], results[len(current_week) :]
+
+    comparisons = fan_in_comparisons(current, previous, **options)
+    if not comparisons.wait(timeout):
+        logging.warning(f"Timed out waiting for comparison group {comparisons.group}.")
+    by_index = {result.index: result for result in comparisons.results()}
+    return (
+        current,
+        previous,
+        [
+            by_index.get(index, TaskResult(index, error="A summary failed."))
+            for index in range(len(current_week))
+        ],
+    )
+
+
+# Local demo, run through packages.Q2.local_cluster (ORM broker on SQLite and
+# the offline fake OpenAI server)
+def local_example(properties: int = 12):
+    started = time.perf_counter()
+    current, previous, comparisons = summarize_and_compare(
+        [f"Week 2 statistics for property {n}" for n in range(properties)],
+        [f"Week 1 statistics for property {n}" for n in range(properties)],
+        max_in_flight=6,
+        timeout=300,
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"{sum(r.ok for r in current + previous)} summaries and "
+        f"{sum(r.ok for r in comparisons)} comparisons in {elapsed:.1f}s"
+    )
+    first = comparisons[0]
+    print(first.value["comparison_summary"] if first.ok else first.error)
@@ -0,0 +1,139 @@
+# In-process metrics shared by the Instructor and Q2 packages
+#
+# Counters, gauges and histograms registered on one registry and rendered in the
+# Prometheus text exposition format, so every package's metrics are served from
+# a single endpoint (see packages.Instructor.observability.metrics_view):
+#
+#   from packages.metrics import render_prometheus
+#   print(render_prometheus())
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, LabelValues, float]  # (sample name, label values, value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        with self.lock:
+            items = list(self.values.items())
+        for label_values, value in items:
+            yield self.name, label_values, value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self.lock:
+            self.values[label_values] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # label values -> (per-bucket counts, sum, count)
+        self.values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total, count = self.values.get(
+                label_values, ([0] * (len(self.buckets) + 1), 0.0, 0)
+            )
+            counts[index] += 1
+            self.values[label_values] = (counts, total + value, count + 1)
+
+    def samples(self) -> Iterator[Sample]:
+        with self.lock:
+            items = [(k, (list(c), s, n)) for k, (c, s, n) in self.values.items()]
+        for label_values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                yield f"{self.name}_bucket", label_values + (le,), cumulative
+            yield f"{self.name}_sum", label_values, total
+            yield f"{self.name}_count", label_values, count
+
+
+class CallbackCounter:
+    """
+    A counter whose value is read from elsewhere (e.g. cache stats) at export time.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = ()
+        self.read = read
+
+    def samples(self) -> Iterator[Sample]:
+        yield self.name, (), self.read()
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = []
+
+    def register(self, metric):
+        with self.lock:
+            if any(existing.name == metric.name for existing in self.metrics):
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self.metrics.append(metric)
+        return metric
+
+    def render_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in list(self.metrics):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, label_values, value in metric.samples():
+                names = metric.labels + (("le",) if name.endswith("_bucket") else ())
+                labels = ",".join(
+                    f'{label}="{value}"' for label, value in zip(names, label_values)
+                )
+                lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def render_prometheus() -> str:
+    return registry.render_prometheus()
@@ -0,0 +1,77 @@
+# Django is configured once for the whole suite, as packages.Q2.local_cluster
+# does for the examples: a SQLite database with Django Q's tables, a local-memory
+# cache and OpenAI settings pointing at the offline fake server.
+
+import os
+import tempfile
+
+import django
+import pytest
+from django.conf import settings
+
+from packages.Instructor.loadtest.fake_openai import FakeConfig, base_url, start_server
+
+_directory = tempfile.mkdtemp(prefix="package-tests-")
+_fake_server = start_server(FakeConfig(latency_median=0.01, latency_sigma=0))
+
+settings.configure(
+    INSTALLED_APPS=["django_q"],
+    DATABASES={
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.path.join(_directory, "tests.sqlite3"),
+        }
+    },
+    USE_TZ=True,
+    SECRET_KEY="tests-only",
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    Q_CLUSTER={
+        "name": "tests",
+        "orm": "default",
+        "sync": True,
+        "timeout": 60,
+        "retry": 120,
+        "save_limit": 0,
+    },
+    OPENAI_API_KEY="sk-fake",
+    OPENAI_BASE_URL=base_url(_fake_server),
+    OPENAI_RETRY_ATTEMPTS=2,
+    OPENAI_RETRY_WAIT_MULTIPLIER=0,
+    OPENAI_RETRY_WAIT_MIN=0,
+    OPENAI_RETRY_WAIT_MAX=0,
+)
+django.setup()
+
+
+@pytest.fixture(scope="session")
+def database():
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+@pytest.fixture
+def fake_openai():
+    """
+    The fake OpenAI server, with its configuration and counters reset.
+    """
+    config = _fake_server.config
+    defaults = FakeConfig(latency_median=0.01, latency_sigma=0)
+    for name in vars(defaults):
+        setattr(config, name, getattr(defaults, name))
+    stats = _fake_server.stats
+    with stats.lock:
+        stats.requests = stats.ok = stats.errors = stats.throttled = 0
+    yield _fake_server
+
+
+@pytest.fixture(autouse=True)
+def fresh_singletons():
+    # Process-wide clients, caches and limiters start empty in every test
+    from packages.Instructor import cache, client, hedging, rate_limit
+
+    client.reset_clients()
+    cache._response_cache = None
+    rate_limit._rate_limiter = None
+    hedging._hedger = None
+    yield
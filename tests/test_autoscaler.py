@@ -0,0 +1,88 @@
+import math
+
+import pytest
+
+from packages.Q2.autoscaler import Autoscaler, Observation, ScalingPolicy
+
+
+def backlog(depth=100, in_flight=0, throughput=1.0):
+    return Observation(queue_depth=depth, in_flight=in_flight, throughput=throughput)
+
+
+IDLE = Observation(queue_depth=0, in_flight=0, throughput=0.0)
+
+
+def test_wait_estimate():
+    assert backlog(100, throughput=2.0).wait_estimate == 50
+    assert IDLE.wait_estimate == 0
+    assert backlog(5, throughput=0).wait_estimate == math.inf
+
+
+def test_policy_rejects_inverted_thresholds():
+    with pytest.raises(ValueError):
+        ScalingPolicy(scale_up_wait=5, scale_down_wait=10)
+
+
+def test_policy_scales_up_after_a_streak_in_proportion_to_the_backlog():
+    policy = ScalingPolicy(max_units=8, scale_up_wait=10, up_after=2, cooldown=0)
+    assert policy.decide(backlog(), 1, now=0).reason == "up_pending"
+    decision = policy.decide(backlog(), 1, now=1)
+    # A 100s wait against a 10s target asks for 10 units, capped at 8
+    assert (decision.action, decision.target) == ("scale_up", 8)
+
+
+def test_policy_holds_during_cooldown_and_in_the_band():
+    policy = ScalingPolicy(scale_up_wait=10, scale_down_wait=2, up_after=1, cooldown=60)
+    assert policy.decide(backlog(), 1, now=0).action == "scale_up"
+    assert policy.decide(backlog(), 2, now=30).reason == "cooldown"
+    assert policy.decide(backlog(5, throughput=1.0), 2, now=100).reason == "within_band"
+
+
+def test_policy_scales_down_one_unit_when_idle_and_not_busy():
+    policy = ScalingPolicy(min_units=1, workers_per_unit=2, down_after=2, cooldown=0)
+    assert policy.decide(IDLE, 3, now=0).reason == "down_pending"
+    decision = policy.decide(IDLE, 3, now=1)
+    assert (decision.action, decision.target) == ("scale_down", 2)
+    policy.decide(IDLE, 2, now=2)
+    # Three tasks running need both units' workers
+    assert policy.decide(Observation(0, 3, 0.0), 2, now=3).reason == "busy"
+
+
+def test_policy_applies_bounds_immediately():
+    policy = ScalingPolicy(min_units=2, max_units=3)
+    assert policy.decide(IDLE, 0, now=0).target == 2
+    assert policy.decide(IDLE, 5, now=0).target == 3
+
+
+class FakePool:
+    def __init__(self):
+        self.units = 0
+
+    def __len__(self):
+        return self.units
+
+    def scale_to(self, units):
+        self.units = units
+
+
+class FakeBroker:
+    def queue_size(self):
+        return 0
+
+    def lock_size(self):
+        return 0
+
+
+def test_autoscaler_tick_resizes_the_pool_and_exports_metrics(database):
+    from packages.metrics import render_prometheus
+
+    pool = FakePool()
+    autoscaler = Autoscaler(pool, ScalingPolicy(min_units=1, workers_per_unit=4), FakeBroker())
+    decision = autoscaler.tick()
+    assert (decision.action, decision.reason) == ("scale_up", "below_min")
+    assert len(pool) == 1
+    rendered = render_prometheus()
+    assert "q_autoscaler_workers 4" in rendered
+    assert 'q_autoscaler_decisions_total{action="scale_up",reason="below_min"}' in rendered
+    autoscaler.stop()
+    assert len(pool) == 0
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from packages.Instructor.batch import (
+    BatchManifest,
+    LocalBatchBackend,
+    run_batch,
+    strict_json_schema,
+)
+from packages.Instructor.loadtest.fake_openai import fake_value
+from packages.Instructor.schemas import SummaryOutput
+
+
+class Backend(LocalBatchBackend):
+    """
+    Local backend that answers from the schema and counts submissions.
+    """
+
+    def __init__(self, directory, fail=()):
+        super().__init__(str(directory), self.answer)
+        self.fail = fail
+        self.submitted = []
+        self.answered = []
+
+    def submit(self, input_path):
+        with open(input_path) as f:
+            self.submitted.append(len(f.readlines()))
+        return super().submit(input_path)
+
+    def answer(self, body):
+        prompt = body["messages"][-1]["content"]
+        if prompt in self.fail:
+            raise RuntimeError(f"upstream error for {prompt}")
+        self.answered.append(prompt)
+        schema = body["response_format"]["json_schema"]["schema"]
+        content = fake_value(schema, schema.get("$defs", {}))
+        content["dataset_summary"] = prompt
+        return {"choices": [{"message": {"role": "assistant", "content": json.dumps(content)}}]}
+
+
+def run(prompts, backend, manifest_path, model="gpt-4o"):
+    return run_batch(prompts, SummaryOutput, model, str(manifest_path), backend, poll_interval=0)
+
+
+def test_results_in_order_with_duplicates_requested_once(tmp_path):
+    backend = Backend(tmp_path / "batches", fail=["Week 2"])
+    results = run(["Week 1", "Week 2", "Week 1", "Week 3"], backend, tmp_path / "nightly.json")
+    assert backend.submitted == [3]
+    assert [r.value.dataset_summary if r.ok else None for r in results] == [
+        "Week 1", None, "Week 1", "Week 3",
+    ]
+    assert "upstream error for Week 2" in str(results[1].error)
+    assert results[0].value is not results[2].value
+    assert BatchManifest.load(str(tmp_path / "nightly.json")).status == "completed"
+
+
+def test_cached_prompts_are_not_submitted_again(tmp_path):
+    backend = Backend(tmp_path / "batches")
+    run(["Week 1", "Week 2"], backend, tmp_path / "nightly.json")
+    results = run(["Week 2", "Week 1", "Week 3"], backend, tmp_path / "nightly.json")
+    assert backend.submitted == [2, 1]
+    assert [r.value.dataset_summary for r in results] == ["Week 2", "Week 1", "Week 3"]
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def test_restarted_run_resumes_the_submitted_batch(tmp_path):
+    manifest_path = tmp_path / "nightly.json"
+    crashing = Backend(tmp_path / "batches")
+
+    def crash(body):
+        raise Interrupted()
+
+    crashing.respond = crash
+    with pytest.raises(Interrupted):
+        run(["Week 1", "Week 2"], crashing, manifest_path)
+    manifest = BatchManifest.load(str(manifest_path))
+    assert manifest.status == "submitted"
+
+    restarted = Backend(tmp_path / "batches")
+    results = run(["Week 1", "Week 2"], restarted, manifest_path)
+    assert restarted.submitted == []
+    assert restarted.answered == ["Week 1", "Week 2"]
+    assert all(result.ok for result in results)
+
+
+def test_a_different_model_submits_a_new_batch(tmp_path):
+    manifest_path = tmp_path / "nightly.json"
+    backend = Backend(tmp_path / "batches")
+    BatchManifest(
+        batch_id="batch_old", backend="local", model="gpt-4o", response_model="SummaryOutput",
+        custom_ids=[],
+    ).save(str(manifest_path))
+    run(["Week 1"], backend, manifest_path, model="gpt-4o-mini")
+    assert backend.submitted == [1]
+    assert BatchManifest.load(str(manifest_path)).model == "gpt-4o-mini"
+
+
+def test_default_responder_goes_through_the_openai_client(tmp_path, fake_openai):
+    backend = LocalBatchBackend(str(tmp_path / "batches"))
+    results = run(["Week 1", "Week 2"], backend, tmp_path / "nightly.json")
+    assert all(result.ok for result in results)
+    assert fake_openai.stats.snapshot()["requests"] == 2
+
+
+def test_strict_schema_requires_every_property():
+    schema = strict_json_schema(SummaryOutput.model_json_schema())
+    assert schema["required"] == ["dataset_summary", "key_metrics"]
+    metric = schema["$defs"]["KeyMetric"]
+    assert (metric["required"], metric["additionalProperties"]) == (["name", "value"], False)
@@ -0,0 +1,44 @@
+from packages.Q2.batching import (
+    COMPRESS_ABOVE,
+    Batcher,
+    CallResult,
+    decode,
+    decode_calls,
+    encode,
+    encode_calls,
+    run_batch,
+)
+
+
+def test_encode_compresses_only_large_payloads():
+    small, large = [1, 2, 3], list(range(COMPRESS_ABOVE))
+    assert encode(small)[:1] == b"p"
+    assert encode(large)[:1] == b"z"
+    assert decode(encode(small)) == small
+    assert decode(encode(large)) == large
+
+
+def test_calls_round_trip_with_sparse_kwargs():
+    calls = [((1,), {}), ((2, 3), {"ndigits": 1}), ((4,), {})]
+    assert decode_calls(encode_calls(calls)) == calls
+
+
+def test_run_batch_isolates_failing_calls():
+    payload = encode_calls([((16,), {}), ((-1,), {}), ((81,), {})])
+    assert decode(run_batch("math.sqrt", payload)) == [
+        (True, 4.0),
+        (False, "ValueError: math domain error"),
+        (True, 9.0),
+    ]
+
+
+def test_batcher_splits_results_back_per_call(database):
+    # Q_CLUSTER["sync"] runs each batch task inline
+    with Batcher("math.sqrt", max_batch=2, max_delay=None) as batcher:
+        indexes = [batcher.submit(x) for x in [16, -1, 81]]
+    results = batcher.results(timeout=10)
+    assert indexes == [0, 1, 2]
+    assert len(batcher.task_ids) == 2
+    assert results[0] == CallResult(0, 4.0)
+    assert not results[1].ok and "math domain error" in results[1].error
+    assert results[2] == CallResult(2, 9.0)
@@ -0,0 +1,115 @@
+import asyncio
+
+from packages.Instructor.cache import ResponseCache, cache_key, construct
+from packages.Instructor.schemas import ComparisonOutput, KeyMetric, SummaryOutput
+
+
+def summary(text):
+    return SummaryOutput(
+        dataset_summary=text, key_metrics=[KeyMetric(name="Bounce Rate", value=1.5)]
+    )
+
+
+class Recorder:
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        return summary(prompt)
+
+
+def test_cache_key_covers_prompt_model_and_schema():
+    key = cache_key("Week 1", "gpt-4o", SummaryOutput)
+    assert key == cache_key("Week 1", "gpt-4o", SummaryOutput)
+    assert key != cache_key("Week 2", "gpt-4o", SummaryOutput)
+    assert key != cache_key("Week 1", "gpt-4o-mini", SummaryOutput)
+    assert key != cache_key("Week 1", "gpt-4o", ComparisonOutput)
+
+
+def test_memory_tier_is_an_lru_that_hands_out_copies():
+    cache = ResponseCache(max_entries=2)
+    call = Recorder()
+    first = cache.get_or_call("a", "m", SummaryOutput, call)
+    first.dataset_summary = "changed by the caller"
+    assert cache.get_or_call("a", "m", SummaryOutput, call).dataset_summary == "a"
+    cache.get_or_call("b", "m", SummaryOutput, call)
+    cache.get_or_call("c", "m", SummaryOutput, call)  # evicts "a"
+    cache.get_or_call("a", "m", SummaryOutput, call)
+    assert call.prompts == ["a", "b", "c", "a"]
+    assert cache.stats == {"hits": 1, "misses": 4, "disk_hits": 0}
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("packages.Instructor.cache.time.time", lambda: now[0])
+    cache = ResponseCache(ttl=60)
+    call = Recorder()
+    cache.get_or_call("a", "m", SummaryOutput, call)
+    now[0] += 59
+    cache.get_or_call("a", "m", SummaryOutput, call)
+    now[0] += 2
+    cache.get_or_call("a", "m", SummaryOutput, call)
+    assert call.prompts == ["a", "a"]
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    call = Recorder()
+    ResponseCache(path=path).get_or_call("a", "m", SummaryOutput, call)
+
+    restarted = ResponseCache(path=path)
+    value = restarted.get_or_call("a", "m", SummaryOutput, call)
+    assert call.prompts == ["a"]
+    assert restarted.stats == {"hits": 1, "misses": 0, "disk_hits": 1}
+    # Rebuilt as models, without re-validating
+    assert isinstance(value.key_metrics[0], KeyMetric)
+    assert value == summary("a")
+    # Now in memory as well
+    restarted.get_or_call("a", "m", SummaryOutput, call)
+    assert restarted.stats["disk_hits"] == 1
+
+
+def test_disk_tier_evicts_least_recently_used_rows(tmp_path, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr("packages.Instructor.cache.time.time", lambda: next(clock))
+    cache = ResponseCache(path=str(tmp_path / "r.sqlite3"), max_disk_entries=2)
+    call = Recorder()
+    for prompt in ["a", "b"]:
+        cache.get_or_call(prompt, "m", SummaryOutput, call)
+    cache.memory.clear()
+    cache.get_or_call("a", "m", SummaryOutput, call)  # read from disk, so "b" is older
+    cache.get_or_call("c", "m", SummaryOutput, call)
+    stored = {p: cache.disk.get(cache_key(p, "m", SummaryOutput)) is not None for p in "abc"}
+    assert stored == {"a": True, "b": False, "c": True}
+
+
+def test_aget_or_call():
+    cache = ResponseCache()
+    calls = []
+
+    async def call(prompt):
+        calls.append(prompt)
+        return summary(prompt)
+
+    async def twice():
+        await cache.aget_or_call("a", "m", SummaryOutput, call)
+        return await cache.aget_or_call("a", "m", SummaryOutput, call)
+
+    assert asyncio.run(twice()) == summary("a")
+    assert calls == ["a"]
+
+
+def test_construct_rebuilds_nested_models():
+    value = construct(SummaryOutput, summary("a").model_dump())
+    assert isinstance(value.key_metrics[0], KeyMetric)
+    assert value.key_metrics[0].value == 1.5
+
+
+def test_generate_summary_calls_openai_once_per_prompt(fake_openai):
+    from packages.Instructor.summary_generator import generate_summary
+
+    first = generate_summary("Week 1 statistics")
+    assert generate_summary("Week 1 statistics") == first
+    generate_summary("Week 2 statistics")
+    assert fake_openai.stats.snapshot()["requests"] == 2
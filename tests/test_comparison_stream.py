@@ -0,0 +1,110 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from packages.Instructor import comparison_stream
+from packages.Instructor.schemas import ComparisonStreamOutput, KeyMetricComparison
+
+METRICS = [
+    KeyMetricComparison(name="Bounce Rate", value1=40.0, value2=42.0, description="Down."),
+    KeyMetricComparison(name="Conversion Rate", value1=2.0, value2=1.5, description="Up."),
+]
+
+
+def partials():
+    # What a streamed response looks like as it grows
+    half = KeyMetricComparison.model_construct(name="Conversion Rate", value1=2.0)
+    yield ComparisonStreamOutput.model_construct(key_metrics_comparison=[])
+    yield ComparisonStreamOutput.model_construct(key_metrics_comparison=METRICS[:1])
+    yield ComparisonStreamOutput.model_construct(key_metrics_comparison=[METRICS[0], half])
+    yield ComparisonStreamOutput.model_construct(key_metrics_comparison=METRICS)
+    for text in ["Traffic", "Traffic rose."]:
+        yield ComparisonStreamOutput.model_construct(
+            key_metrics_comparison=METRICS, comparison_summary=text
+        )
+
+
+def summarize(events):
+    return [
+        (event.kind, event.index if event.kind == "metric" else event.text)
+        for event in events
+        if event.kind != "final"
+    ]
+
+
+EXPECTED = [
+    ("metric", 0),
+    ("metric", 1),
+    ("summary", "Traffic"),
+    ("summary", " rose."),
+]
+
+
+def test_assembler_emits_each_metric_once_it_is_complete():
+    assembler = comparison_stream._ComparisonAssembler()
+    steps = [summarize(assembler.feed(partial)) for partial in partials()]
+    # The second metric only counts once the summary has started
+    assert steps == [
+        [],
+        [],
+        [("metric", 0)],
+        [],
+        [("metric", 1), ("summary", "Traffic")],
+        [("summary", " rose.")],
+    ]
+    (final,) = assembler.finish()
+    assert final.output.comparison_summary == "Traffic rose."
+    assert final.output.key_metrics_comparison == METRICS
+
+
+def test_assembler_rejects_an_empty_stream():
+    with pytest.raises(ValueError, match="ended without a response"):
+        comparison_stream._ComparisonAssembler().finish()
+
+
+@pytest.fixture
+def streaming_client(monkeypatch):
+    calls = []
+
+    def create_partial(**kwargs):
+        calls.append(kwargs)
+        return partials()
+
+    async def acreate_partial(**kwargs):
+        calls.append(kwargs)
+        for partial in partials():
+            yield partial
+
+    completions = SimpleNamespace(create_partial=create_partial)
+    async_completions = SimpleNamespace(create_partial=acreate_partial)
+    monkeypatch.setattr(
+        comparison_stream,
+        "get_client",
+        lambda: SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+    )
+    monkeypatch.setattr(
+        comparison_stream,
+        "get_async_client",
+        lambda: SimpleNamespace(chat=SimpleNamespace(completions=async_completions)),
+    )
+    return calls
+
+
+def test_stream_comparison_then_replays_from_the_cache(streaming_client):
+    events = list(comparison_stream.stream_comparison("Week 2", "Week 1"))
+    assert summarize(events) == EXPECTED
+    assert events[-1].kind == "final"
+    replayed = list(comparison_stream.stream_comparison("Week 2", "Week 1"))
+    assert summarize(replayed) == [("metric", 0), ("metric", 1), ("summary", "Traffic rose.")]
+    assert replayed[-1].output == events[-1].output
+    assert len(streaming_client) == 1
+
+
+def test_astream_comparison(streaming_client):
+    async def collect():
+        return [event async for event in comparison_stream.astream_comparison("W2", "W1")]
+
+    events = asyncio.run(collect())
+    assert summarize(events) == EXPECTED
+    assert streaming_client[0]["response_model"] is ComparisonStreamOutput
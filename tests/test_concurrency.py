@@ -0,0 +1,71 @@
+import asyncio
+
+from packages.Instructor.concurrency import run_many, stream_many
+
+
+def test_run_many_keeps_input_order_and_bounds_concurrency():
+    in_flight = 0
+    peak = 0
+
+    async def work(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later items finish first
+        await asyncio.sleep(0.01 * (5 - item))
+        in_flight -= 1
+        return item * 10
+
+    results = asyncio.run(run_many(work, range(5), concurrency=2))
+    assert [result.index for result in results] == [0, 1, 2, 3, 4]
+    assert [result.value for result in results] == [0, 10, 20, 30, 40]
+    assert peak == 2
+
+
+def test_run_many_isolates_failures():
+    async def work(item):
+        if item == 1:
+            raise RuntimeError("bad item")
+        return item
+
+    results = asyncio.run(run_many(work, [0, 1, 2], concurrency=3))
+    assert [result.ok for result in results] == [True, False, True]
+    assert str(results[1].error) == "bad item"
+    assert results[2].value == 2
+
+
+def test_stream_many_yields_every_result_as_completed():
+    async def work(item):
+        await asyncio.sleep(0.01 * (3 - item))
+        return item
+
+    async def collect():
+        return [result async for result in stream_many(work, range(3), concurrency=3)]
+
+    results = asyncio.run(collect())
+    assert [result.index for result in results] == [2, 1, 0]
+
+
+def test_generate_summaries_many_against_fake_server(fake_openai):
+    from packages.Instructor.summary_generator import generate_summaries_many
+
+    results = generate_summaries_many([f"Week {n} statistics" for n in range(4)], concurrency=2)
+    assert all(result.ok for result in results)
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert fake_openai.stats.snapshot()["requests"] == 4
+
+
+def test_many_helpers_work_on_every_event_loop(fake_openai):
+    # Without retries, a client left bound to the first asyncio.run loop fails
+    from django.test import override_settings
+
+    from packages.Instructor.comparison_generator import generate_comparisons_many
+    from packages.Instructor.summary_generator import generate_summaries_many
+
+    with override_settings(OPENAI_RETRY_ATTEMPTS=1):
+        for run in range(2):
+            summaries = generate_summaries_many([f"Run {run} week 1", f"Run {run} week 2"])
+            assert [result.ok for result in summaries] == [True, True]
+            comparisons = generate_comparisons_many([(f"Run {run} now", f"Run {run} before")])
+            assert [result.ok for result in comparisons] == [True]
+    assert fake_openai.stats.snapshot()["requests"] == 6
@@ -0,0 +1,62 @@
+import pytest
+
+from packages.Q2.dag import DAG, DAGResult
+
+
+def diamond():
+    dag = DAG(sync=True, poll_interval=0)
+    dag.add("a", "math.sqrt", 16)
+    dag.add("b", "math.floor", depends_on=["a"])
+    dag.add("c", "math.pow", depends_on=["a", "b"])
+    dag.add("d", "packages.Q2.dag.total", 1, depends_on=["b", "c"])
+    return dag
+
+
+def test_order_puts_dependencies_first():
+    order = diamond().order()
+    assert order.index("a") < order.index("b") < order.index("c") < order.index("d")
+
+
+def test_order_rejects_cycles_and_unknown_nodes():
+    dag = DAG()
+    dag.add("a", "math.sqrt", depends_on=["b"])
+    dag.add("b", "math.sqrt", depends_on=["a"])
+    with pytest.raises(ValueError, match="Cycle between DAG nodes: a, b"):
+        dag.order()
+    dag.add("c", "math.sqrt", depends_on=["missing"])
+    with pytest.raises(ValueError, match="c depends on unknown node missing"):
+        dag.order()
+    with pytest.raises(ValueError, match="Duplicate DAG node: c"):
+        dag.add("c", "math.floor")
+
+
+def test_critical_path_is_the_longest_weighted_path():
+    dag = DAG()
+    dag.add("fetch", "math.sqrt")
+    dag.add("slow", "math.sqrt", depends_on=["fetch"])
+    dag.add("fast", "math.sqrt", depends_on=["fetch"])
+    dag.add("join", "math.sqrt", depends_on=["fast", "slow"])
+    durations = {"fetch": 1, "slow": 5, "fast": 2, "join": 1}
+    assert dag.critical_path(durations) == ["fetch", "slow", "join"]
+    result = DAGResult({}, {}, durations, ["fetch", "slow", "join"], wall_time=7.5)
+    assert (result.critical_path_time, result.sequential_time) == (7, 9)
+    assert result.report().startswith("critical path fetch -> slow -> join: 7.00s")
+
+
+def test_upstream_results_are_appended_to_the_arguments(database):
+    result = diamond().run(timeout=10)
+    assert result.ok
+    # b = floor(a), c = pow(a, b), d = 1 + b + c
+    assert result.results == {"a": 4.0, "b": 4, "c": 256.0, "d": 261.0}
+    assert set(result.durations) == {"a", "b", "c", "d"}
+
+
+def test_a_failed_node_skips_its_downstream_nodes(database):
+    dag = DAG(sync=True, poll_interval=0)
+    dag.add("negative", "math.sqrt", -1)
+    dag.add("after", "math.floor", depends_on=["negative"])
+    dag.add("independent", "math.floor", 1.5)
+    result = dag.run(timeout=10)
+    assert result.results == {"independent": 1}
+    assert "math domain error" in result.errors["negative"]
+    assert result.errors["after"] == "Upstream node negative failed."
@@ -0,0 +1,98 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from packages.Instructor.loadtest.benchmark import RunReport
+from packages.Instructor.loadtest.fake_openai import (
+    FakeConfig,
+    base_url,
+    fake_value,
+    start_server,
+)
+from packages.Instructor.schemas import (
+    METRIC_NAMES,
+    ComparisonNarrative,
+    ComparisonOutput,
+    SummaryOutput,
+)
+
+
+@pytest.mark.parametrize("model", [SummaryOutput, ComparisonOutput, ComparisonNarrative])
+def test_fake_values_validate_against_the_schema(model):
+    schema = model.model_json_schema()
+    model.model_validate(fake_value(schema, schema.get("$defs", {})))
+
+
+def post(server, body, path="/chat/completions"):
+    request = urllib.request.Request(
+        base_url(server) + path,
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, dict(response.headers), json.load(response)
+    except urllib.error.HTTPError as error:
+        return error.code, dict(error.headers), json.load(error)
+
+
+def completion_request(model=SummaryOutput):
+    return {
+        "model": "gpt-4o",
+        "messages": [{"role": "user", "content": "Week 1 statistics"}],
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": model.__name__, "schema": model.model_json_schema()},
+        },
+    }
+
+
+def test_json_schema_responses_validate(fake_openai):
+    status, _, body = post(fake_openai, completion_request())
+    assert status == 200
+    output = SummaryOutput.model_validate_json(body["choices"][0]["message"]["content"])
+    assert [m.name for m in output.key_metrics] == list(METRIC_NAMES)
+    assert body["usage"]["completion_tokens"] == 400
+
+
+def test_requests_per_minute_are_enforced_with_429s():
+    server = start_server(FakeConfig(latency_median=0, requests_per_minute=1, retry_after=2.5))
+    try:
+        status, headers, _ = post(server, completion_request())
+        assert status == 200
+        assert headers["x-ratelimit-remaining-requests"] == "0"
+        status, headers, body = post(server, completion_request())
+        assert status == 429
+        assert headers["retry-after"] == "2.5"
+        assert headers["x-ratelimit-limit-requests"] == "1"
+        assert body["error"]["type"] == "requests"
+    finally:
+        server.shutdown()
+    assert server.stats.snapshot() == {"requests": 2, "ok": 1, "errors": 0, "throttled": 1}
+
+
+def test_error_rate_and_stats(fake_openai):
+    fake_openai.config.error_rate = 1.0
+    status, _, _ = post(fake_openai, completion_request())
+    assert status == 500
+    with urllib.request.urlopen(base_url(fake_openai) + "/stats") as response:
+        assert json.load(response) == {"requests": 1, "ok": 0, "errors": 1, "throttled": 0}
+    assert post(fake_openai, {}, "/embeddings")[0] == 404
+
+
+def test_run_report_overhead_and_percentiles():
+    report = RunReport(
+        target="summary",
+        driver="threads",
+        concurrency=4,
+        calls=10,
+        failures=0,
+        seconds=2.0,
+        latencies=[float(i) for i in range(1, 11)],
+        server_requests=12,
+    )
+    assert report.throughput == 5.0
+    assert report.retry_overhead == pytest.approx(0.2)
+    assert (report.percentile(0.5), report.percentile(0.99)) == (6.0, 10.0)
@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+
+from packages.Instructor.hedging import Hedger, LatencyWindow, get_hedger, hedged
+
+
+def hedger(samples=(0.01,) * 4, **options):
+    options = {"min_samples": 4, "max_hedge_rate": 1.0, **options}
+    window = LatencyWindow()
+    for seconds in samples:
+        window.observe(seconds)
+    return Hedger(window=window, **options)
+
+
+class Upstream:
+    """
+    Async call whose latency (or exception) depends on the model.
+    """
+
+    def __init__(self, **behaviour):
+        self.behaviour = behaviour
+        self.started = []
+        self.cancelled = []
+
+    async def __call__(self, model):
+        self.started.append(model)
+        outcome = self.behaviour[model]
+        try:
+            if isinstance(outcome, Exception):
+                await asyncio.sleep(0.02)
+                raise outcome
+            await asyncio.sleep(outcome)
+        except asyncio.CancelledError:
+            self.cancelled.append(model)
+            raise
+        return model
+
+
+def test_latency_window_percentile_and_size():
+    window = LatencyWindow(size=3)
+    for seconds in [9, 1, 2, 3]:
+        window.observe(seconds)
+    assert len(window) == 3
+    assert window.percentile(0.5) == 2
+    assert window.percentile(1.0) == 3
+
+
+def test_slow_primary_loses_to_the_hedge():
+    runner = hedger(secondary_model="gpt-4o-mini")
+    upstream = Upstream(**{"gpt-4o": 5, "gpt-4o-mini": 0.01})
+    assert asyncio.run(runner.run(upstream, "gpt-4o")) == "gpt-4o-mini"
+    assert upstream.cancelled == ["gpt-4o"]
+    assert runner.stats == {"calls": 1, "hedges": 1, "hedges_won": 1}
+
+
+def test_fast_primary_is_not_hedged():
+    runner = hedger(samples=[1.0] * 4)
+    upstream = Upstream(**{"gpt-4o": 0.01})
+    assert asyncio.run(runner.run(upstream, "gpt-4o")) == "gpt-4o"
+    assert upstream.started == ["gpt-4o"]
+    assert len(runner.window) == 5
+
+
+def test_no_hedging_until_there_are_enough_samples():
+    runner = hedger(samples=[0.01] * 3)
+    upstream = Upstream(**{"gpt-4o": 0.05})
+    asyncio.run(runner.run(upstream, "gpt-4o"))
+    assert runner.stats["hedges"] == 0
+
+
+def test_hedges_are_capped_at_the_rate():
+    runner = hedger(samples=[0.001] * 100, max_hedge_rate=0.5)
+    upstream = Upstream(**{"gpt-4o": 0.05})
+
+    async def calls():
+        for _ in range(4):
+            await runner.run(upstream, "gpt-4o")
+
+    asyncio.run(calls())
+    # The first call may not hedge: one hedge in one call is over 50%
+    assert runner.stats["calls"] == 4
+    assert runner.stats["hedges"] == 2
+
+
+def test_a_failed_request_does_not_win():
+    runner = hedger(secondary_model="gpt-4o-mini")
+    upstream = Upstream(**{"gpt-4o": ValueError("invalid"), "gpt-4o-mini": 0.05})
+    assert asyncio.run(runner.run(upstream, "gpt-4o")) == "gpt-4o-mini"
+
+    upstream = Upstream(**{"gpt-4o": ValueError("first"), "gpt-4o-mini": ValueError("second")})
+    with pytest.raises(ValueError):
+        asyncio.run(runner.run(upstream, "gpt-4o"))
+
+
+def test_hedging_is_off_unless_enabled():
+    assert get_hedger() is None
+    upstream = Upstream(**{"gpt-4o": 0})
+    assert asyncio.run(hedged(upstream, "gpt-4o")) == "gpt-4o"
+
+
+def test_async_generator_calls_are_hedged(fake_openai):
+    from django.test import override_settings
+
+    from packages.Instructor.summary_generator import async_call_openai_api
+
+    options = {
+        "OPENAI_HEDGING_ENABLED": True,
+        "OPENAI_HEDGE_MIN_SAMPLES": 1,
+        "OPENAI_HEDGE_MAX_RATE": 1.0,
+    }
+    with override_settings(**options):
+        runner = get_hedger()
+        runner.window.observe(0.0001)  # hedge almost at once
+        asyncio.run(async_call_openai_api("Week 1 statistics"))
+    assert runner.stats["hedges"] == 1
+    assert fake_openai.stats.snapshot()["requests"] == 2
+
+
+def test_cancelling_the_caller_cancels_the_primary():
+    runner = hedger(samples=[10.0] * 4)
+    upstream = Upstream(**{"gpt-4o": 5})
+
+    async def cancel_while_waiting():
+        task = asyncio.ensure_future(runner.run(upstream, "gpt-4o"))
+        await asyncio.sleep(0.05)  # waiting for the hedge delay
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Before asyncio.run cancels leftover tasks on exit
+        assert upstream.cancelled == ["gpt-4o"]
+
+    asyncio.run(cancel_while_waiting())
+
+
+def test_hedge_wins_are_cached_under_the_model_that_answered():
+    from packages.Instructor.cache import ResponseCache, cache_key
+    from packages.Instructor.schemas import KeyMetric, SummaryOutput
+
+    runner = hedger(secondary_model="gpt-4o-mini")
+    latency = {"gpt-4o": 5, "gpt-4o-mini": 0.01}
+
+    async def create(model):
+        await asyncio.sleep(latency[model])
+        return SummaryOutput(
+            dataset_summary=f"From {model}", key_metrics=[KeyMetric(name="Bounce Rate", value=1)]
+        )
+
+    async def call(prompt):
+        return await runner.run(create, "gpt-4o")
+
+    cache = ResponseCache()
+    value = asyncio.run(cache.aget_or_call("Week 1", "gpt-4o", SummaryOutput, call))
+    assert value.dataset_summary == "From gpt-4o-mini"
+    assert cache.get(cache_key("Week 1", "gpt-4o", SummaryOutput), SummaryOutput) is None
+    assert cache.get(cache_key("Week 1", "gpt-4o-mini", SummaryOutput), SummaryOutput) == value
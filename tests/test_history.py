@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from packages.Instructor.history import (
+    ParquetHistoryStore,
+    SQLiteHistoryStore,
+    create_history_store,
+)
+from packages.Instructor.schemas import METRIC_NAMES, ComparisonOutput, SummaryOutput
+
+VALUES = np.arange(1, len(METRIC_NAMES) + 1, dtype=np.float64)
+
+
+def summary(scale, text="Steady week"):
+    return SummaryOutput.from_vector(VALUES * scale, text)
+
+
+def comparison(scale):
+    return ComparisonOutput.from_vectors(
+        np.stack([VALUES * scale, VALUES]),
+        f"Up {scale}x",
+        [f"{name} moved" for name in METRIC_NAMES],
+    )
+
+
+@pytest.fixture(params=["sqlite", "parquet"])
+def store(request, tmp_path):
+    store = create_history_store(request.param, str(tmp_path))
+    yield store
+    store.close()
+
+
+def test_create_history_store_picks_the_backend(tmp_path):
+    assert isinstance(create_history_store("sqlite", str(tmp_path)), SQLiteHistoryStore)
+    assert isinstance(create_history_store(path=str(tmp_path)), ParquetHistoryStore)
+    with pytest.raises(ValueError, match="Unknown history backend"):
+        create_history_store("csv", str(tmp_path))
+
+
+def test_weeks_round_trip(store):
+    store.append_summaries([("p1", "2024-01-01", summary(1))])
+    store.append_comparisons([("p1", "2024-01-08", comparison(2))])
+    assert store.load_summary("p1", "2024-01-01") == summary(1)
+    assert store.load_comparison("p1", "2024-01-08") == comparison(2)
+    assert store.load_summary("p1", "2024-01-08") is None
+    assert store.load_comparison("p2", "2024-01-08") is None
+
+
+def test_series_are_filtered_and_ordered_by_property_then_week(store):
+    store.append_summaries(
+        [
+            ("p2", "2024-01-08", summary(4)),
+            ("p1", "2024-01-08", summary(2)),
+            ("p1", "2024-01-01", summary(1)),
+            ("p2", "2024-01-01", summary(3)),
+        ]
+    )
+    series = store.summary_series("Bounce Rate")
+    assert series.properties == ["p1", "p1", "p2", "p2"]
+    assert series.weeks == ["2024-01-01", "2024-01-08"] * 2
+    np.testing.assert_array_equal(series.values, [7, 14, 21, 28])
+
+    series = store.summary_series("Bounce Rate", properties=["p2"], start="2024-01-02")
+    assert (series.properties, series.weeks) == (["p2"], ["2024-01-08"])
+    with pytest.raises(ValueError, match="Unexpected metric name"):
+        store.summary_series("Exit Rate")
+
+
+def test_comparison_series_has_current_and_previous_columns(store):
+    store.append_comparisons([("p1", "2024-01-08", comparison(3))])
+    series = store.comparison_series("Average Revenue")
+    assert series.values.shape == (1, 2)
+    np.testing.assert_array_equal(series.values, [[30, 10]])
+
+
+def test_reingested_weeks_replace_earlier_results(store):
+    store.append_summaries([("p1", "2024-01-01", summary(1, "First"))])
+    store.append_summaries([("p1", "2024-01-01", summary(5, "Second"))])
+    assert store.load_summary("p1", "2024-01-01") == summary(5, "Second")
+    assert len(store.summary_series("Average Users")) == 1
+
+
+def test_compaction_keeps_the_latest_rows(tmp_path):
+    store = ParquetHistoryStore(str(tmp_path))
+    for scale in (1, 2, 3):
+        store.append_summaries([("p1", "2024-01-01", summary(scale, f"Run {scale}"))])
+    store.append_summaries([("p2", "2024-01-01", summary(9))])
+    store.compact()
+    assert [len(store._parts(table)) for table in store.TABLES] == [1, 0, 1]
+    assert store.load_summary("p1", "2024-01-01") == summary(3, "Run 3")
+    np.testing.assert_array_equal(store.summary_series("Average Sessions").values, [3, 9])
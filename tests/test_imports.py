@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+from packages.Instructor import client
+from packages.Instructor.import_benchmark import ROOT, SETUP, parse_importtime
+
+CHECK = (
+    "import sys; "
+    "import packages.Instructor.summary_generator, packages.Instructor.comparison_generator; "
+    "from packages.Instructor import client; "
+    "print(sorted({'openai', 'instructor'} & set(sys.modules)), client._clients)"
+)
+
+
+def test_importing_the_generators_loads_no_sdk_and_creates_no_client():
+    # Without an API key: importing must not need one either
+    setup = SETUP.replace("OPENAI_API_KEY='sk-benchmark', ", "")
+    result = subprocess.run(
+        [sys.executable, "-c", setup + CHECK],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[] {}"
+
+
+def test_clients_are_created_once_on_first_use(fake_openai):
+    assert client._clients == {}
+    first = client.get_client()
+    assert client.get_client() is first
+    assert set(client._clients) == {"sync"}
+    client.reset_clients()
+    assert client.get_client() is not first
+
+
+def test_parse_importtime_keeps_top_level_imports():
+    stderr = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       100 |        100 |   _io",
+            "import time:       300 |        900 | django",
+            "import time:       200 |        200 |   django.utils",
+        ]
+    )
+    assert parse_importtime(stderr) == [("django", 900)]
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from packages.Instructor.key_metrics import (
+    compute_key_metrics,
+    format_metric_changes,
+    format_metrics,
+    to_key_metrics,
+)
+from packages.Instructor.schemas import METRIC_NAMES
+
+WEEK = {
+    "sessions": [100, 300],
+    "users": [80, 240],
+    "new_users": [20, 60],
+    "pageviews": [300, 600],
+    "avg_session_duration": [60, 120],
+    "bounce_rate": [40, 20],
+    "transactions": [2, 6],
+    "revenue": [100.0, 300.5],
+}
+
+
+def test_compute_key_metrics_weights_rates_by_sessions():
+    values = dict(zip(METRIC_NAMES, compute_key_metrics(WEEK)))
+    assert values == {
+        "Average Sessions": 200.0,
+        "Average Users": 160.0,
+        "Average New Users": 40.0,
+        "Average Pageviews": 450.0,
+        "Pages per Session": 2.25,
+        "Average Session Duration": 105.0,
+        "Bounce Rate": 25.0,
+        "Conversion Rate": 2.0,
+        "Average Transactions": 4.0,
+        "Average Revenue": 200.25,
+    }
+
+
+def test_compute_key_metrics_handles_a_week_without_sessions():
+    week = dict(WEEK, sessions=[0, 0], pageviews=[0, 0], transactions=[0, 0])
+    values = dict(zip(METRIC_NAMES, compute_key_metrics(week)))
+    assert values["Pages per Session"] == 0.0
+    assert values["Conversion Rate"] == 0.0
+    assert values["Bounce Rate"] == 30.0
+
+
+def test_compute_key_metrics_rejects_bad_data():
+    with pytest.raises(ValueError, match="missing the 'revenue' column"):
+        compute_key_metrics({k: v for k, v in WEEK.items() if k != "revenue"})
+    with pytest.raises(ValueError, match="no rows"):
+        compute_key_metrics({name: [] for name in WEEK})
+
+
+def test_formatting():
+    values = compute_key_metrics(WEEK)
+    assert format_metrics(values).splitlines()[0] == "- Average Sessions: 200.00"
+    changes = format_metric_changes(values, np.where(values, values / 2, 0))
+    assert changes.splitlines()[0] == (
+        "- Average Sessions: 200.00 this week, 100.00 the previous week (+100.0%)"
+    )
+    assert [metric.name for metric in to_key_metrics(values)] == list(METRIC_NAMES)
+
+
+def test_generate_from_data_keeps_the_local_metrics(fake_openai):
+    from packages.Instructor import comparison_generator, summary_generator
+
+    summary = summary_generator.generate_summary_from_data(WEEK)
+    assert summary.to_vector().tolist() == compute_key_metrics(WEEK).tolist()
+    previous = {name: [value / 2 for value in column] for name, column in WEEK.items()}
+    comparison = comparison_generator.generate_comparison_from_data(WEEK, previous)
+    assert comparison.to_vectors().tolist() == [
+        compute_key_metrics(WEEK).tolist(),
+        compute_key_metrics(previous).tolist(),
+    ]
+    assert fake_openai.stats.snapshot()["requests"] == 2
@@ -0,0 +1,53 @@
+import pytest
+
+from packages.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.register(Histogram("latency_seconds", "Latency.", ("schema",), (1, 5)))
+    calls = registry.register(Counter("calls_total", "Calls.", ("schema",)))
+    for seconds in (0.5, 2, 7):
+        latency.observe(seconds, "S")
+    calls.inc("S", amount=3)
+    assert registry.render_prometheus() == (
+        "# HELP latency_seconds Latency.\n# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{schema="S",le="1.0"} 1\n'
+        'latency_seconds_bucket{schema="S",le="5.0"} 2\n'
+        'latency_seconds_bucket{schema="S",le="+Inf"} 3\n'
+        'latency_seconds_sum{schema="S"} 9.5\n'
+        'latency_seconds_count{schema="S"} 3\n'
+        "# HELP calls_total Calls.\n# TYPE calls_total counter\n"
+        'calls_total{schema="S"} 3\n'
+    )
+
+
+def test_registry_renders_counters_and_gauges():
+    registry = Registry()
+    counter = registry.register(Counter("jobs_total", "Jobs.", ("state",)))
+    gauge = registry.register(Gauge("depth", "Depth."))
+    counter.inc("done", amount=2)
+    gauge.set(7)
+    assert registry.render_prometheus() == (
+        "# HELP jobs_total Jobs.\n# TYPE jobs_total counter\n"
+        'jobs_total{state="done"} 2\n'
+        "# HELP depth Depth.\n# TYPE depth gauge\ndepth 7\n"
+    )
+
+
+def test_metric_names_are_unique():
+    registry = Registry()
+    registry.register(Counter("jobs_total", "Jobs."))
+    with pytest.raises(ValueError, match="jobs_total is already registered"):
+        registry.register(Gauge("jobs_total", "Jobs."))
+
+
+def test_packages_share_one_exposition():
+    from packages.Instructor import observability
+    from packages.metrics import render_prometheus
+    from packages.Q2 import autoscaler  # noqa: F401
+
+    rendered = render_prometheus()
+    assert "# TYPE openai_call_duration_seconds histogram" in rendered
+    assert "# TYPE q_autoscaler_workers gauge" in rendered
+    assert observability.render_prometheus() == rendered
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import queue
+import shutil
+import tempfile
+import threading
+
+import pytest
+from django_q.tasks import Chain
+
+from packages.Q2 import notify
+
+
+@pytest.fixture
+def local_notifier(monkeypatch):
+    """
+    A local (Unix datagram) notifier for this process, with a fresh listener.
+    """
+    # Socket paths are limited to about 100 bytes, too short for pytest's tmp_path
+    notifier = notify.LocalNotifier(tempfile.mkdtemp(prefix="q-notify-"))
+    monkeypatch.setattr(notify, "_notifier", notifier)
+    monkeypatch.setattr(notify, "_listener", None)
+    yield notifier
+    if notify._listener is not None:
+        notify._listener.close()
+    shutil.rmtree(notifier.directory)
+
+
+@pytest.fixture
+def no_notifier(monkeypatch):
+    monkeypatch.setattr(notify, "_notifier", None)
+    monkeypatch.setattr(notify, "_listener", None)
+
+
+def test_local_notifier_reaches_every_listener(local_notifier):
+    received = queue.Queue()
+    closers = [local_notifier.listen(received.put) for _ in range(2)]
+    stale = os.path.join(local_notifier.directory, "gone.sock")
+    open(stale, "w").close()
+    local_notifier.publish({"id": "t1", "group": None, "success": True})
+    event = {"id": "t1", "group": None, "success": True}
+    assert [received.get(timeout=5) for _ in range(2)] == [event, event]
+    assert not os.path.exists(stale)
+    for close in closers:
+        close()
+    assert os.listdir(local_notifier.directory) == []
+
+
+def test_publish_completion_sends_the_task_id_and_group(local_notifier):
+    received = queue.Queue()
+    close = local_notifier.listen(received.put)
+    notify.publish_completion(None, {"id": "t1", "group": "g1", "success": False, "result": 1})
+    assert received.get(timeout=5) == {"id": "t1", "group": "g1", "success": False}
+    close()
+
+
+def test_group_waiter_wakes_on_messages_without_polling(local_notifier, monkeypatch):
+    checks = []
+
+    def finished_ids(key, cached):
+        checks.append(key)
+        return set()
+
+    monkeypatch.setattr(notify, "_finished_ids", finished_ids)
+    monkeypatch.setattr(notify, "_group_results", lambda group_id, failures, cached: ["done"])
+
+    def publish():
+        for task_id in ["t1", "t2"]:
+            local_notifier.publish({"id": task_id, "group": "g1", "success": True})
+
+    async def run():
+        waiting = asyncio.ensure_future(notify.await_group("g1", 2, timeout=30))
+        await asyncio.sleep(0.05)  # subscribed by now
+        threading.Thread(target=publish).start()
+        return await waiting
+
+    assert asyncio.run(run()) == ["done"]
+    # Only the check made on subscribing, none while waiting
+    assert checks == [("group", "g1")]
+    assert notify._listener.waiters == {}
+
+
+def test_waiting_falls_back_to_polling(database, no_notifier):
+    chain = Chain(sync=True)
+    chain.append("math.copysign", 1, -1)
+    chain.append("math.floor", 1.5)
+    chain.run()
+    assert sorted(notify.wait_chain(chain, timeout=10)) == [-1.0, 1]
+    assert notify.wait_task("no-such-task", timeout=0.2) is None
@@ -0,0 +1,47 @@
+import pytest
+
+from packages.Instructor import observability
+
+
+@pytest.fixture
+def metrics():
+    observability.set_enabled(True)
+    for metric in (observability.call_latency, observability.retries, observability.tokens):
+        metric.values.clear()
+    yield observability
+    observability.set_enabled(None)
+
+
+def test_nothing_is_recorded_when_disabled():
+    observability.set_enabled(False)
+    try:
+        assert observability.observe_call("SummaryOutput") is observability._NULL_CONTEXT
+        observability.record_attempt("SummaryOutput", 2)
+        assert ("SummaryOutput",) not in observability.retries.values
+    finally:
+        observability.set_enabled(None)
+
+
+def test_calls_record_latency_tokens_and_retries(fake_openai, metrics):
+    from packages.Instructor.summary_generator import generate_summary
+
+    fake_openai.config.error_rate = 1.0
+    with pytest.raises(ValueError):
+        generate_summary("Week 1 statistics")
+    fake_openai.config.error_rate = 0.0
+    generate_summary("Week 2 statistics")
+
+    outcomes = {labels[1]: count for labels, (_, _, count) in metrics.call_latency.values.items()}
+    assert outcomes == {"error": 1, "success": 1}
+    # OPENAI_RETRY_ATTEMPTS is 2 in the test settings
+    assert metrics.retries.values[("SummaryOutput",)] == 1
+    assert metrics.tokens.values[("SummaryOutput", "completion")] == 400
+    rendered = metrics.render_prometheus()
+    assert 'openai_tokens_total{schema="SummaryOutput",kind="completion"} 400' in rendered
+    assert "openai_cache_misses_total 2" in rendered
+
+
+def test_metrics_view():
+    response = observability.metrics_view(None)
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert b"# TYPE openai_call_duration_seconds histogram" in response.content
@@ -0,0 +1,46 @@
+from packages.Instructor.key_metrics import compute_key_metrics
+from packages.Instructor.pipeline import run_week
+
+WEEK = {
+    "sessions": [100, 300],
+    "users": [80, 240],
+    "new_users": [20, 60],
+    "pageviews": [300, 600],
+    "avg_session_duration": [60, 120],
+    "bounce_rate": [40, 20],
+    "transactions": [2, 6],
+    "revenue": [100.0, 300.5],
+}
+NEXT_WEEK = {name: [value * 1.1 for value in column] for name, column in WEEK.items()}
+
+
+def test_first_week_is_only_summarized(fake_openai):
+    summaries = {}
+    insights = run_week(summaries, "2024-W02", "2024-W01", WEEK)
+    assert insights.comparison is None
+    assert summaries == {"2024-W02": insights.summary}
+    assert fake_openai.stats.snapshot()["requests"] == 1
+
+
+def test_following_week_takes_one_call_and_reuses_the_stored_summary(fake_openai):
+    summaries = {}
+    run_week(summaries, "2024-W02", "2024-W01", WEEK)
+    insights = run_week(summaries, "2024-W03", "2024-W02", NEXT_WEEK)
+    # One fused summary + comparison call for the new week
+    assert fake_openai.stats.snapshot()["requests"] == 2
+    assert summaries["2024-W03"] is insights.summary
+    assert insights.comparison.to_vectors().tolist() == [
+        compute_key_metrics(NEXT_WEEK).tolist(),
+        compute_key_metrics(WEEK).tolist(),
+    ]
+
+
+def test_both_weeks_stored_needs_only_a_comparison(fake_openai):
+    summaries = {}
+    run_week(summaries, "2024-W02", "2024-W01", WEEK)
+    run_week(summaries, "2024-W03", "2024-W02", NEXT_WEEK)
+    stored = summaries["2024-W03"]
+    insights = run_week(summaries, "2024-W03", "2024-W02", NEXT_WEEK)
+    assert insights.summary is stored
+    assert insights.comparison is not None
+    assert fake_openai.stats.snapshot()["requests"] == 3
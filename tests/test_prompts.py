@@ -0,0 +1,40 @@
+from packages.Instructor.prompts import (
+    SUMMARY_PROMPT,
+    TRUNCATION_MARKER,
+    PromptTemplate,
+    as_messages,
+    compact,
+    count_tokens,
+)
+
+
+def test_compact_drops_redundant_whitespace():
+    assert compact("  a   b \n\n\n\n c\t\td  ") == "a b\n\nc d"
+
+
+def test_static_prefix_is_identical_across_calls():
+    first = SUMMARY_PROMPT.build(statistical_summary="Week 1")
+    second = SUMMARY_PROMPT.build(statistical_summary="Week 2 " * 50)
+    assert first.messages[0] == second.messages[0]
+    assert first.messages[0]["role"] == "system"
+    assert "Week 2" in second.messages[1]["content"]
+    assert first.static_tokens == count_tokens(SUMMARY_PROMPT.instructions)
+    assert first.total_tokens == first.static_tokens + first.variable_tokens
+
+
+def test_build_trims_the_data_to_the_budget():
+    template = PromptTemplate("test", "Instructions.", "A: {a}\nB: {b}")
+    prompt = template.build(token_budget=100, a="short", b="word " * 1000)
+    assert prompt.truncated
+    assert prompt.variable_tokens <= 100
+    assert "A: short" in prompt.user
+    assert prompt.user.endswith(TRUNCATION_MARKER)
+    assert not template.build(token_budget=100, a="short", b="also short").truncated
+
+
+def test_as_messages_accepts_plain_strings():
+    assert as_messages("hi") == [{"role": "user", "content": "hi"}]
+    prompt = SUMMARY_PROMPT.build(statistical_summary="Week 1")
+    assert as_messages(prompt) == prompt.messages
+    # The cache key covers both messages
+    assert str(prompt).startswith(prompt.system) and str(prompt).endswith(prompt.user)
@@ -0,0 +1,59 @@
+import time
+
+from packages.Instructor.rate_limit import (
+    TARGET_UTILIZATION,
+    RateLimiter,
+    TokenBucket,
+    parse_duration,
+    retry_after,
+)
+
+LIMIT_HEADERS = {"x-ratelimit-limit-requests": "100", "x-ratelimit-remaining-requests": "99"}
+
+
+def test_parse_duration():
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1.5") == 1.5
+    assert parse_duration("soon") is None
+    assert retry_after({"retry-after-ms": "250"}) == 0.25
+
+
+def test_token_bucket_queues_callers_behind_each_other():
+    bucket = TokenBucket(60)  # one per second
+    assert bucket.reserve(60) == 0
+    assert 0.9 < bucket.reserve(1) <= 1.0
+    assert 1.9 < bucket.reserve(1) <= 2.0
+
+
+def test_unlimited_bucket_never_waits():
+    assert TokenBucket(None).reserve(10**6) == 0
+
+
+def test_headers_set_the_rate():
+    limiter = RateLimiter()
+    limiter.observe(200, LIMIT_HEADERS)
+    assert limiter.requests.rate_per_minute == 100 * TARGET_UTILIZATION
+
+
+def test_429_backoff_outlasts_the_next_response():
+    limiter = RateLimiter(backoff_recovery=0.2)
+    limiter.observe(200, LIMIT_HEADERS)
+    limiter.observe(429, {**LIMIT_HEADERS, "x-ratelimit-remaining-requests": "0"})
+    backed_off = 100 * TARGET_UTILIZATION / 2
+    assert limiter.requests.rate_per_minute == backed_off
+    assert limiter.throttled == 1
+
+    # The next successful response advertises the full limit again
+    limiter.observe(200, LIMIT_HEADERS)
+    assert limiter.requests.rate_per_minute == backed_off
+
+    time.sleep(0.25)
+    limiter.observe(200, LIMIT_HEADERS)
+    assert limiter.requests.rate_per_minute == 100 * TARGET_UTILIZATION
+
+
+def test_429_pauses_for_retry_after():
+    limiter = RateLimiter()
+    limiter.observe(429, {"retry-after": "0.2"})
+    assert limiter.paused_until > time.monotonic() + 0.15
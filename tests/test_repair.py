@@ -0,0 +1,152 @@
+import asyncio
+import json
+
+import pytest
+
+from packages.Instructor import observability
+from packages.Instructor.loadtest.fake_openai import FakeOpenAIHandler
+from packages.Instructor.repair import (
+    Repairer,
+    acreate_with_repair,
+    canonical_metric_name,
+    create_with_repair,
+    get_repairer,
+    numeric_string,
+    summary_repairer,
+)
+from packages.Instructor.schemas import METRIC_NAMES, SummaryOutput
+
+
+def summary_data(**changes):
+    data = {
+        "dataset_summary": "Traffic rose.",
+        "key_metrics": [{"name": name, "value": 1.0} for name in METRIC_NAMES],
+    }
+    data.update(changes)
+    return data
+
+
+@pytest.fixture
+def metrics():
+    observability.set_enabled(True)
+    observability.repairs.values.clear()
+    observability.validation_failures.values.clear()
+    yield observability.repairs.values
+    observability.set_enabled(None)
+
+
+def test_fixers():
+    assert numeric_string("1,234.5") == 1234.5
+    assert numeric_string("$12") == 12.0
+    assert numeric_string("41.2%") == 41.2
+    assert numeric_string("n/a") == "n/a"
+    assert canonical_metric_name("bounce rate") == "Bounce Rate"
+    assert canonical_metric_name("Avg. Sessions") == "Average Sessions"
+
+
+def test_repairer_fixes_mechanical_failures_without_reasking():
+    data = summary_data()
+    data["key_metrics"][0] = {"name": "avg sessions", "value": "1,024"}
+    repairer = summary_repairer()
+    result = repairer.validate(data)
+    assert result.value.key_metrics[0].name == "Average Sessions"
+    assert result.value.key_metrics[0].value == 1024
+    assert result.changed == 2
+    assert repairer.stats.repaired == 1
+    # The input is left as it was
+    assert data["key_metrics"][0]["value"] == "1,024"
+
+
+def test_create_with_repair_reasks_only_failing_fields():
+    requests = []
+
+    def complete(messages, response_model, model):
+        requests.append((messages, response_model))
+        if len(requests) == 1:
+            return summary_data(dataset_summary=None)
+        return {"dataset_summary": "Traffic rose."}
+
+    repairer = Repairer(SummaryOutput)
+    messages = [{"role": "user", "content": "Week 1"}]
+    value = create_with_repair(messages, repairer, "m", complete=complete)
+    assert value.dataset_summary == "Traffic rose."
+    assert len(value.key_metrics) == len(METRIC_NAMES)
+    reask_messages, reask_model = requests[1]
+    assert list(reask_model.model_fields) == ["dataset_summary"]
+    assert "Week 1" in reask_messages[0]["content"]
+    assert repairer.stats.reasked == 1
+
+
+def test_create_with_repair_gives_up_after_max_reasks():
+    def complete(messages, response_model, model):
+        return {"dataset_summary": None, "key_metrics": []}
+
+    repairer = Repairer(SummaryOutput)
+    with pytest.raises(ValueError, match="still invalid after 1 targeted re-asks"):
+        create_with_repair([], repairer, "m", max_reasks=1, complete=complete)
+    assert repairer.stats.failed == 1
+
+
+def test_acreate_with_repair_matches_sync():
+    async def complete(messages, response_model, model):
+        return summary_data(key_metrics=[{"name": n, "value": "2"} for n in METRIC_NAMES])
+
+    value = asyncio.run(acreate_with_repair([], summary_repairer(), "m", complete=complete))
+    assert all(metric.value == 2.0 for metric in value.key_metrics)
+
+
+@pytest.fixture
+def sloppy_server(fake_openai, monkeypatch):
+    # The fake server's answers, with a thousands separator and a lower-case name
+    completion = FakeOpenAIHandler._completion
+
+    def sloppy(self, request):
+        response = completion(self, request)
+        message = response["choices"][0]["message"]
+        data = json.loads(message["content"])
+        data["key_metrics"][0] = {"name": "average sessions", "value": "1,234.5"}
+        message["content"] = json.dumps(data)
+        return response
+
+    monkeypatch.setattr(FakeOpenAIHandler, "_completion", sloppy)
+    return fake_openai
+
+
+def test_generate_summary_repairs_locally(sloppy_server, metrics):
+    from packages.Instructor.summary_generator import generate_summary
+
+    summary = generate_summary("Week 1 statistics")
+    assert summary.key_metrics[0].name == "Average Sessions"
+    assert summary.key_metrics[0].value == 1234.5
+    # Repaired without a re-ask
+    assert sloppy_server.stats.snapshot()["requests"] == 1
+    assert metrics[("SummaryOutput", "repaired")] == 1
+    assert observability.validation_failures.values[("SummaryOutput",)] == 1
+
+
+def test_async_path_repairs_locally(sloppy_server, metrics):
+    from packages.Instructor.summary_generator import agenerate_summary
+
+    summary = asyncio.run(agenerate_summary("Week 2 statistics"))
+    assert summary.key_metrics[0].value == 1234.5
+    assert sloppy_server.stats.snapshot()["requests"] == 1
+    assert metrics[("SummaryOutput", "repaired")] == 1
+
+
+def test_generate_comparison_goes_through_repairer(fake_openai):
+    from packages.Instructor.comparison_generator import generate_comparison
+    from packages.Instructor.schemas import ComparisonOutput
+
+    validated = get_repairer(ComparisonOutput).stats.validated
+    generate_comparison("Week 2", "Week 1")
+    assert get_repairer(ComparisonOutput).stats.validated == validated + 1
+
+
+def test_complete_json_uses_the_rate_limited_client(fake_openai):
+    from packages.Instructor.rate_limit import TARGET_UTILIZATION, get_rate_limiter
+    from packages.Instructor.summary_generator import generate_summary
+
+    fake_openai.config.requests_per_minute = 100
+    generate_summary("Week 3 statistics")
+    # The response's x-ratelimit-* headers reached the shared limiter
+    assert get_rate_limiter().requests.rate_per_minute == 100 * TARGET_UTILIZATION
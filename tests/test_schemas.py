@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from packages.Instructor.schemas import (
+    METRIC_INDEX,
+    METRIC_NAMES,
+    ComparisonOutput,
+    KeyMetric,
+    KeyMetricComparison,
+    SummaryOutput,
+)
+
+VALUES = np.arange(1, len(METRIC_NAMES) + 1, dtype=np.float64)
+
+
+def test_metric_index_matches_the_names_and_is_read_only():
+    assert [METRIC_INDEX[name] for name in METRIC_NAMES] == list(range(len(METRIC_NAMES)))
+    with pytest.raises(TypeError):
+        METRIC_INDEX["Exit Rate"] = 10
+
+
+def test_summary_vector_round_trip_in_canonical_order():
+    summary = SummaryOutput.from_vector(VALUES, "Week 1")
+    summary.key_metrics.reverse()
+    vector = summary.to_vector()
+    assert vector.dtype == np.float64
+    np.testing.assert_array_equal(vector, VALUES)
+    summary.enforce_ordered_metrics()
+    assert [m.name for m in summary.key_metrics] == list(METRIC_NAMES)
+
+
+@pytest.mark.parametrize(
+    "change, message",
+    [
+        (lambda metrics: metrics.append(KeyMetric(name="Exit Rate", value=1)), "Unexpected"),
+        (lambda metrics: metrics.append(metrics[0]), "Duplicate metric name: Average Sessions"),
+        (lambda metrics: metrics.pop(), "Missing metrics: Average Revenue"),
+    ],
+)
+def test_to_vector_requires_every_metric_once(change, message):
+    summary = SummaryOutput.from_vector(VALUES, "Week 1")
+    change(summary.key_metrics)
+    with pytest.raises(ValueError, match=message):
+        summary.to_vector()
+
+
+def test_from_vector_rejects_the_wrong_length():
+    with pytest.raises(ValueError):
+        SummaryOutput.from_vector(VALUES[:-1], "Week 1")
+
+
+def test_comparison_vectors_round_trip():
+    values = np.stack([VALUES, VALUES * 10])
+    descriptions = [f"{name} changed" for name in METRIC_NAMES]
+    comparison = ComparisonOutput.from_vectors(values, "Week 2 vs 1", descriptions)
+    comparison.key_metrics_comparison.reverse()
+    np.testing.assert_array_equal(comparison.to_vectors(), values)
+    assert comparison.descriptions() == descriptions
+
+
+def test_metric_names_are_only_checked_when_asked():
+    metric = {"name": "Exit Rate", "value1": 1, "value2": 2, "description": "Up"}
+    assert KeyMetricComparison.model_validate(metric).name == "Exit Rate"
+    with pytest.raises(ValueError, match="Unexpected metric name"):
+        KeyMetricComparison.model_validate(metric, context={"canonical_metrics": True})
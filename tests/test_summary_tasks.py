@@ -0,0 +1,67 @@
+from packages.Q2.summary_tasks import (
+    FanOut,
+    TaskResult,
+    cluster_in_flight,
+    fan_in_comparisons,
+    summarize_and_compare,
+    summarize_task,
+)
+
+
+class Broker:
+    """
+    Stand-in broker reporting a scripted number of locked (running) tasks.
+    """
+
+    def __init__(self, locked):
+        self.locked = iter(locked)
+
+    def queue_size(self):
+        return 0
+
+    def lock_size(self):
+        return next(self.locked)
+
+
+def test_cluster_in_flight_needs_a_broker_that_tracks_locks():
+    assert cluster_in_flight(Broker([None])) is None
+    assert cluster_in_flight(Broker([3])) == 3
+
+
+def test_submit_waits_while_the_cluster_is_full(database, fake_openai, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("packages.Q2.summary_tasks.time.sleep", sleeps.append)
+    # Q_CLUSTER["sync"] runs each task inline, so only the cluster count holds it back
+    fan_out = FanOut(
+        summarize_task, max_in_flight=2, poll_interval=0.25, broker=Broker([3, 2, 1, 0])
+    )
+    fan_out.submit(0, "Week 1 statistics")
+    fan_out.submit(1, "Week 2 statistics")
+    # time.sleep is shared with the fake server's simulated latency
+    assert sleeps.count(0.25) == 2
+    assert fan_out.wait(timeout=10)
+    assert [(r.index, r.ok) for r in fan_out.results()] == [(0, True), (1, True)]
+
+
+def test_results_come_back_in_input_order(database, fake_openai):
+    current, previous, comparisons = summarize_and_compare(
+        [f"Week 2 statistics for property {n}" for n in range(3)],
+        [f"Week 1 statistics for property {n}" for n in range(3)],
+        max_in_flight=2,
+        poll_interval=0,
+        timeout=30,
+    )
+    assert [r.index for r in current + previous] == list(range(6))
+    assert [r.index for r in comparisons] == list(range(3))
+    assert all(r.ok for r in current + previous + comparisons)
+    assert comparisons[0].value["key_metrics_comparison"][0]["name"] == "Average Sessions"
+
+
+def test_failed_summaries_skip_their_comparison(database, fake_openai):
+    # Failing tasks re-raise under Q_CLUSTER["sync"], so the failures are given here
+    value = {"dataset_summary": "Steady", "key_metrics": []}
+    current = [TaskResult(0, error="Failed to generate summary"), TaskResult(1, value)]
+    previous = [TaskResult(0, value), TaskResult(1, error="Failed to generate summary")]
+    fan_out = fan_in_comparisons(current, previous, poll_interval=0)
+    assert fan_out.indices == []
+    assert fake_openai.stats.snapshot()["requests"] == 0
@@ -0,0 +1,305 @@
+import json
+import os
+import stat
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import timezone_converter as tc
+import timezone_converter_bench as bench
+
+
+def jsonl_converter(**options):
+    return tc.BulkConverter("UTC", "JST", fmt="jsonl", **options)
+
+
+def test_jsonl_bad_lines_get_an_empty_result():
+    converter = jsonl_converter()
+    lines = [
+        '{"time": "2024-01-01T00:00:00", "id": 1}\n',
+        "{not json\n",
+        "[1, 2]\n",
+        '{"time": 5}\n',
+        "\n",
+        '{"id": 4}\n',
+    ]
+    out = [json.loads(line) for line in converter.convert_chunk(lines).splitlines()]
+    assert out == [
+        {"time": "2024-01-01T00:00:00", "id": 1, "converted": "2024-01-01T09:00:00+09:00"},
+        {"converted": ""},
+        {"converted": ""},
+        {"time": 5, "converted": ""},
+        {"id": 4, "converted": ""},
+    ]
+    assert (converter.rows, converter.errors) == (5, 4)
+
+
+def test_jsonl_bad_lines_fall_back_from_the_numpy_engine():
+    converter = jsonl_converter(engine="numpy")
+    lines = ['{"time": "2024-01-01T00:00:00"}\n', "oops\n"]
+    assert converter.convert_chunk(lines).splitlines() == [
+        '{"time": "2024-01-01T00:00:00", "converted": "2024-01-01T09:00:00+09:00"}',
+        '{"converted": ""}',
+    ]
+    assert converter.errors == 1
+
+
+def test_csv_bad_values_get_an_empty_result():
+    converter = tc.BulkConverter("UTC", "JST", fmt="csv")
+    written = []
+    converter.convert_stream(["id,time\n", "1,09:30\n", "2,soon\n"], written.append)
+    assert "".join(written) == "id,time,converted\n1,09:30,18:49\n2,soon,\n"
+    assert converter.errors == 1
+
+
+@pytest.mark.parametrize("chunk_size", ["0", "-5", "ten"])
+def test_bulk_rejects_a_non_positive_chunk_size(chunk_size, capsys):
+    with pytest.raises(SystemExit):
+        tc.bulk_main(["UTC", "JST", "--chunk-size", chunk_size])
+    assert "--chunk-size" in capsys.readouterr().err
+
+
+def test_bulk_rejects_processes_with_stdin(capsys):
+    with pytest.raises(SystemExit):
+        tc.bulk_main(["UTC", "JST", "--processes", "2"])
+    assert "--processes needs --input" in capsys.readouterr().err
+
+
+def test_bulk_processes_match_a_single_process(tmp_path):
+    source = tmp_path / "in.jsonl"
+    source.write_text(
+        "".join(
+            json.dumps({"time": f"2024-03-{day:02d}T{hour:02d}:15:00"}) + "\n"
+            if hour % 7
+            else "broken\n"
+            for day in range(1, 29)
+            for hour in range(24)
+        )
+    )
+    options = {"from_tz": "EST", "to_tz": "CET", "fmt": "jsonl"}
+    single, sharded = [], []
+    counts = tc.convert_file(str(source), single.append, options, chunk_size=50)
+    assert tc.convert_file(str(source), sharded.append, options, 3, chunk_size=50) == counts
+    assert "".join(sharded) == "".join(single)
+    assert counts == (28 * 24, 28 * 4)
+
+
+def test_server_rejects_times_that_are_not_a_list():
+    response = tc.handle_request({"from": "UTC", "to": "JST", "times": "09:30"})
+    assert "'times' must be a list" in response["error"]
+    response = tc.handle_request({"from": "UTC", "to": "JST", "times": ["09:30", None]})
+    assert response == {"results": ["18:49", ""], "errors": 1}
+
+
+def test_default_socket_is_in_a_private_directory(monkeypatch, tmp_path):
+    monkeypatch.delenv("TIMEZONE_CONVERTER_SOCKET", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert tc.default_socket_path() == str(tmp_path / "timezone_converter.sock")
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    path = tc.default_socket_path()
+    assert os.path.dirname(path) == str(tmp_path / f"timezone_converter-{os.getuid()}")
+    tc._private_directory(os.path.dirname(path))
+    assert stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode) == 0o700
+
+
+def test_private_directory_refuses_a_shared_directory(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(RuntimeError, match="writable by other users"):
+        tc._private_directory(str(shared))
+
+
+@pytest.fixture
+def server(tmp_path):
+    path = str(tmp_path / "run" / "tz.sock")
+    process = subprocess.Popen(
+        [sys.executable, tc.__file__, "serve", "--socket", path], stderr=subprocess.PIPE
+    )
+    assert b"Listening" in process.stderr.readline()
+    yield path
+    process.terminate()
+    process.wait(10)
+
+
+def test_server_socket_is_private_and_answers(server):
+    assert stat.S_IMODE(os.stat(server).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(os.path.dirname(server)).st_mode) == 0o700
+    with tc.ConverterClient(server) as client:
+        assert client.convert("12:00", "UTC", "JST") == "21:19"
+
+
+@pytest.mark.skipif(os.getuid() != 0, reason="needs root to chown the socket")
+def test_client_refuses_a_socket_owned_by_another_user(server, monkeypatch):
+    os.chown(server, 65534, -1)
+    with pytest.raises(OSError, match="not a socket owned by this user"):
+        tc.ConverterClient(server)
+    monkeypatch.setenv("TIMEZONE_CONVERTER_SOCKET", server)
+    assert tc._convert_with_server("12:00", "UTC", "JST") is None
+
+
+def test_world_clock_gives_an_empty_row_for_bad_values():
+    rows = tc.world_clock_matrix(
+        ["12:00", None, 1200, ["12:00"], "noon", "2024-07-01T12:00:00"], "EST", ["UTC", "JST"]
+    )
+    assert rows[0].keys() == {"UTC", "JST"}
+    assert rows[1:] == [
+        None,
+        None,
+        None,
+        None,
+        {"UTC": "2024-07-01T16:00:00+00:00", "JST": "2024-07-02T01:00:00+09:00"},
+    ]
+    with pytest.raises(ValueError, match="Invalid time"):
+        tc.world_clock(None, "EST")
+
+
+@pytest.mark.parametrize("backend", ["zoneinfo", "pytz"])
+@pytest.mark.parametrize(
+    "args, expected",
+    [(("12:00", "EST", "UTC"), "16:56"), (("12:00", "AEST", "JST"), "11:14"),
+     (("23:30", "UTC", "CET"), "00:23")],
+)
+def test_clock_times_match_the_classic_cli(backend, args, expected, monkeypatch):
+    monkeypatch.setenv("TIMEZONE_CONVERTER_BACKEND", backend)
+    assert tc.convert_time(*args) == expected
+    from_tz, to_tz = args[1:]
+    row = tc.world_clock(args[0], from_tz, [to_tz], backend)
+    assert row == {to_tz: expected}
+
+
+def test_zoneinfo_rounds_offsets_to_the_minute_like_pytz():
+    values = ["1910-06-01T12:00:00", "1920-04-01T00:02:56", "2024-03-10T02:30:00"]
+    for from_tz, to_tz in [("ICT", "UTC"), ("UTC", "ICT"), ("EST", "ICT")]:
+        results = [
+            [
+                tc.convert_value(value, tc.get_timezone(from_tz, b), tc.get_timezone(to_tz, b))
+                for value in values
+            ]
+            for b in ("zoneinfo", "pytz")
+        ]
+        assert results[0] == results[1]
+    bangkok = tc.get_timezone("ICT", "zoneinfo")
+    assert tc.localize(tc.datetime(1910, 6, 1), bangkok).isoformat() == "1910-06-01T00:00:00+06:42"
+
+
+def test_conformance_fails_on_any_difference(monkeypatch):
+    coarse = {"window": tc.timedelta(hours=1), "step": tc.timedelta(hours=1)}
+    assert bench.check_conformance(1915, 1925, **coarse) == []
+    clock_offset = tc.clock_offset
+    # Standard time for zoneinfo HH:MM times, as before they matched pytz
+    monkeypatch.setattr(
+        tc,
+        "clock_offset",
+        lambda zone: clock_offset(zone)
+        if hasattr(zone, "localize")
+        else tc.datetime(1900, 1, 1, tzinfo=zone).utcoffset(),
+    )
+    tc._convert_clock_time.cache_clear()
+    try:
+        mismatches = bench.check_conformance(2030, 2031, **coarse)
+    finally:
+        monkeypatch.undo()
+        tc._convert_clock_time.cache_clear()
+    assert (
+        "America/New_York", "UTC", "12:00", ("zoneinfo", "17:00"), ("pytz", "16:56")
+    ) in mismatches
+
+
+def test_conformance_reports_engine_mismatches_with_the_value(monkeypatch, capsys):
+    convert_array = bench.convert_array
+
+    def shifted(values, from_tz, to_tz, backend=None):
+        converted, offsets = convert_array(values, from_tz, to_tz, backend)
+        return converted + np.timedelta64(1, "s"), offsets
+
+    monkeypatch.setattr(bench, "convert_array", shifted)
+    monkeypatch.setattr(bench, "TIMEZONE_MAP", {"EST": "America/New_York"})
+    with pytest.raises(SystemExit):
+        bench.conformance_main(["--start-year", "2020", "--end-year", "2021"])
+    first = capsys.readouterr().out.splitlines()[0]
+    assert first == (
+        "MISMATCH America/New_York -> America/New_York 2020-03-08T00:00:00: "
+        "zoneinfo convert_value 2020-03-08T00:00:00-05:00, "
+        "zoneinfo convert_array 2020-03-08T00:00:01-05:00"
+    )
+
+
+def wall_times(*days):
+    # Every 15 minutes across each day, so DST gaps and folds are included
+    return [
+        (tc.datetime.fromisoformat(day) + tc.timedelta(minutes=15 * n)).isoformat()
+        for day in days
+        for n in range(96)
+    ]
+
+
+@pytest.mark.parametrize("backend", ["zoneinfo", "pytz"])
+@pytest.mark.parametrize(
+    "from_tz, to_tz, days",
+    [
+        ("America/New_York", "Europe/London", ["2024-03-10", "2024-11-03"]),
+        ("Europe/London", "Australia/Lord_Howe", ["2024-03-31", "2024-10-27"]),
+        ("Australia/Lord_Howe", "UTC", ["2024-04-07", "2024-10-06"]),
+        ("Asia/Kolkata", "America/St_Johns", ["1941-10-01", "2024-03-10"]),
+        # Past the end of the probed zoneinfo tables
+        ("America/New_York", "Europe/London", ["2099-12-31", "2150-03-08", "2150-03-29"]),
+        ("Europe/London", "America/New_York", ["2150-10-25", "2150-11-01", "2150-07-01"]),
+    ],
+)
+def test_numpy_engine_matches_the_scalar_conversion(backend, from_tz, to_tz, days, monkeypatch):
+    monkeypatch.setenv("TIMEZONE_CONVERTER_BACKEND", backend)
+    values = wall_times(*days)
+    converted = tc.format_isoformat(*tc.convert_array(values, from_tz, to_tz, backend))
+    from_timezone, to_timezone = (tc.get_timezone(name, backend) for name in (from_tz, to_tz))
+    assert converted == [tc.convert_value(v, from_timezone, to_timezone) for v in values]
+
+
+def test_convert_array_keeps_precision_and_nat():
+    converted, offsets = tc.convert_array(
+        ["2024-07-01T12:00:00.250", "NaT"], "UTC", "Asia/Kolkata"
+    )
+    assert str(converted[0]) == "2024-07-01T17:30:00.250"
+    assert np.isnat(converted[1])
+    assert offsets[0] == 19800
+
+
+def test_zone_tables_agree_between_backends():
+    utc = np.arange(0, 2**31, 3 * 3600, dtype=np.int64)
+    for name in ["America/New_York", "Europe/Berlin", "Australia/Adelaide"]:
+        tables = [tc.get_zone_table(name, backend) for backend in ("zoneinfo", "pytz")]
+        np.testing.assert_array_equal(tables[0].utc_offsets(utc), tables[1].utc_offsets(utc))
+
+
+def test_numpy_engine_after_2100_uses_the_zone_rules():
+    converter = tc.BulkConverter("EST", "UTC", engine="numpy")
+    assert converter.convert_chunk(["2150-07-01T12:00:00\n"]) == "2150-07-01T16:00:00+00:00\n"
+
+
+def test_engines_reject_the_same_values():
+    lines = ["2024-01\n", "10000-01-01T00:00:00\n", "2024-07-01T12:00:00\n"]
+    for engine in ("python", "numpy"):
+        converter = tc.BulkConverter("EST", "UTC", engine=engine)
+        assert converter.convert_chunk(lines) == "\n\n2024-07-01T16:00:00+00:00\n"
+        assert (converter.rows, converter.errors) == (3, 2)
+
+
+def test_numpy_bulk_engine_matches_the_python_engine():
+    lines = [value + "\n" for value in wall_times("2024-03-10", "2024-11-03")]
+    outputs = []
+    for engine in ("python", "numpy"):
+        converter = tc.BulkConverter("EST5EDT", "Europe/Paris", engine=engine)
+        outputs.append(converter.convert_chunk(lines))
+    assert outputs[0] == outputs[1]
+
+
+def test_per_invocation_baseline_bypasses_a_resident_server(monkeypatch, capsys):
+    calls = []
+    monkeypatch.setattr("subprocess.run", lambda command, **options: calls.append((command, options)))
+    bench.benchmark_bulk(rows=10, invocations=2)
+    baseline = [options for command, options in calls if "bulk" not in command]
+    assert len(baseline) == 2
+    assert all(options["env"]["TIMEZONE_CONVERTER_SOCKET"] == "" for options in baseline)